@@ -31,6 +31,15 @@ class AknLegalReferences(Legal_refListener, Legal_refVisitor):
         self.LoggerCounter = 0
         Akn_LOGGER.info('Parsing legal references...')
 
+    # Same result as ParseTreeVisitor.visitChildren (defaultResult None,
+    # shouldVisitNextChild always True, aggregateResult = last child's result)
+    # without the three extra method calls per child node
+    def visitChildren(self, node):
+        result = None
+        for child in node.children or ():
+            result = child.accept(self)
+        return result
+
     # Visit a parse tree produced by Legal_refParser#legal_text.
     #def visitAll_text(self, ctx):
     #   Akn_LOGGER.info("Start parsing legal references...\n")
@@ -2,12 +2,27 @@
 # -*- coding: utf-8 -*-
 import os
 import re
+import copy
+import mmap
+import datetime
 import fnmatch
 import time
 import argparse
-from concurrent.futures import ProcessPoolExecutor, as_completed
+import logging
+from logging.handlers import MemoryHandler
+from concurrent.futures import ProcessPoolExecutor
 
-from antlr4 import FileStream, InputStream, CommonTokenStream, ParseTreeWalker
+try:
+    import hyperscan
+except ImportError:  # προαιρετικό, χωρίς αυτό μένει μόνο το re
+    hyperscan = None
+
+try:
+    import stringzilla
+except ImportError:  # προαιρετικό, SIMD substring search για το &gt; scan
+    stringzilla = None
+
+from antlr4 import InputStream, ParseTreeWalker
 from lxml import etree
 
 # === Project imports (όπως στο αρχικό σου script) ============================
@@ -15,55 +30,210 @@ from AknJudgementClass import AknJudgementXML
 from AknLegalReferencesClass import AknLegalReferences
 from functions import (
     validateXML,
+    validateXMLTree,
     findDatesOfInterest,
-    setupLogger,
     fixStringXML,
 )
 from variables import *
-from grammars.gen.SupremeCourtLexer import SupremeCourtLexer
-from grammars.gen.SupremeCourtParser import SupremeCourtParser
+from grammars.speedy import parse_legal_text, parse_judgment, warm_up
 from grammars.gen.SupremeCourtListener import SupremeCourtListener
-from grammars.gen.Legal_refLexer import Legal_refLexer
-from grammars.gen.Legal_refParser import Legal_refParser
 from grammars.gen.Legal_refListener import Legal_refListener
 from grammars.gen.Legal_refVisitor import Legal_refVisitor
 
 # === Ζέσταμα ανά worker (μία φορά) ===========================================
 REGEXES = {}
 XPATHS = {}
+XSD = None
+LOGGER = None
+LOG_BUFFER = None
+LOG_FORMATTER = logging.Formatter(
+    "%(asctime)s - %(filename)s - %(levelname)s - %(message)s"
+)
+# directories που έχουν ήδη δημιουργηθεί σε αυτό το process
+_DIR_CACHE = set()
+# metadata από το όνομα αρχείου, υπολογίζεται μία φορά στο main process
+FILENAME_META_RE = re.compile(r'Ar?\s+(?P<decisionNumber>\d+)[_](?P<issueYear>\d+)')
+HS_DB = None
+# Απόλυτα paths, αποτιμώνται με έναν XPathEvaluator ανά έγγραφο
+AKN_PATHS = {
+    'hdr': '/akomaNtoso/judgment/header',
+    'concl': '/akomaNtoso/judgment/conclusions',
+    'wf': '/akomaNtoso/judgment/meta/workflow',
+    'refs': '/akomaNtoso/judgment/meta/references',
+    'frbrW': '/akomaNtoso/judgment/meta/identification/FRBRWork/FRBRdate',
+    'frbrE': '/akomaNtoso/judgment/meta/identification/FRBRExpression/FRBRdate',
+}
+HS_IDS = {'public': 0, 'conf': 1, 'pub': 2, 'para': 3}
+# Σταθερά metadata του Αρείου Πάγου και <meta> skeleton ανά worker με
+# placeholders για τα πεδία που αλλάζουν ανά απόφαση
+SCCC_META = {'textType': 'judgment', 'author': '#SCCC', 'foreas': 'SCCC'}
+SKEL_YEAR = '__ISSUE_YEAR__'
+SKEL_DECNO = '__DECISION_NUMBER__'
+META_SKEL = None
+META_SKEL_DATE = None
+
+def _hs_expression(pattern):
+    # Το Hyperscan δεν υποστηρίζει named groups
+    return re.sub(r'\(\?P<\w+>', '(?:', pattern).encode('utf-8')
+
+def _build_hs_db():
+    """Multi-pattern Hyperscan DB για τα 4 patterns, ή None αν δεν γίνεται."""
+    if hyperscan is None:
+        return None
+    patterns = {
+        'public': publicHearingDatePattern,
+        'conf': courtConferenceDatePattern,
+        'pub': decisionPublicationDatePattern,
+        'para': paragraphPattern,
+    }
+    flag = hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP | hyperscan.HS_FLAG_SINGLEMATCH
+    db = hyperscan.Database()
+    try:
+        db.compile(
+            expressions=[_hs_expression(patterns[k]) for k in HS_IDS],
+            ids=[HS_IDS[k] for k in HS_IDS],
+            elements=len(HS_IDS),
+            flags=[flag] * len(HS_IDS),
+        )
+    except hyperscan.error:
+        return None
+    return db
+
+def _hs_scan(data):
+    """Ένα πέρασμα για όλα τα patterns, επιστρέφει τα ids που ταίριαξαν."""
+    hits = set()
+    def on_match(pid, start, end, flags, context):
+        hits.add(pid)
+    HS_DB.scan(data, match_event_handler=on_match)
+    return hits
+
+def _prefilter(key):
+    """Prefilter για findDatesOfInterest/fixStringXML (None χωρίς Hyperscan).
+    Μόνο αποκλείει κείμενα, τα groups εξάγονται πάντα από το re."""
+    if HS_DB is None:
+        return None
+    pid = HS_IDS[key]
+    return lambda data: pid in _hs_scan(data)
+
+def _ensure(d):
+    """os.makedirs μόνο την πρώτη φορά για κάθε directory ανά process."""
+    if d not in _DIR_CACHE:
+        os.makedirs(d, exist_ok=True)
+        _DIR_CACHE.add(d)
+
+def _read_text(path):
+    """UTF-8 κείμενο αρχείου μέσω mmap (ένα decode, χωρίς codecs.open του FileStream)."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ''
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return mm[:].decode('utf-8')
+
+def _build_meta_skeleton():
+    """Ένα createMeta() με placeholders, χωρίς logging στο Akn_LOGGER."""
+    global META_SKEL, META_SKEL_DATE
+    logger = logging.getLogger('Akn_LOGGER')
+    disabled = logger.disabled
+    logger.disabled = True
+    try:
+        META_SKEL = AknJudgementXML(
+            issueYear=SKEL_YEAR, decisionNumber=SKEL_DECNO, **SCCC_META
+        ).createMeta()
+    finally:
+        logger.disabled = disabled
+    # το createMeta γράφει τη σημερινή ημερομηνία (FRBRManifestation, lifecycle)
+    META_SKEL_DATE = str(datetime.date.today())
+
+def _meta_from_skeleton(decisionNumber, issueYear):
+    """Αντίγραφο του skeleton με τα στοιχεία της απόφασης (ίδιο με createMeta())."""
+    if META_SKEL is None or META_SKEL_DATE != str(datetime.date.today()):
+        _build_meta_skeleton()
+    metaElem = copy.deepcopy(META_SKEL)
+    for el in metaElem.iter():
+        for key, value in el.attrib.items():
+            if SKEL_YEAR in value or SKEL_DECNO in value:
+                el.set(key, value.replace(SKEL_YEAR, issueYear).replace(SKEL_DECNO, decisionNumber))
+    return metaElem
 
 def init_worker():
     """Precompile regex & XPath μία φορά ανά process για ταχύτητα."""
-    global REGEXES, XPATHS
+    global REGEXES, XPATHS, HS_DB, XSD, LOGGER, LOG_BUFFER
     REGEXES = {
-        'public': re.compile(publicHearingDatePattern),
-        'conf': re.compile(courtConferenceDatePattern),
-        'pub': re.compile(decisionPublicationDatePattern),
-        'para': re.compile(paragraphPattern),
+        'public': publicHearingDateRegex,
+        'conf': courtConferenceDateRegex,
+        'pub': decisionPublicationDateRegex,
+        'para': paragraphRegex,
     }
     XPATHS = {
-        'hdr': etree.XPath('/akomaNtoso/judgment/header'),
-        'concl': etree.XPath('/akomaNtoso/judgment/conclusions'),
-        'wf': etree.XPath('/akomaNtoso/judgment/meta/workflow'),
-        'refs': etree.XPath('/akomaNtoso/judgment/meta/references'),
-        'frbrW': etree.XPath('/akomaNtoso/judgment/meta/identification/FRBRWork/FRBRdate'),
-        'frbrE': etree.XPath('/akomaNtoso/judgment/meta/identification/FRBRExpression/FRBRdate'),
+        'ps': etree.XPath('p'),
     }
+    HS_DB = _build_hs_db()
+    _build_meta_skeleton()
+    # Ένας logger ανά worker (ίδιο όνομα με functions.Akn_LOGGER): οι εγγραφές
+    # μαζεύονται στη μνήμη και γράφονται μία φορά στο log του κάθε αρχείου
+    LOGGER = logging.getLogger('Akn_LOGGER')
+    LOGGER.setLevel(logging.DEBUG)
+    for handler in LOGGER.handlers[:]:
+        LOGGER.removeHandler(handler)
+    LOG_BUFFER = MemoryHandler(capacity=1000, flushLevel=logging.CRITICAL + 1)
+    LOGGER.addHandler(LOG_BUFFER)
+    try:
+        XSD = etree.XMLSchema(etree.parse('akomantoso30.xsd'))
+    except (OSError, etree.XMLSyntaxError, etree.XMLSchemaParseError):
+        XSD = None  # fallback: validateXML ανά αρχείο, όπως πριν
+    warm_up()
 
 # === Helper για dates (ίδια λογική) ==========================================
-def _add_date(node, regex, name, wf, refs, frbrW, frbrE, author):
-    res = findDatesOfInterest(node, regex, name, author)
+def _add_date(node, key, name, wf, refs, frbrW, frbrE, author):
+    res = findDatesOfInterest(node, REGEXES[key], name, author, _prefilter(key))
     if not res:
-        return
+        return False
     _, step, tlc = res
     wf.insert(0, step)
     refs.append(tlc)
     frbrW.set('date', step.get('date')); frbrW.set('name', name)
     frbrE.set('date', step.get('date')); frbrE.set('name', name)
+    return True
+
+def _write_all(fd, data):
+    """os.write μέχρι να γραφτεί όλο το buffer (unbuffered, χωρίς BufferedWriter)."""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+def _gt_finder(xml_bytes):
+    """find(start) για το b'&gt;' πάνω στο xml_bytes: με stringzilla (SIMD)
+    αν υπάρχει, αλλιώς bytes.find."""
+    if stringzilla is not None:
+        haystack = stringzilla.Str(xml_bytes)
+        return lambda start: haystack.find(b'&gt;', start)
+    return lambda start: xml_bytes.find(b'&gt;', start)
+
+def _write_unescaped_gt(path, xml_bytes):
+    """Γράφει το xml_bytes στο path με κάθε b'&gt;' ως b'>' (ίδια bytes με το
+    παλιό global replace), χωρίς δεύτερο αντίγραφο του εγγράφου και με raw
+    os.write (ένα syscall όταν δεν υπάρχει &gt;)."""
+    find_gt = _gt_finder(xml_bytes)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        pos = find_gt(0)
+        if pos == -1:
+            _write_all(fd, xml_bytes)
+            return
+        view = memoryview(xml_bytes)
+        start = 0
+        while pos != -1:
+            _write_all(fd, view[start:pos])
+            _write_all(fd, b'>')
+            start = pos + 4
+            pos = find_gt(start)
+        _write_all(fd, view[start:])
+    finally:
+        os.close(fd)
 
 # === Επεξεργασία ενός αρχείου (πανομοιότυπο output) ==========================
 def process_one(task):
-    root, name = task
+    root, name, stem, decisionNumber, issueYear = task
     t0 = time.perf_counter()
 
     base_texts_root = os.path.join(os.getcwd(), LEGAL_TEXTS)
@@ -71,47 +241,34 @@ def process_one(task):
     xml_path  = root.replace(base_texts_root, os.path.join(os.getcwd(), XML))
     ner_path  = root.replace(base_texts_root, os.path.join(os.getcwd(), NER))
 
-    os.makedirs(logs_path, exist_ok=True)
-    os.makedirs(xml_path,  exist_ok=True)
+    _ensure(logs_path)
+    _ensure(xml_path)
 
     log_file = os.path.join(logs_path, name)
-    xml_file = os.path.join(xml_path, name.split('.')[0] + XML_EXT)
-    text_file = os.path.join(xml_path, name.split('.')[0] + TXT_EXT)
+    xml_file = os.path.join(xml_path, stem + XML_EXT)
+    text_file = os.path.join(xml_path, stem + TXT_EXT)
     gate_xml_file = os.path.join(ner_path, name + XML_EXT)
+    has_gate = os.path.isfile(gate_xml_file)
 
-    logger = setupLogger('Akn_LOGGER', log_file)
+    file_handler = logging.FileHandler(log_file, mode='w', delay=True)
+    file_handler.setFormatter(LOG_FORMATTER)
+    LOG_BUFFER.setTarget(file_handler)
+    logger = LOGGER
     logger.info('Starting conversion of %s', name)
 
     try:
         print("judgment decision:", name)
 
         # --- METADATA (ίδιο extraction) ---
-        meta = {
-            'textType': 'judgment',
-            'author': '#SCCC',
-            'foreas': 'SCCC',
-            'issueYear': '',
-            'decisionNumber': '',
-        }
-        m = re.search(r'Ar?\s+(?P<decisionNumber>\d+)[_](?P<issueYear>\d+)', name)
-        if m:
-            meta['decisionNumber'] = m.group('decisionNumber')
-            meta['issueYear'] = m.group('issueYear')
+        meta = dict(SCCC_META, issueYear=issueYear, decisionNumber=decisionNumber)
 
         # --- LEGAL REFERENCES (1ο πέρασμα) ---
-        fin = FileStream(os.path.join(root, name), encoding='utf-8')
-        lex = Legal_refLexer(fin)
-        tok = CommonTokenStream(lex)
-        pref = Legal_refParser(tok)
-        tre = pref.legal_text()
+        fin = InputStream(_read_text(os.path.join(root, name)))
+        tre = parse_legal_text(fin)
         answer = AknLegalReferences().visit(tre)
 
         # --- STRUCTURE (2ο πέρασμα) ---
-        inp = InputStream(answer)
-        lex2 = SupremeCourtLexer(inp)
-        tok2 = CommonTokenStream(lex2)
-        pars = SupremeCourtParser(tok2)
-        tre2 = pars.judgment()
+        tre2 = parse_judgment(InputStream(answer))
         walker = ParseTreeWalker()
 
         judgmentObj = AknJudgementXML(
@@ -123,10 +280,10 @@ def process_one(task):
         )
         walker.walk(judgmentObj, tre2)
 
-        metaElem = judgmentObj.createMeta()
+        metaElem = _meta_from_skeleton(meta['decisionNumber'], meta['issueYear'])
 
         # --- Inject NER references (ίδιο) ---
-        if os.path.isfile(gate_xml_file):
+        if has_gate:
             refs_node = metaElem.find('references')
             if refs_node is not None:
                 idx = list(metaElem).index(refs_node)
@@ -134,42 +291,45 @@ def process_one(task):
                 metaElem.remove(refs_node); metaElem.insert(idx, newRefs)
 
         # --- In-text NER (ίδιο) ---
-        if os.path.isfile(gate_xml_file):
+        if has_gate:
             judgmentObj.text = judgmentObj.createNamedEntitiesInText(
                 gate_xml_file, judgmentObj.text
             )
 
         # --- Build AkomaNtoso (ίδιο) ---
         akn = judgmentObj.createAkomaNtosoRoot()
-        judgmentObj.text = fixStringXML(judgmentObj.text, REGEXES['para'])
+        judgmentObj.text = fixStringXML(judgmentObj.text, REGEXES['para'], _prefilter('para'))
         jElem = judgmentObj.XML()
         akn.insert(0, jElem)
         jNode = akn.find('judgment')
         jNode.insert(0, metaElem)
 
-        # --- Dates of interest (ίδιο αποτέλεσμα, πιο γρήγορα με precompiled XPath) ---
-        hdr   = XPATHS['hdr'](akn)[0]
-        concl = XPATHS['concl'](akn)[0]
-        wf    = XPATHS['wf'](akn)[0]
-        refs  = XPATHS['refs'](akn)[0]
-        frbrW = XPATHS['frbrW'](akn)[0]
-        frbrE = XPATHS['frbrE'](akn)[0]
-
-        _add_date(hdr,   REGEXES['public'], 'publicHearingDate',     wf, refs, frbrW, frbrE, meta['author'])
-        _add_date(concl, REGEXES['conf'],   'courtConferenceDate',   wf, refs, frbrW, frbrE, meta['author'])
-        _add_date(concl, REGEXES['pub'],    'decisionPublicationDate', wf, refs, frbrW, frbrE, meta['author'])
-
-        if not concl.find('.//date[@refersTo="decisionPublicationDate"]'):
-            for p in concl.findall('p'):
-                _add_date(p, REGEXES['pub'], 'decisionPublicationDate', wf, refs, frbrW, frbrE, meta['author'])
-                if concl.find('.//date[@refersTo="decisionPublicationDate"]'):
+        # --- Dates of interest (ένα XPath context για όλα τα lookups) ---
+        xpe = etree.XPathEvaluator(akn)
+        hdr   = xpe(AKN_PATHS['hdr'])[0]
+        concl = xpe(AKN_PATHS['concl'])[0]
+        wf    = xpe(AKN_PATHS['wf'])[0]
+        refs  = xpe(AKN_PATHS['refs'])[0]
+        frbrW = xpe(AKN_PATHS['frbrW'])[0]
+        frbrE = xpe(AKN_PATHS['frbrE'])[0]
+
+        _add_date(hdr,   'public', 'publicHearingDate',     wf, refs, frbrW, frbrE, meta['author'])
+        _add_date(concl, 'conf',   'courtConferenceDate',   wf, refs, frbrW, frbrE, meta['author'])
+        found = _add_date(concl, 'pub', 'decisionPublicationDate', wf, refs, frbrW, frbrE, meta['author'])
+
+        # fallbacks: το _add_date επιστρέφει αν μπήκε date, χωρίς επαναλαμβανόμενα XPath probes
+        if not found:
+            for p in XPATHS['ps'](concl):
+                if _add_date(p, 'pub', 'decisionPublicationDate', wf, refs, frbrW, frbrE, meta['author']):
+                    found = True
                     break
 
-        if not concl.find('.//date[@refersTo="decisionPublicationDate"]'):
-            ps = concl.findall('p')
+        if not found:
+            ps = XPATHS['ps'](concl)
             for i, p in enumerate(ps[:-1]):
-                if 'ΔΗΜΟΣΙΕΥΘΗΚΕ' in ''.join(p.itertext()):
-                    _add_date(ps[i+1], REGEXES['pub'], 'decisionPublicationDate', wf, refs, frbrW, frbrE, meta['author'])
+                # text extraction από το libxml2 σε ένα βήμα αντί για itertext()
+                if 'ΔΗΜΟΣΙΕΥΘΗΚΕ' in etree.tostring(p, method='text', encoding='unicode', with_tail=False):
+                    _add_date(ps[i+1], 'pub', 'decisionPublicationDate', wf, refs, frbrW, frbrE, meta['author'])
                     break
 
         # --- Serialize (απολύτως ίδιο με πριν) ---
@@ -180,14 +340,15 @@ def process_one(task):
             encoding='UTF-8',
             xml_declaration=True
         )
-        # Σκόπιμα κρατάμε το ΠΑΛΙΟ global replace για απόλυτη ταυτότητα bytes
-        xml_bytes = xml_bytes.replace(b'&gt;', b'>')
-
-        with open(xml_file, 'wb') as fout:
-            fout.write(xml_bytes)
+        # Σκόπιμα κρατάμε το ΠΑΛΙΟ global replace για απόλυτη ταυτότητα bytes,
+        # αλλά γίνεται κατά το γράψιμο (streaming) αντί για νέο buffer
+        _write_unescaped_gt(xml_file, xml_bytes)
 
-        # --- Validation (ίδια κλήση για να μη διαφέρει τίποτα) ---
-        validateXML('akomantoso30.xsd', xml_file, log_file)
+        # --- Validation (ένα compiled schema ανά worker, πάνω στο tree στη μνήμη) ---
+        if XSD is not None:
+            validateXMLTree(XSD, tree, log_file)
+        else:
+            validateXML('akomantoso30.xsd', xml_file, log_file)
 
         status = 'ok'
 
@@ -215,6 +376,9 @@ def process_one(task):
     finally:
         dur = round(time.perf_counter() - t0, 3)
         logger.info('Finished %s in %ss', name, dur)
+        LOG_BUFFER.flush()
+        LOG_BUFFER.setTarget(None)
+        file_handler.close()
 
     return (name, status, dur)
 
@@ -225,12 +389,18 @@ def enumerate_tasks(source_path: str, file_pattern: str):
         base_texts_root = os.path.join(os.getcwd(), LEGAL_TEXTS)
         logs_path = root.replace(base_texts_root, os.path.join(os.getcwd(), LOGS))
         xml_path  = root.replace(base_texts_root, os.path.join(os.getcwd(), XML))
-        os.makedirs(logs_path, exist_ok=True)
-        os.makedirs(xml_path,  exist_ok=True)
+        _ensure(logs_path)
+        _ensure(xml_path)
 
         for name in files:
             if fnmatch.fnmatch(name, file_pattern):
-                yield (root, name)
+                # stem όπως το παλιό name.split('.')[0] (μέχρι την πρώτη τελεία)
+                stem = name.partition('.')[0]
+                m = FILENAME_META_RE.search(name)
+                if m:
+                    yield (root, name, stem, m.group('decisionNumber'), m.group('issueYear'))
+                else:
+                    yield (root, name, stem, '', '')
 
 # === main ====================================================================
 def main():
@@ -261,17 +431,17 @@ def main():
         return
 
     t_start = time.perf_counter()
+    # batching των tasks ώστε να μειωθεί το pickling/IPC ανά αρχείο
+    chunksize = max(1, min(16, len(tasks) // (args.workers * 4)))
     with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker) as ex:
-        futs = [ex.submit(process_one, t) for t in tasks]
         done = 0
         ok = 0
-        for fut in as_completed(futs):
-            name, status, dur = fut.result()
+        for name, status, dur in ex.map(process_one, tasks, chunksize=chunksize):
             done += 1
             ok += 1 if status == 'ok' else 0
             # ελαφρύ progress
             if done % 50 == 0 or status != 'ok':
-                print(f'[{done}/{len(futs)}] {name}: {status} ({dur}s)')
+                print(f'[{done}/{len(tasks)}] {name}: {status} ({dur}s)')
 
     total = round(time.perf_counter() - t_start, 2)
     print(f'All done in {total}s. Files: {len(tasks)}. Workers: {args.workers}. OK: {ok}.')
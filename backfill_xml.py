@@ -1,34 +1,65 @@
-
 import os
-from pymongo import MongoClient
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+import zstandard as zstd
+from bson.binary import Binary
+from pymongo import MongoClient, UpdateOne
 
 # ─── Configuration ──────────────────────────────────
 MONGO_URI       = "mongodb://localhost:27017/"
 DB_NAME         = "judgmentsV2"
 COLLECTION_NAME = "courtDecisions"
 XML_DIR         = "XML"   # top-level folder where your XML files live
+BATCH_SIZE      = 500     # UpdateOne ops per bulk_write
+READ_WORKERS    = 16      # threads reading XML files from disk
+ZSTD_LEVEL      = 9       # XML is stored zstd-compressed in "xml_zstd"
 
 # ─── Connect ────────────────────────────────────────
-client     = MongoClient(MONGO_URI)
+client     = MongoClient(MONGO_URI, compressors="zstd")
 collection = client[DB_NAME][COLLECTION_NAME]
 
+# ─── Index XML files once (first match in walk order wins) ───
+file_index = {}
+for root, dirs, files in os.walk(XML_DIR):
+    for fn in files:
+        file_index.setdefault(fn, os.path.join(root, fn))
+
+def read_compressed(path):
+    """Reads an XML file and returns it zstd-compressed (UTF-8 bytes) with the
+    sha256 of the uncompressed bytes."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = f.read().encode("utf-8")
+    return (Binary(zstd.ZstdCompressor(level=ZSTD_LEVEL).compress(data)),
+            hashlib.sha256(data).hexdigest())
+
+def flush(batch, pool):
+    """Reads & compresses the batch files in parallel and writes them with one bulk_write."""
+    blobs = pool.map(read_compressed, [path for _, _, path in batch])
+    ops = []
+    for (_id, fn, _), (blob, digest) in zip(batch, blobs):
+        ops.append(UpdateOne(
+            {"_id": _id},
+            # xml_sha256: hash of the stored XML (judgmentsUI caches parsed trees by it)
+            {"$set": {"xml_zstd": blob, "xml_sha256": digest}, "$unset": {"xml": ""}}
+        ))
+        print(f"Backfilled {fn}")
+    collection.bulk_write(ops, ordered=False)
+
 # ─── Iterate & backfill ─────────────────────────────
-for doc in collection.find({}, {"file_name":1}):
-    fn = doc["file_name"]
-    # assume the file lives somewhere under XML_DIR
-    # if you have subfolders by court/year, you may need to walk
-    for root, dirs, files in os.walk(XML_DIR):
-        if fn in files:
-            path = os.path.join(root, fn)
-            with open(path, "r", encoding="utf-8") as f:
-                xml = f.read()
-            collection.update_one(
-                {"_id": doc["_id"]},
-                {"$set": {"xml": xml}}
-            )
-            print(f"Backfilled {fn}")
-            break
-    else:
-        print(f"⚠️  File not found on disk: {fn}")
-
-print("✅ Done backfilling XML.")
\ No newline at end of file
+batch = []
+with ThreadPoolExecutor(max_workers=READ_WORKERS) as pool:
+    for doc in collection.find({}, {"file_name":1}):
+        fn = doc["file_name"]
+        path = file_index.get(fn)
+        if path is None:
+            print(f"⚠️  File not found on disk: {fn}")
+            continue
+        batch.append((doc["_id"], fn, path))
+        if len(batch) >= BATCH_SIZE:
+            flush(batch, pool)
+            batch.clear()
+
+    if batch:
+        flush(batch, pool)
+
+print("✅ Done backfilling XML.")
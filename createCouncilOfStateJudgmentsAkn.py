@@ -1,6 +1,5 @@
 # -*- coding: utf-8 -*-
 import os
-import re
 import datetime
 import sys
 import fnmatch
@@ -8,33 +7,37 @@ import time
 import argparse
 import traceback
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
-from antlr4 import FileStream, CommonTokenStream, InputStream, ParseTreeWalker
+from antlr4 import CommonTokenStream, InputStream, ParseTreeWalker
 from lxml import etree
 
 from AknJudgementClass import AknJudgementXML
 from AknLegalReferencesClass import AknLegalReferences
 from functions import (
-    validateXML,
+    validateXMLTree,
+    loadXMLSchema,
     findDatesOfInterest,
-    setupLogger,
     fixStringXML,
     CheckXMLvalidity
 )
 from variables import (
     LEGAL_TEXTS, STE, LOGS, XML, NER, STE_METADATA,
     TXT_EXT, XML_EXT,
-    publicHearingDatePattern,
-    courtConferenceDatePattern,
-    decisionPublicationDatePattern,
-    paragraphPattern
+    publicHearingDateRegex,
+    courtConferenceDateRegex,
+    decisionPublicationDateRegex
 )
 
 from grammars.gen.CouncilOfStateLexer import CouncilOfStateLexer
 from grammars.gen.CouncilOfStateParser import CouncilOfStateParser
 from grammars.gen.Legal_refLexer import Legal_refLexer
 from grammars.gen.Legal_refParser import Legal_refParser
-from antlr4.error.ErrorListener import ErrorListener
+from antlr4.error.ErrorListener import ErrorListener, ConsoleErrorListener
+from antlr4.error.ErrorStrategy import BailErrorStrategy, DefaultErrorStrategy
+from antlr4.error.Errors import ParseCancellationException
+from antlr4.atn.PredictionMode import PredictionMode
 
 
 class SilentErrorListener(ErrorListener):
@@ -43,251 +46,398 @@ class SilentErrorListener(ErrorListener):
         pass
 
 
-def safe_to_str(data):
-    """Convert bytes to UTF-8 string, leave str unchanged."""
-    if isinstance(data, bytes):
-        return data.decode('utf-8')
-    if isinstance(data, str):
-        return data
-    raise TypeError(f"Unexpected type: {type(data)}")
+# Ένας logger ανά worker (ίδιο όνομα με functions.Akn_LOGGER): ανά αρχείο
+# αλλάζει μόνο ο FileHandler, χωρίς setupLogger/logging.shutdown()
+_LOGGER = logging.getLogger('Akn_LOGGER')
+_LOGGER.setLevel(logging.DEBUG)
+_LOG_FORMATTER = logging.Formatter(
+    "%(asctime)s - %(filename)s - %(levelname)s - %(message)s"
+)
+
+
+def switch_log_file(log_file):
+    """Αντικαθιστά τους handlers του _LOGGER με ένα FileHandler στο log_file
+    (mode='w', ίδιο format με το setupLogger) και τον επιστρέφει."""
+    for handler in _LOGGER.handlers[:]:
+        _LOGGER.removeHandler(handler)
+        handler.close()
+    file_handler = logging.FileHandler(log_file, mode='w')
+    file_handler.setFormatter(_LOG_FORMATTER)
+    _LOGGER.addHandler(file_handler)
+    return file_handler
+
+
+# lexer/parser ανά grammar, ένα ζευγάρι ανά worker process
+_RECOGNIZERS = {}
+
+
+def get_parser(lexerCls, parserCls, input_stream):
+    """Επιστρέφει τον parser του parserCls πάνω στο input_stream,
+    επαναχρησιμοποιώντας lexer/parser (και τους ATN simulators τους)
+    από προηγούμενα αρχεία του ίδιου process.
+
+    Args:
+        lexerCls: η κλάση του lexer (π.χ. CouncilOfStateLexer)
+
+        parserCls: η κλάση του parser (π.χ. CouncilOfStateParser)
+
+        input_stream: antlr4 InputStream του κειμένου
+
+    Returns:
+        parser έτοιμος για parse
+    """
+    cached = _RECOGNIZERS.get(parserCls)
+    if cached is None:
+        lexer = lexerCls(input_stream)
+        parser = parserCls(CommonTokenStream(lexer))
+        _RECOGNIZERS[parserCls] = (lexer, parser)
+        return parser
+    lexer, parser = cached
+    lexer.inputStream = input_stream
+    parser.setTokenStream(CommonTokenStream(lexer))
+    return parser
+
+
+def parse_sll_first(parser, rule):
+    """Τρέχει τον κανόνα rule πρώτα σε SLL mode με BailErrorStrategy (χωρίς
+    full-context prediction) και μόνο αν αποτύχει ξανά σε LL mode με το
+    default error recovery, όπως πριν.
+
+    Args:
+        parser: ANTLR parser με έτοιμο token stream
+
+        rule: όνομα του κανόνα εκκίνησης (π.χ. 'judgment')
+
+    Returns:
+        το parse tree του κανόνα
+    """
+    parser._interp.predictionMode = PredictionMode.SLL
+    parser._errHandler = BailErrorStrategy()
+    parser.removeErrorListeners()
+    parser.addErrorListener(SilentErrorListener())
+    try:
+        return getattr(parser, rule)()
+    except ParseCancellationException:
+        parser.reset()
+        parser._interp.predictionMode = PredictionMode.LL
+        parser._errHandler = DefaultErrorStrategy()
+        parser.removeErrorListeners()
+        parser.addErrorListener(ConsoleErrorListener.INSTANCE)
+        return getattr(parser, rule)()
+
+
+def find_line_start(text, marker, stripped=False):
+    """Offset της αρχής της πρώτης γραμμής του text που ξεκινά με marker
+    (με stripped=True αγνοούνται τα αρχικά κενά της γραμμής), ή -1.
+    Η αναζήτηση γίνεται με str.find αντί για σάρωση γραμμή-γραμμή."""
+    pos = text.find(marker)
+    while pos != -1:
+        line_start = text.rfind('\n', 0, pos) + 1
+        prefix = text[line_start:pos]
+        if not prefix or (stripped and not prefix.strip()):
+            return line_start
+        pos = text.find(marker, pos + 1)
+    return -1
+
+
+def parse_ddmmyyyy(s):
+    """Ημερομηνία dd/mm/yyyy του _meta.txt χωρίς strptime (δεκτά και
+    μη-zero-padded d/m όπως στο '%d/%m/%Y'). Αν δεν είναι dd/mm/yyyy
+    θεωρείται σκέτο έτος (1η Ιανουαρίου)."""
+    parts = s.split('/')
+    if len(parts) == 3:
+        dd, mm, yyyy = parts
+        if dd.isdigit() and mm.isdigit() and len(yyyy) == 4 and yyyy.isdigit():
+            try:
+                return datetime.date(int(yyyy), int(mm), int(dd))
+            except ValueError:
+                pass
+    return datetime.date(int(s), 1, 1)
+
+
+# τα prefixes των φακέλων υπολογίζονται μία φορά (όχι os.getcwd() ανά αρχείο)
+_CWD             = os.getcwd()
+_LT_PREFIX       = os.path.join(_CWD, LEGAL_TEXTS)
+_LOGS_PREFIX     = os.path.join(_CWD, LOGS)
+_XML_PREFIX      = os.path.join(_CWD, XML)
+_NER_PREFIX      = os.path.join(_CWD, NER)
+_STE_META_PREFIX = os.path.join(_CWD, STE_METADATA)
+
+
+# precompiled XPaths για το tree που χτίζεται (χωρίς namespace prefixes)
+XP_HEADER       = etree.XPath("/akomaNtoso/judgment/header")
+XP_INTRODUCTION = etree.XPath("/akomaNtoso/judgment/judgmentBody/introduction")
+XP_CONCLUSIONS  = etree.XPath("/akomaNtoso/judgment/conclusions")
+XP_WORKFLOW     = etree.XPath("/akomaNtoso/judgment/meta/workflow")
+XP_FRBRW_DATE   = etree.XPath("/akomaNtoso/judgment/meta/identification/FRBRWork/FRBRdate")
+XP_FRBRE_DATE   = etree.XPath("/akomaNtoso/judgment/meta/identification/FRBRExpression/FRBRdate")
+
+
+def add_date(node, regex, name, author, wf_node, refs_node, frbrW, frbrE):
+    """Προσθέτει την ημερομηνία name (αν βρεθεί στο node) στο workflow,
+    στα references και στα FRBRdate των Work/Expression."""
+    res = findDatesOfInterest(node, regex, name, author)
+    if not res:
+        return
+    _, step, tlc = res
+    wf_node.insert(0, step)
+    if refs_node is not None:
+        refs_node.append(tlc)
+    frbrW.set('date', step.get('date')); frbrW.set('name', name)
+    frbrE.set('date', step.get('date')); frbrE.set('name', name)
+
+
+def process_one(task):
+    """Μετατρέπει ένα κείμενο του ΣτΕ σε Akoma Ntoso XML (εκτελείται σε worker)."""
+    root, name = task
+    rel             = root[len(_LT_PREFIX):]
+    logs_path       = _LOGS_PREFIX + rel
+    xml_path        = _XML_PREFIX + rel
+    ner_path        = _NER_PREFIX + rel
+    ste_meta_path   = _STE_META_PREFIX + rel
+
+    print(f"▷ Processing {name}")
+    start_time = time.perf_counter()
+    log_file    = os.path.join(logs_path, name)
+    xml_file    = os.path.join(xml_path, name.rsplit('.',1)[0] + XML_EXT)
+    txt_file    = os.path.join(root, name)
+    gate_xml    = os.path.join(ner_path, name + XML_EXT)
+    has_gate    = os.path.isfile(gate_xml)
+
+    log_handler = switch_log_file(log_file)
+    _LOGGER.info(f"Converting {name}")
+
+    status = 'ok'
+    try:
+        # ─── METADATA ────────────────────────────────────────────────
+        meta = {'textType':"judgment", 'author':"#COS", 'foreas':"COS"}
+        year_part = name.rsplit('.',1)[0].split('_')[-1]
+        meta_file = os.path.join(
+            ste_meta_path,
+            name.rsplit('.',1)[0] + '_meta' + TXT_EXT
+        )
+        # EAFP: ένα open αντί για stat + open
+        try:
+            with open(meta_file, encoding='utf-8') as fmeta:
+                lines = fmeta.read().splitlines()
+        except FileNotFoundError:
+            lines = None
+        if lines is not None:
+            num, yr = lines[0].split('/')
+            meta.update(
+                decisionNumber=num + "/" + yr,
+                issueYear=yr,
+                ECLI=None if lines[7].strip() in ('','-') else lines[7].strip()
+            )
+            meta['publicationDate'] = str(parse_ddmmyyyy(lines[3].strip()))
+        else:
+            meta.update(
+                decisionNumber=name.split('_')[0],
+                issueYear=year_part,
+                ECLI=None,
+                publicationDate=None
+            )
+        # ─────────────────────────────────────────────────────────────
+
+
+        # ─── READ RAW TEXT FOR HEADER & INTRO ────────────────────────
+        with open(txt_file, 'rb') as fin:
+            text = fin.read().decode('utf-8')
+        # find "Αριθμός X/Y" and the "Για να δικάσει" line with str.find
+        num_start   = find_line_start(text, "Αριθμός")
+        intro_start = find_line_start(text, "Για να δικάσει", stripped=True)
+        if num_start == -1 or intro_start == -1:
+            raise ValueError(f"header/introduction markers not found in {name}")
+        # only the header block is split into lines
+        hdr_end = intro_start if intro_start > num_start else len(text)
+        raw = text[num_start:hdr_end].splitlines()
+        docNumber = raw[0].split(" ",1)[1].strip()
+
+        # one pass over the header lines, skipping blank lines:
+        # docProponent, subDepartment, then headerDetails until "Για να δικάσει"
+        with_details = intro_start > num_start
+        hdr_lines = []
+        for ln in raw[1:]:
+            ln = ln.strip()
+            if ln:
+                hdr_lines.append(ln)
+                if not with_details and len(hdr_lines) == 2:
+                    break
+        docProponent  = hdr_lines[0]
+        subDepartment = hdr_lines[1]
+        headerDetails = " ".join(hdr_lines[2:])
+        introduction_block = "\n\n".join(text[intro_start:].splitlines()).strip()
+        # ─────────────────────────────────────────────────────────────
+
+        # build our judgment object
+        judgmentObj = AknJudgementXML(
+            textType       = meta['textType'],
+            author         = meta['author'],
+            foreas         = meta['foreas'],
+            issueYear      = meta['issueYear'],
+            decisionNumber = meta['decisionNumber'],
+            ECLI           = meta['ECLI'],
+            publicationDate= meta['publicationDate']
+        )
+        metaElem = judgmentObj.createMeta()
+        if has_gate:
+            refs = metaElem.find('references')
+            if refs is not None:
+                idx0 = list(metaElem).index(refs)
+                newr = judgmentObj.modifyReferencesFromGateXml(gate_xml, refs)
+                metaElem.remove(refs)
+                metaElem.insert(idx0, newr)
+
+        # ─── LEGAL REFERENCES ───────────────────────────────────────
+        parser1 = get_parser(Legal_refLexer, Legal_refParser, InputStream(text))
+        tree1   = parse_sll_first(parser1, 'legal_text')
+        answer  = AknLegalReferences().visit(tree1)
+        # ─────────────────────────────────────────────────────────────
+
+        # ─── STRUCTURE PARSING ─────────────────────────────────────
+        _LOGGER.info("Parsing judgment structure")
+        parser2 = get_parser(CouncilOfStateLexer, CouncilOfStateParser, InputStream(answer))
+        tree2   = parse_sll_first(parser2, 'judgment')
+        # ο walker είναι stateless, αρκεί ο κοινός ParseTreeWalker.DEFAULT
+        ParseTreeWalker.DEFAULT.walk(judgmentObj, tree2)
+        # ─────────────────────────────────────────────────────────────
+
+        # inline named entities if present
+        if has_gate:
+            judgmentObj.text = judgmentObj.createNamedEntitiesInText(gate_xml, judgmentObj.text)
+
+        # build AkomaNtoso root
+        ak = judgmentObj.createAkomaNtosoRoot()
+        judgmentElem = judgmentObj.XML()
+        ak.insert(0, judgmentElem)
+        jud_node = ak.find('judgment')
+        jud_node.insert(0, metaElem)
+
+        # ─── OVERRIDE HEADER ───────────────────────────────────────
+        hdr_node = XP_HEADER(ak)[0]
+        # docNumber
+        p1 = etree.Element('p')
+        etree.SubElement(p1, 'docNumber').text = docNumber
+        # docProponent
+        p2 = etree.Element('p')
+        etree.SubElement(p2, 'docProponent').text = docProponent
+        # subDepartment
+        p3 = etree.Element('p')
+        p3.text = subDepartment
+        hdr_ps = [p1, p2, p3]
+        # headerDetails
+        if headerDetails:
+            p4 = etree.Element('p')
+            p4.text = headerDetails
+            hdr_ps.append(p4)
+        # clear existing children, then append all <p> at once
+        del hdr_node[:]
+        hdr_node.extend(hdr_ps)
+        # ─────────────────────────────────────────────────────────────
+
+        # ─── OVERRIDE INTRODUCTION ─────────────────────────────────
+        intro_node = XP_INTRODUCTION(ak)[0]
+        intro_ps = []
+        for para in filter(bool, introduction_block.split('\n\n')):
+            p = etree.Element('p')
+            p.text = para.strip()
+            intro_ps.append(p)
+        del intro_node[:]
+        intro_node.extend(intro_ps)
+        # ─────────────────────────────────────────────────────────────
+
+        # ─── DATES OF INTEREST ─────────────────────────────────────
+        wf_node   = XP_WORKFLOW(ak)[0]
+        refs_node = metaElem.find('references')
+        frbrW     = XP_FRBRW_DATE(ak)[0]
+        frbrE     = XP_FRBRE_DATE(ak)[0]
+        targets   = (meta['author'], wf_node, refs_node, frbrW, frbrE)
+
+        # publicHearingDate in header
+        add_date(hdr_node, publicHearingDateRegex, 'publicHearingDate', *targets)
+        # courtConferenceDate in conclusions
+        concl_node = XP_CONCLUSIONS(ak)[0]
+        add_date(concl_node, courtConferenceDateRegex, 'courtConferenceDate', *targets)
+        # decisionPublicationDate
+        add_date(concl_node, decisionPublicationDateRegex, 'decisionPublicationDate', *targets)
+        # ─────────────────────────────────────────────────────────────
+
+        # ─── SERIALIZE & VALIDATE ───────────────────────────────────
+        tree = etree.ElementTree(ak)
+        tree.write(
+            xml_file,
+            pretty_print=True,
+            encoding='UTF-8',
+            xml_declaration=True
+        )
+        # schema compiled once per worker, validation on the in-memory tree
+        validateXMLTree(loadXMLSchema('akomantoso30.xsd'), tree, log_file)
+        _LOGGER.info(f"Wrote XML → {xml_file}")
+
+    except KeyboardInterrupt:
+        raise
+    except Exception:
+        status = 'error'
+        tb = traceback.format_exc()
+        print(f"Error processing {name}:\n{tb}")
+        _LOGGER.error(f"❌ Failed {name}\n{tb}")
+    finally:
+        elapsed = round(time.perf_counter() - start_time, 2)
+        _LOGGER.info(f"Finished {name} in {elapsed}s")
+        # κλείνει μόνο το log του αρχείου, ο logger μένει για το επόμενο
+        _LOGGER.removeHandler(log_handler)
+        log_handler.close()
+
+    return (name, status, elapsed)
+
+
+def enumerate_tasks(source_base, file_pattern):
+    """Ένα os.walk: δημιουργεί τα output dirs και επιστρέφει (root, name)."""
+    tasks = []
+    for root, dirs, files in os.walk(source_base):
+        rel             = root[len(_LT_PREFIX):]
+        logs_path       = _LOGS_PREFIX + rel
+        xml_path        = _XML_PREFIX + rel
+        os.makedirs(logs_path, exist_ok=True)
+        os.makedirs(xml_path,  exist_ok=True)
+
+        for name in files:
+            if fnmatch.fnmatch(name, file_pattern):
+                tasks.append((root, name))
+    return tasks
+
+
+def main(year=None, fn=None, workers=None, mp_context=None):
+    """Transforms the Council of State texts of a year (or a single file
+    of that year) into Akoma Ntoso XML. Also used in-process by
+    parse_worker.py, which passes a spawn mp_context (its Mongo client and
+    threads must not be forked into the workers)."""
+    file_pattern = '*' + (fn if fn else TXT_EXT)
+    source_base  = os.path.join(_LT_PREFIX, STE)
+    if year:
+        source_base = os.path.join(source_base, year)
+
+    tasks = enumerate_tasks(source_base, file_pattern)
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                             mp_context=mp_context) as executor:
+        for name, status, elapsed in executor.map(process_one, tasks, chunksize=16):
+            if status != 'ok':
+                print(f"✗ {name}: {status} ({elapsed}s)")
 
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()
     parser = argparse.ArgumentParser(
         description="Transform Council of State texts into Akoma Ntoso XML"
     )
     parser.add_argument('-year', help='Year to process (e.g. 2017)')
     parser.add_argument('-fn', metavar='FILENAME',
                         help='Specific file to process (requires -year)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='parallel processes (default: all CPUs)')
     args = parser.parse_args()
 
     if args.fn and not args.year:
         parser.error("When using -fn, you must also specify -year")
 
-    file_pattern = '*' + (args.fn if args.fn else TXT_EXT)
-    source_base  = os.path.join(os.getcwd(), LEGAL_TEXTS, STE)
-    if args.year:
-        source_base = os.path.join(source_base, args.year)
-
-    # compile regexes
-    publicHearingDateObj       = re.compile(publicHearingDatePattern)
-    courtConferenceDateObj     = re.compile(courtConferenceDatePattern)
-    decisionPublicationDateObj = re.compile(decisionPublicationDatePattern)
-    paragraphPatternObj        = re.compile(paragraphPattern)
-
-    for root, dirs, files in os.walk(source_base):
-        logs_path       = root.replace(
-            os.path.join(os.getcwd(), LEGAL_TEXTS),
-            os.path.join(os.getcwd(), LOGS)
-        )
-        xml_path        = root.replace(
-            os.path.join(os.getcwd(), LEGAL_TEXTS),
-            os.path.join(os.getcwd(), XML)
-        )
-        ner_path        = root.replace(
-            os.path.join(os.getcwd(), LEGAL_TEXTS),
-            os.path.join(os.getcwd(), NER)
-        )
-        ste_meta_path   = root.replace(
-            os.path.join(os.getcwd(), LEGAL_TEXTS),
-            os.path.join(os.getcwd(), STE_METADATA)
-        )
-        os.makedirs(logs_path, exist_ok=True)
-        os.makedirs(xml_path,  exist_ok=True)
-
-        for name in files:
-            if not fnmatch.fnmatch(name, file_pattern):
-                continue
-
-            print(f"▷ Processing {name}")
-            start_time = time.perf_counter()
-            log_file    = os.path.join(logs_path, name)
-            xml_file    = os.path.join(xml_path, name.rsplit('.',1)[0] + XML_EXT)
-            txt_file    = os.path.join(root, name)
-            gate_xml    = os.path.join(ner_path, name + XML_EXT)
-
-            Akn_LOGGER = setupLogger('Akn_LOGGER', log_file)
-            Akn_LOGGER.info(f"Converting {name}")
-
-            try:
-                # ─── METADATA ────────────────────────────────────────────────
-                meta = {'textType':"judgment", 'author':"#COS", 'foreas':"COS"}
-                year_part = name.rsplit('.',1)[0].split('_')[-1]
-                meta_file = os.path.join(
-                    ste_meta_path,
-                    name.rsplit('.',1)[0] + '_meta' + TXT_EXT
-                )
-                if os.path.isfile(meta_file):
-                    lines = open(meta_file, encoding='utf-8').read().splitlines()
-                    num, yr = lines[0].split('/')
-                    meta.update(
-                        decisionNumber=num + "/" + yr,
-                        issueYear=yr,
-                        ECLI=None if lines[7].strip() in ('','-') else lines[7].strip()
-                    )
-                    try:
-                        d = datetime.datetime.strptime(lines[3].strip(), '%d/%m/%Y').date()
-                    except ValueError:
-                        d = datetime.date(int(lines[3].strip()), 1, 1)
-                    meta['publicationDate'] = str(d)
-                else:
-                    meta.update(
-                        decisionNumber=name.split('_')[0],
-                        issueYear=year_part,
-                        ECLI=None,
-                        publicationDate=None
-                    )
-                # ─────────────────────────────────────────────────────────────
-
-
-                # ─── READ RAW TEXT FOR HEADER & INTRO ────────────────────────
-                raw = open(txt_file, encoding='utf-8').read().splitlines()
-                # find "Αριθμός X/Y"
-                idx_num = next(i for i,ln in enumerate(raw) if ln.startswith("Αριθμός"))
-                docNumber = raw[idx_num].split(" ",1)[1].strip()
-
-                # skip blank lines
-                idx = idx_num + 1
-                while idx < len(raw) and not raw[idx].strip():
-                    idx += 1
-                docProponent = raw[idx].strip()
-
-                idx += 1
-                while idx < len(raw) and not raw[idx].strip():
-                    idx += 1
-                subDepartment = raw[idx].strip()
-
-                # headerDetails until "Για να δικάσει" line
-                hd_start = idx + 1
-                intro_idx = next(i for i,ln in enumerate(raw)
-                                 if ln.strip().startswith("Για να δικάσει"))
-                headerDetails = " ".join(
-                    ln.strip() for ln in raw[hd_start:intro_idx] if ln.strip()
-                )
-                introduction_block = "\n\n".join(raw[intro_idx:]).strip()
-                # ─────────────────────────────────────────────────────────────
-
-                # build our judgment object
-                judgmentObj = AknJudgementXML(
-                    textType       = meta['textType'],
-                    author         = meta['author'],
-                    foreas         = meta['foreas'],
-                    issueYear      = meta['issueYear'],
-                    decisionNumber = meta['decisionNumber'],
-                    ECLI           = meta['ECLI'],
-                    publicationDate= meta['publicationDate']
-                )
-                metaElem = judgmentObj.createMeta()
-                if os.path.isfile(gate_xml):
-                    refs = metaElem.find('references')
-                    if refs is not None:
-                        idx0 = list(metaElem).index(refs)
-                        newr = judgmentObj.modifyReferencesFromGateXml(gate_xml, refs)
-                        metaElem.remove(refs)
-                        metaElem.insert(idx0, newr)
-
-                # ─── LEGAL REFERENCES ───────────────────────────────────────
-                stream1 = CommonTokenStream(Legal_refLexer(FileStream(txt_file, encoding='utf-8')))
-                tree1   = Legal_refParser(stream1).legal_text()
-                answer  = AknLegalReferences().visit(tree1)
-                # ─────────────────────────────────────────────────────────────
-
-                # ─── STRUCTURE PARSING ─────────────────────────────────────
-                Akn_LOGGER.info("Parsing judgment structure")
-                stream2 = CommonTokenStream(CouncilOfStateLexer(InputStream(answer)))
-                parser2 = CouncilOfStateParser(stream2)
-                tree2   = parser2.judgment()
-                walker  = ParseTreeWalker()
-                walker.walk(judgmentObj, tree2)
-                # ─────────────────────────────────────────────────────────────
-
-                # inline named entities if present
-                if os.path.isfile(gate_xml):
-                    judgmentObj.text = judgmentObj.createNamedEntitiesInText(gate_xml, judgmentObj.text)
-
-                # build AkomaNtoso root
-                ak = judgmentObj.createAkomaNtosoRoot()
-                judgmentElem = judgmentObj.XML()
-                ak.insert(0, judgmentElem)
-                jud_node = ak.find('judgment')
-                jud_node.insert(0, metaElem)
-
-                # ─── OVERRIDE HEADER ───────────────────────────────────────
-                hdr_node = ak.xpath("/akomaNtoso/judgment/header")[0]
-                # clear existing children
-                for c in list(hdr_node):
-                    hdr_node.remove(c)
-                # docNumber
-                p1 = etree.SubElement(hdr_node, 'p')
-                etree.SubElement(p1, 'docNumber').text = docNumber
-                # docProponent
-                p2 = etree.SubElement(hdr_node, 'p')
-                etree.SubElement(p2, 'docProponent').text = docProponent
-                # subDepartment
-                p3 = etree.SubElement(hdr_node, 'p')
-                p3.text = subDepartment
-                # headerDetails
-                if headerDetails:
-                    p4 = etree.SubElement(hdr_node, 'p')
-                    p4.text = headerDetails
-                # ─────────────────────────────────────────────────────────────
-
-                # ─── OVERRIDE INTRODUCTION ─────────────────────────────────
-                intro_node = ak.xpath("/akomaNtoso/judgment/judgmentBody/introduction")[0]
-                for c in list(intro_node):
-                    intro_node.remove(c)
-                for para in filter(bool, introduction_block.split('\n\n')):
-                    p = etree.SubElement(intro_node, 'p')
-                    p.text = para.strip()
-                # ─────────────────────────────────────────────────────────────
-
-                # ─── DATES OF INTEREST ─────────────────────────────────────
-                wf_node   = ak.xpath("/akomaNtoso/judgment/meta/workflow")[0]
-                refs_node = metaElem.find('references')
-                frbrW     = ak.xpath("/akomaNtoso/judgment/meta/identification/FRBRWork/FRBRdate")[0]
-                frbrE     = ak.xpath("/akomaNtoso/judgment/meta/identification/FRBRExpression/FRBRdate")[0]
-
-                def add_date(node, regex, name):
-                    res = findDatesOfInterest(node, regex, name, meta['author'])
-                    if not res:
-                        return
-                    _, step, tlc = res
-                    wf_node.insert(0, step)
-                    if refs_node is not None:
-                        refs_node.append(tlc)
-                    frbrW.set('date', step.get('date')); frbrW.set('name', name)
-                    frbrE.set('date', step.get('date')); frbrE.set('name', name)
-
-                # publicHearingDate in header
-                add_date(hdr_node, publicHearingDateObj, 'publicHearingDate')
-                # courtConferenceDate in conclusions
-                concl_node = ak.xpath("/akomaNtoso/judgment/conclusions")[0]
-                add_date(concl_node, courtConferenceDateObj, 'courtConferenceDate')
-                # decisionPublicationDate
-                add_date(concl_node, decisionPublicationDateObj, 'decisionPublicationDate')
-                # ─────────────────────────────────────────────────────────────
-
-                # ─── SERIALIZE & VALIDATE ───────────────────────────────────
-                tree = etree.ElementTree(ak)
-                xml_bytes = etree.tostring(
-                    tree,
-                    pretty_print=True,
-                    encoding='UTF-8',
-                    xml_declaration=True
-                )
-                xml_str = safe_to_str(xml_bytes).replace('&gt;', '>')
-                with open(xml_file, 'w', encoding='utf-8') as fout:
-                    fout.write(xml_str)
-                validateXML('akomantoso30.xsd', xml_file, log_file)
-                Akn_LOGGER.info(f"Wrote XML → {xml_file}")
-
-            except KeyboardInterrupt:
-                raise
-            except Exception:
-                tb = traceback.format_exc()
-                print(f"Error processing {name}:\n{tb}")
-                Akn_LOGGER.error(f"❌ Failed {name}\n{tb}")
-            finally:
-                elapsed = round(time.perf_counter() - start_time, 2)
-                Akn_LOGGER.info(f"Finished {name} in {elapsed}s")
-                logging.shutdown()
\ No newline at end of file
+    main(args.year, args.fn, args.workers)
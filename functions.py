@@ -9,6 +9,8 @@ import subprocess
 import shutil
 import codecs
 import datetime
+import functools
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from lxml import etree
 from lxml import html
 from variables import *
@@ -16,19 +18,98 @@ from variables import *
 Akn_LOGGER = logging.getLogger('Akn_LOGGER')
 
 
-def pdf_to_text(src, dest, name_pattern=None):
+def _name_matcher(file_pattern):
+    """Returns a predicate for file names matching a fnmatch pattern. The
+    common '*.ext' / '*name.ext' patterns become a plain str.endswith,
+    anything else is compiled once instead of per fnmatch.fnmatch call."""
+    suffix = file_pattern[1:]
+    if file_pattern.startswith('*') and not any(c in suffix for c in '*?['):
+        return lambda name: name.endswith(suffix)
+    return re.compile(fnmatch.translate(file_pattern)).match
+
+
+def iter_files(src, file_pattern):
+    """Walks src with os.scandir and an explicit stack (no os.walk
+    re-stat, no per-name fnmatch) and yields the files whose name matches
+    file_pattern.
+
+    Args:
+        src: The root directory to traverse. A missing directory yields
+            nothing, as with os.walk()
+
+        file_pattern: A fnmatch pattern for file names e.g. '*.txt'
+
+    Returns:
+        A generator of (directory, file name) tuples
+    """
+    match = _name_matcher(file_pattern)
+    stack = [src]
+    while stack:
+        root = stack.pop()
+        try:
+            it = os.scandir(root)
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif match(entry.name):
+                    yield root, entry.name
+
+
+def _map_files(func, tasks, workers=None, threads=False):
+    """Runs func over tasks (one per file) in a worker pool. Processes are
+    used for CPU-bound cleaning, threads for I/O-bound steps (copy, rename,
+    external commands). With workers=1 tasks run serially in this process.
+
+    Args:
+        func: A module level function that takes one task
+
+        tasks: A list of tasks
+
+        workers: Number of workers (default: os.cpu_count())
+
+        threads: Use a ThreadPoolExecutor instead of a ProcessPoolExecutor
+
+    Returns:
+        A list with the results of func in the order of tasks
+    """
+    if workers == 1 or len(tasks) < 2:
+        return [func(task) for task in tasks]
+    executor = ThreadPoolExecutor if threads else ProcessPoolExecutor
+    with executor(max_workers=workers) as ex:
+        return list(ex.map(func, tasks, chunksize=1 if threads else 16))
+
+
+
+def _pdf_to_text_file(task):
+    src_file, dest_file = task
+    subprocess.call(
+        ["pdftotext",
+         # "-layout",
+         "-raw",
+         # "-nopgbrk",
+         src_file,
+         dest_file]
+    )
+
+
+def pdf_to_text(src, dest, name_pattern=None, workers=None):
     """Transforms PDF files to texts using pdftotext command
     (https://linux.die.net/man/1/pdftotext). Newly created files are
     stored to dest (destination) path.
 
     Args:
-        src: The source directory that will be traversed with os.walk()
+        src: The source directory that will be traversed with iter_files()
 
         dest: Destination folder where '.txt' files will be stored
 
         name_pattern: If name_pattern is specified only file names that
             match the pattern will be transformed from PDF to text
 
+        workers: Number of parallel pdftotext calls (default: os.cpu_count())
+
     Returns:
         Nothing
     """
@@ -36,41 +117,42 @@ def pdf_to_text(src, dest, name_pattern=None):
     if name_pattern is not None:
         file_pattern = name_pattern
 
-    for root, dirs, files in os.walk(src, topdown=True):
-        # print root.replace(src, dest)
-        # sys.exit()
+    tasks = []
+    for root, name in iter_files(src, file_pattern):
         # create destination folder if it does not exist
-        if not os.path.exists(root.replace(src, dest)):
-            os.makedirs(root.replace(src, dest))
-
-        for name in files:
-            if fnmatch.fnmatch(name, file_pattern):
-                subprocess.call(
-                    ["pdftotext",
-                     # "-layout",
-                     "-raw",
-                     # "-nopgbrk",
-                     os.path.join(root, name),
-                     os.path.join(
-                         root.replace(src, dest),
-                         name
-                     ).split('.')[0] + TXT_EXT]
-                )
+        os.makedirs(root.replace(src, dest), exist_ok=True)
+        tasks.append((
+            os.path.join(root, name),
+            os.path.join(
+                root.replace(src, dest),
+                name
+            ).split('.')[0] + TXT_EXT
+        ))
+
+    # pdftotext runs as a separate process, so threads are enough to keep
+    # all CPUs busy
+    _map_files(_pdf_to_text_file, tasks, workers, threads=True)
 
     print("Done...")
 
 
-def copy_files(src, dest, name_pattern=None):
+def _copy_file(task):
+    shutil.copy(*task)
+
+
+def copy_files(src, dest, name_pattern=None, workers=None):
     """Copy all '.txt' files from src (source) to dest (destination) folder.
 
     Args:
-        src: The source directory that will be traversed with os.walk()
+        src: The source directory that will be traversed with iter_files()
 
         dest: Destination folder where '.txt' files will be copied
 
         name_pattern: If name_pattern is specified only file names that
             match the pattern will be copied
 
+        workers: Number of copy threads (default: os.cpu_count())
+
     Returns:
         Nothing
     """
@@ -81,19 +163,12 @@ def copy_files(src, dest, name_pattern=None):
     if not os.path.exists(dest):
         os.makedirs(dest)
 
-    for root, dirs, files in os.walk(src, topdown=True):
-        for name in files:
-            if fnmatch.fnmatch(name, file_pattern):
-                shutil.copy(
-                    os.path.join(
-                        root,
-                        name
-                    ),
-                    os.path.join(
-                        dest,
-                        name
-                    )
-                )
+    tasks = [
+        (os.path.join(root, name), os.path.join(dest, name))
+        for root, name in iter_files(src, file_pattern)
+    ]
+
+    _map_files(_copy_file, tasks, workers, threads=True)
 
     print("Done...")
 
@@ -160,7 +235,37 @@ def subs_text(text, lst):
     return text
 
 
-def clean_ste_text(src, dest, name_pattern=None):
+def _clean_ste_file(task):
+    src_file, metadata_file_path, dest_file = task
+    with open(src_file, 'r') as fin:
+        # by default the first 10 lines contain metadata
+        # see ste crawler
+        judgmentText_ = fin.readlines()
+        metadata = ''
+        judgmentBody = ''
+
+        for line in judgmentText_[:10]:
+            metadata += line
+
+        for line in judgmentText_[11:]:
+            judgmentBody += line
+
+        # open a new file for writing metadata
+        with open(metadata_file_path, 'w') as fhead:
+            fhead.write(metadata)
+
+        # open a new file for writing body
+        with open(dest_file, 'w') as fbody:
+            fbody.write(escapeXMLChars(
+                subs_text(
+                    judgmentBody,
+                    SteGarbages
+                )
+            )
+            )
+
+
+def clean_ste_text(src, dest, name_pattern=None, workers=None):
     """Performs pre-processing steps for judgments published by the
     Council of State. By default it reads the first ten lines of a
     judgment that contains metadata (see ste_scapper) and creates the
@@ -169,13 +274,15 @@ def clean_ste_text(src, dest, name_pattern=None):
     (destination) parameter
 
     Args:
-        src: The root directory that will be traversed with os.walk()
+        src: The root directory that will be traversed with iter_files()
 
         dest: A path to store cleaned data
 
         name_pattern: If name_pattern is specified only file names that
             match the pattern will be accessed
 
+        workers: Number of worker processes (default: os.cpu_count())
+
     Returns:
         Nothing
     """
@@ -184,73 +291,55 @@ def clean_ste_text(src, dest, name_pattern=None):
     if name_pattern is not None:
         file_pattern = name_pattern
 
-    for root, dirs, files in os.walk(src):
-        # print src
-        # print dest
-        metadata_path = dest.replace(STE, STE_METADATA)
-        # print metadata_path
-        # create a corresponding folder based on 'dest' argument
-        if not os.path.exists(root.replace(src, dest)):
-            os.makedirs(root.replace(src, dest))
-
-        # create a corresponding metadata folder based on 'dest' argument
-        if not os.path.exists(metadata_path):
-            os.makedirs(metadata_path)
-
-        for name in files:
-            # print 'name:' + name
-            # create new file name so that it contains year of publication
-            year = os.path.basename(src)
-            new_file_name = name.split('.')[0] + '_' + str(year)
-            if fnmatch.fnmatch(name, file_pattern):
-                # declare full path for metadata file
-                metadata_file_path = os.path.join(
-                    metadata_path,
-                    new_file_name + '_meta' + TXT_EXT
-                )
-                # print 'metaFilePath: '+ metaFilePath
-                with open(os.path.join(src, name), 'r') as fin:
-                    # by default the first 10 lines contain metadata
-                    # see ste crawler
-                    judgmentText_ = fin.readlines()
-                    metadata = ''
-                    judgmentBody = ''
-
-                    for line in judgmentText_[:10]:
-                        metadata += line
-
-                    for line in judgmentText_[11:]:
-                        judgmentBody += line
-
-                    # open a new file for writing metadata
-                    with open(metadata_file_path, 'w') as fhead:
-                        fhead.write(metadata)
-
-                    # open a new file for writing body
-                    with open(os.path.join(dest, new_file_name + TXT_EXT), 'w') as fbody:
-                        fbody.write(escapeXMLChars(
-                            subs_text(
-                                judgmentBody,
-                                SteGarbages
-                            )
-                        )
-                        )
+    metadata_path = dest.replace(STE, STE_METADATA)
+    # create the corresponding body and metadata folders
+    os.makedirs(dest, exist_ok=True)
+    os.makedirs(metadata_path, exist_ok=True)
+
+    year = os.path.basename(src)
+    tasks = []
+    for root, name in iter_files(src, file_pattern):
+        # create new file name so that it contains year of publication
+        new_file_name = name.split('.')[0] + '_' + str(year)
+        # declare full path for metadata file
+        metadata_file_path = os.path.join(
+            metadata_path,
+            new_file_name + '_meta' + TXT_EXT
+        )
+        tasks.append((
+            os.path.join(src, name),
+            metadata_file_path,
+            os.path.join(dest, new_file_name + TXT_EXT)
+        ))
+
+    _map_files(_clean_ste_file, tasks, workers)
     print("Done...")
 
 
-def clean_areios_pagos_text(src, dest, name_pattern=None):
+def _clean_areios_pagos_file(task):
+    src_file, dest_file = task
+    with open(src_file, 'r', encoding='utf-8', errors='ignore') as fin:
+        text = fin.read()
+    cleaned_text = subs_text(text, AreiosPagosGarbages)
+    with open(dest_file, 'w', encoding='utf-8') as fout:
+        fout.write(escapeXMLChars(cleaned_text))
+
+
+def clean_areios_pagos_text(src, dest, name_pattern=None, workers=None):
     """Performs pre-processing steps for judgments published by the
     Supreme Civil and Criminal Court (Areios Pagos) and stores new file(s)
     in dest (destination) folder.
 
     Args:
-        src: The root directory that will be traversed with os.walk()
+        src: The root directory that will be traversed with iter_files()
 
         dest: A path to store cleaned data
 
         name_pattern: If name_pattern is specified only file names that
             match the pattern will be accessed
 
+        workers: Number of worker processes (default: os.cpu_count())
+
     Returns:
         Nothing
     """
@@ -258,45 +347,83 @@ def clean_areios_pagos_text(src, dest, name_pattern=None):
     if name_pattern is not None:
         file_pattern = name_pattern
 
-    for root, dirs, files in os.walk(src):
-        # print root
-        # print root.replace(src, dest)
-        if not os.path.exists(root.replace(src, dest)):
-            os.makedirs(root.replace(src, dest))
-
-        for name in files:
-            if fnmatch.fnmatch(name, file_pattern):
-                # print name
-                # modify file name so that no dot is present
-                new_file_name = os.path.splitext(name)[0].replace('.', '') + TXT_EXT
-                # print new_fil_name
-                with open(os.path.join(src, name), 'r', encoding='utf-8', errors='ignore') as fin:
-                    text = fin.read()
-                    cleaned_text = subs_text(text, AreiosPagosGarbages)
-                    with open(os.path.join(dest, new_file_name), 'w', encoding='utf-8') as fout:
-                        fout.write(escapeXMLChars(cleaned_text))
+    os.makedirs(dest, exist_ok=True)
+
+    tasks = []
+    for root, name in iter_files(src, file_pattern):
+        # modify file name so that no dot is present
+        new_file_name = os.path.splitext(name)[0].replace('.', '') + TXT_EXT
+        tasks.append((
+            os.path.join(src, name),
+            os.path.join(dest, new_file_name)
+        ))
+
+    _map_files(_clean_areios_pagos_file, tasks, workers)
 
     print("Done...")
 
 
-def clean_nsk_text(src, dest, name_pattern=None):
+NSK_HEADER = r'(^.*?(?=Aριθμός|Αριθυός|Αριθμός|Αριθµός|ΑΤΟΜΙΚΗ|ΓNΩΜΟΔΟΤΗΣΗ|ΑΡΙΘ.\s*ΓΝΩΜΟ∆ΟΤΗΣΕΩΣ|Γ Ν Ω Μ Ο Δ Ο Τ Η Σ Η|Αρ. Γνωµ/σεως|Γνωμοδότηση|ΓΝΩΜΟ∆ΟΤΗΣΗ|ΓΝΩΜΟΔΟΤΗΣΗ|ΓΝΩΜΟΔΟΤΗΣΗ|ΑΡΙΘΜΟΣ))'
+
+
+def _clean_nsk_file(task):
+    src_file, dest_file = task
+    print(os.path.basename(src_file))
+    with open(src_file, 'r') as fin:
+        text = fin.read()
+    cleaned_text = subs_text(text, nskGarbages)
+    cleaned_text = re.sub(
+        NSK_HEADER,
+        '',
+        cleaned_text,
+        flags=re.DOTALL
+    )
+    # many legal opinions missing embeded text ending
+    count = 0
+    changed_text = ''
+    for char in cleaned_text:
+        if char == '«' or char == '»':
+            if char == '«':
+                count += 1
+                changed_text += char
+            elif char == '»':
+                count -= 1
+                if count == 0:
+                    changed_text += char
+                else:
+                    changed_text += '@' + char
+        else:
+            changed_text += char
+    if count != 0:
+        print("Warning: missing embeded text ending!")
+    # print changed_text
+    fout = codecs.open(
+        dest_file,
+        'w',
+        'UTF-8'
+    )
+    fout.write(escapeXMLChars(changed_text))
+    fout.close()
+
+
+def clean_nsk_text(src, dest, name_pattern=None, workers=None):
     """Performs pre-processing steps for legal opinions published by the
     Legal Council of State and stores new file(s) in dest (destination)
     folder.
 
     Args:
-        src: The root directory that will be traversed with os.walk()
+        src: The root directory that will be traversed with iter_files()
 
         dest: A path to store cleaned data
 
         name_pattern: If name_pattern is specified only file names that
             match the pattern will be accessed
 
+        workers: Number of worker processes (default: os.cpu_count())
+
     Returns:
         Nothing
     """
-    HEADER = r'(^.*?(?=Aριθμός|Αριθυός|Αριθμός|Αριθµός|ΑΤΟΜΙΚΗ|ΓNΩΜΟΔΟΤΗΣΗ|ΑΡΙΘ.\s*ΓΝΩΜΟ∆ΟΤΗΣΕΩΣ|Γ Ν Ω Μ Ο Δ Ο Τ Η Σ Η|Αρ. Γνωµ/σεως|Γνωμοδότηση|ΓΝΩΜΟ∆ΟΤΗΣΗ|ΓΝΩΜΟΔΟΤΗΣΗ|ΓΝΩΜΟΔΟΤΗΣΗ|ΑΡΙΘΜΟΣ))'
-
     file_pattern = '*' + TXT_EXT
     if name_pattern is not None:
         file_pattern = name_pattern
@@ -304,59 +431,32 @@ def clean_nsk_text(src, dest, name_pattern=None):
     if not os.path.exists(dest):
         os.makedirs(dest)
 
-    for root, dirs, files in os.walk(src):
-        for name in files:
-            if fnmatch.fnmatch(name, file_pattern):
-                print(name)
-                with open(os.path.join(src, name), 'r') as fin:
-                    text = fin.read()
-                    cleaned_text = subs_text(text, nskGarbages)
-                    cleaned_text = re.sub(
-                        HEADER,
-                        '',
-                        cleaned_text,
-                        flags=re.DOTALL
-                    )
-                    # many legal opinions missing embeded text ending
-                    count = 0
-                    changed_text = ''
-                    for char in cleaned_text:
-                        if char == '«' or char == '»':
-                            if char == '«':
-                                count += 1
-                                changed_text += char
-                            elif char == '»':
-                                count -= 1
-                                if count == 0:
-                                    changed_text += char
-                                else:
-                                    changed_text += '@' + char
-                        else:
-                            changed_text += char
-                    if count != 0:
-                        print("Warning: missing embeded text ending!")
-                    # print changed_text
-                    fout = codecs.open(
-                        os.path.join(dest, name),
-                        'w',
-                        'UTF-8'
-                    )
-                    fout.write(escapeXMLChars(changed_text))
-                    fout.close()
+    tasks = [
+        (os.path.join(src, name), os.path.join(dest, name))
+        for root, name in iter_files(src, file_pattern)
+    ]
+
+    _map_files(_clean_nsk_file, tasks, workers)
 
     print("Done...")
 
 
-def GrToLat(src, name_pattern=None):
+def _rename_file(task):
+    os.rename(*task)
+
+
+def GrToLat(src, name_pattern=None, workers=None):
     """Changes all greek characters in a file name to the corresponding latin
     based on qwerty keyboard.
 
     Args:
-        src: The root directory that will be traversed with os.walk()
+        src: The root directory that will be traversed with iter_files()
 
         name_pattern: If name_pattern is specified only file names that
             match the pattern will be transformed
 
+        workers: Number of rename threads (default: os.cpu_count())
+
     Returns:
         Nothing
     """
@@ -364,32 +464,33 @@ def GrToLat(src, name_pattern=None):
     if name_pattern is not None:
         file_pattern = name_pattern
 
-    for root, dirs, files in os.walk(src, topdown=True):
-        for name in files:
-            if fnmatch.fnmatch(name, file_pattern):
-                # print "old_name: "+ name
-                old_name = name
-                # it seems that in windows we need a sligthly
-                # different approach
-                if os.name != 'posix':
-                    for char in name:
-                        for key, value in list(grToLat.items()):
-                            if char.decode('windows-1253') == key:
-                                name = re.sub(char, value, name)
-                # linux operating system
-                else:
-                    for key, value in list(grToLat.items()):
-                        name = re.sub(key, value, name)
-                # print "GrToLat: "+ name
-                os.rename(
-                    os.path.join(
-                        root,
-                        old_name),
-                    os.path.join(
-                        root,
-                        name
-                    )
-                )
+    tasks = []
+    for root, name in iter_files(src, file_pattern):
+        # print "old_name: "+ name
+        old_name = name
+        # it seems that in windows we need a sligthly
+        # different approach
+        if os.name != 'posix':
+            for char in name:
+                for key, value in list(grToLat.items()):
+                    if char.decode('windows-1253') == key:
+                        name = re.sub(char, value, name)
+        # linux operating system
+        else:
+            for key, value in list(grToLat.items()):
+                name = re.sub(key, value, name)
+        # print "GrToLat: "+ name
+        tasks.append((
+            os.path.join(
+                root,
+                old_name),
+            os.path.join(
+                root,
+                name
+            )
+        ))
+
+    _map_files(_rename_file, tasks, workers, threads=True)
 
     print("Done...")
 
@@ -416,41 +517,28 @@ def delete_summaries(src, metadata_path=None, name_pattern=None):
 
     # total number of files containing summaries
     cnt = 0
-    for root, dirs, files in os.walk(src, topdown=True):
-        # print root
-        # year = os.path.basename(root)
-        for name in files:
-            has_summary = 0
-            if fnmatch.fnmatch(name, file_pattern):
-                with open(os.path.join(src, name), 'r') as fin:
-                    summary = re.match(
-                        r'^\(Απόσπασμα\)|^Περίληψη',
-                        fin.read(),
-                        re.DOTALL
-                    )
-                    # print summary
-                    if summary:
-                        # print "Found Judgment file with summary: " + name
-                        has_summary = 1
-                        cnt += 1
-
-                        if metadata_path is not None:
-                            meta_file_path = os.path.join(
-                                os.path.join(
-                                    metadata_path,
-                                    # str(year),
-                                    name.split('.')[0] + '_meta' + TXT_EXT
-                                )
-                            )
-                            # print meta_file_path
-                            meta_file_xists = os.path.isfile(meta_file_path)
-                            if meta_file_xists:
-                                # print "Metadata File exists, removing: " + meta_file_path
-                                os.remove(meta_file_path)
-
-                if has_summary == 1:
-                    # print "Removing: " + os.path.join(src, name)
-                    os.remove(os.path.join(src, name))
+    for root, name in iter_files(src, file_pattern):
+        with open(os.path.join(src, name), 'r') as fin:
+            summary = re.match(
+                r'^\(Απόσπασμα\)|^Περίληψη',
+                fin.read(),
+                re.DOTALL
+            )
+        if summary:
+            # print "Found Judgment file with summary: " + name
+            cnt += 1
+
+            if metadata_path is not None:
+                meta_file_path = os.path.join(
+                    metadata_path,
+                    name.split('.')[0] + '_meta' + TXT_EXT
+                )
+                if os.path.isfile(meta_file_path):
+                    # print "Metadata File exists, removing: " + meta_file_path
+                    os.remove(meta_file_path)
+
+            # print "Removing: " + os.path.join(src, name)
+            os.remove(os.path.join(src, name))
 
     print(("Complete removing summaries. Total Files removed: " + str(cnt)))
 
@@ -532,9 +620,40 @@ def validateXML(schemaFile, xmlFile, logFile):
     Returns:
         nothing
     """
-    xmlSchemaDoc = etree.parse(schemaFile)
-    xmlSchema = etree.XMLSchema(xmlSchemaDoc)
+    xmlSchema = loadXMLSchema(schemaFile)
     xml_doc = etree.parse(xmlFile)
+    validateXMLTree(xmlSchema, xml_doc, logFile)
+
+
+@functools.lru_cache(maxsize=None)
+def loadXMLSchema(schemaFile):
+    """Parses and compiles a XML schema once per process; later calls
+    with the same schema file return the cached etree.XMLSchema
+
+    Args:
+        schemaFile: The XML schema file
+
+    Returns:
+        etree.XMLSchema object
+    """
+    return etree.XMLSchema(etree.parse(schemaFile))
+
+
+def validateXMLTree(xmlSchema, xml_doc, logFile):
+    """Validates an already parsed XML tree against an already compiled
+    XML schema (e.g. one etree.XMLSchema per worker process) and stores
+    error info in a log file
+
+    Args:
+        xmlSchema: An etree.XMLSchema object
+
+        xml_doc: The XML tree (ElementTree or Element) to be checked
+
+        logFile: Log file where errors will be written
+
+    Returns:
+        nothing
+    """
     # with open(logFile, 'a+') as error_log_file:
     # error_log_file.write('Starting Validation...\n')
     Akn_LOGGER.info('Starting Validation...')
@@ -548,7 +667,7 @@ def validateXML(schemaFile, xmlFile, logFile):
         for error in error.error_log:
             Akn_LOGGER.error('domain_name: ' + error.domain_name)
             Akn_LOGGER.error('domain: ' + str(error.domain))
-            Akn_LOGGER.error('filename: ' + error.filename)
+            Akn_LOGGER.error('filename: ' + str(error.filename))
             Akn_LOGGER.error('level: ' + str(error.level))
             Akn_LOGGER.error('line: ' + str(error.line))
             Akn_LOGGER.error('message: ' + error.message)
@@ -627,7 +746,26 @@ def createHrefFromDictionary(dictionary, splitMultHref=0, element=0):
     return href
 
 
-def findDatesOfInterest(searchNodeElem, regexObj, dateName, author):
+@functools.lru_cache(maxsize=4096)
+def dateFromComponents(dd, mm, yyyy):
+    """Converts the day, (Greek) month name and year strings of a matched
+    date to a datetime.date. Results are cached since the same dates
+    appear in many judgments
+
+    Args:
+        dd: The day as matched (e.g. '12')
+
+        mm: The month name as matched (e.g. 'Μαΐου'), looked up in months
+
+        yyyy: The year as matched (e.g. '2016')
+
+    Returns:
+        A datetime.date object
+    """
+    return datetime.date(int(yyyy), months.get(mm, 0), int(dd))
+
+
+def findDatesOfInterest(searchNodeElem, regexObj, dateName, author, prefilter=None):
     """Searches for specific dates (e.g. publication date) in a legal text
     and returns a new text containing xml labels about extracted dates
 
@@ -642,6 +780,10 @@ def findDatesOfInterest(searchNodeElem, regexObj, dateName, author):
         author: The author is used when creating the attribute 'by'
                 of the "step" sublement in the meta section of akoma Ntoso
 
+        prefilter: Optional callable that takes the serialized child
+            (bytes) and returns False when regexObj cannot match it
+            (e.g. a Hyperscan database scan), so re.search is skipped
+
     Returns:
         searchNodeElem: A new node after finding all dates
 
@@ -656,6 +798,9 @@ def findDatesOfInterest(searchNodeElem, regexObj, dateName, author):
         if not childBytes:
             continue
 
+        if prefilter is not None and not prefilter(childBytes):
+            continue
+
         childText = childBytes.decode('utf-8')
         DateOfInterest = re.search(regexObj, childText)
         if DateOfInterest:
@@ -665,8 +810,8 @@ def findDatesOfInterest(searchNodeElem, regexObj, dateName, author):
             # print DateOfInterest.group('dd')
             elemIndex = searchNodeElem.getchildren().index(child)
             # print elemIndex
-            Date = datetime.date(int(DateOfInterest.group('yyyy')), months.get(DateOfInterest.group('mm'), 0),
-                                 int(DateOfInterest.group('dd')))
+            Date = dateFromComponents(DateOfInterest.group('dd'), DateOfInterest.group('mm'),
+                                      DateOfInterest.group('yyyy'))
             # print str(Date)
             DateStr = DateOfInterest.group('dd') + DateOfInterest.group('numSpecialLektiko') + DateOfInterest.group(
                 'keno_1') + DateOfInterest.group('mm') + DateOfInterest.group('keno_2') + DateOfInterest.group(
@@ -851,7 +996,7 @@ def getTokenName(context, funcList, Dict, defaultVal):
     return Dict.get(methodTriggered, defaultVal)
 
 
-def fixStringXML(text, regPatternObj):
+def fixStringXML(text, regPatternObj, prefilter=None):
     """Fixes the XML string in order to be a valid XML string. It is used
     for cases where a ref tag closes after a new paragraph tag (</p><p>)
 
@@ -860,9 +1005,16 @@ def fixStringXML(text, regPatternObj):
 
         regPatternObj: A regex pattern object -> r'([<][/]p[>][<]p[>])'
 
+        prefilter: Optional callable that takes the text (bytes) and
+            returns False when regPatternObj does not occur in it, in
+            which case the text is returned unchanged
+
     returns:
         changed text as a valid XML string
     """
+    if prefilter is not None and not prefilter(text.encode('utf-8')):
+        return text
+
     refString = re.findall(r'[<]ref.*?[<][/]ref[>]', text, flags=re.DOTALL)
     if refString is not None:
         for string in refString:
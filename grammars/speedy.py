@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""Parse helpers με προαιρετικό C++ backend (speedy-antlr-tool).
+
+Όταν έχουν παραχθεί και γίνει build τα C++ modules του speedy-antlr-tool
+(grammars/gen/sa_legal_ref.py, grammars/gen/sa_supremecourt.py και τα
+αντίστοιχα extensions), το parsing γίνεται από το ANTLR C++ runtime και
+επιστρέφεται κανονικό Python parse tree, οπότε visitors/listeners δουλεύουν
+όπως πριν. Διαφορετικά χρησιμοποιούνται οι Python lexers/parsers.
+
+Generate (απαιτεί και τα C++ targets του antlr4 στο ίδιο directory):
+    antlr4 -Dlanguage=Cpp -visitor -o grammars/gen/cpp_src/legal_ref grammars/Legal_ref.g4
+    antlr4 -Dlanguage=Cpp -visitor -o grammars/gen/cpp_src/supremecourt grammars/SupremeCourt.g4
+    python -c "from speedy_antlr_tool import generate; \
+        generate('grammars/gen/Legal_refParser.py', 'grammars/gen/cpp_src/legal_ref'); \
+        generate('grammars/gen/SupremeCourtParser.py', 'grammars/gen/cpp_src/supremecourt')"
+    ANTLR4_CPP_RUNTIME=/path/to/antlr4/runtime/Cpp python setup.py build_ext --inplace
+"""
+from antlr4 import CommonTokenStream
+
+from grammars.gen.Legal_refLexer import Legal_refLexer
+from grammars.gen.Legal_refParser import Legal_refParser
+from grammars.gen.SupremeCourtLexer import SupremeCourtLexer
+from grammars.gen.SupremeCourtParser import SupremeCourtParser
+
+try:
+    from grammars.gen import sa_legal_ref, sa_supremecourt
+except ImportError:
+    sa_legal_ref = sa_supremecourt = None
+
+USE_CPP = bool(
+    sa_legal_ref and sa_supremecourt and
+    sa_legal_ref.USE_CPP_IMPLEMENTATION and
+    sa_supremecourt.USE_CPP_IMPLEMENTATION
+)
+
+
+def parse_legal_text(stream):
+    """Legal_ref parse (rule legal_text) ενός antlr4 InputStream/FileStream."""
+    if USE_CPP:
+        return sa_legal_ref.parse(stream, 'legal_text')
+    return Legal_refParser(CommonTokenStream(Legal_refLexer(stream))).legal_text()
+
+
+def parse_judgment(stream):
+    """SupremeCourt parse (rule judgment) ενός antlr4 InputStream."""
+    if USE_CPP:
+        return sa_supremecourt.parse(stream, 'judgment')
+    return SupremeCourtParser(CommonTokenStream(SupremeCourtLexer(stream))).judgment()
+
+
+def warm_up(text='Αριθμός 1/2020 ΤΟ ΔΙΚΑΣΤΗΡΙΟ ΤΟΥ ΑΡΕΙΟΥ ΠΑΓΟΥ'):
+    """Ένα μικρό parse ανά process ώστε οι DFA caches των Python parsers
+    (class-level) να είναι ήδη ζεστές πριν το πρώτο πραγματικό αρχείο.
+    Τα syntax errors του dummy κειμένου δεν τυπώνονται."""
+    if USE_CPP:
+        return
+    from antlr4 import InputStream
+    for lexerCls, parserCls, rule in ((Legal_refLexer, Legal_refParser, 'legal_text'),
+                                      (SupremeCourtLexer, SupremeCourtParser, 'judgment')):
+        lexer = lexerCls(InputStream(text))
+        lexer.removeErrorListeners()
+        parser = parserCls(CommonTokenStream(lexer))
+        parser.removeErrorListeners()
+        getattr(parser, rule)()
@@ -2,9 +2,12 @@
 # -*- coding: utf-8 -*-
 
 import os
-import re
+import queue
 import datetime
-from pymongo import MongoClient
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pymongo import MongoClient, ReplaceOne
+from pymongo.errors import OperationFailure
 from lxml import etree
 
 # ------------------------------------------------------------------------
@@ -14,16 +17,22 @@ MONGO_URI        = "mongodb://localhost:27017/"
 DB_NAME          = "judgmentsV2"
 COLLECTION_NAME  = "courtDecisions"
 XML_DIR          = "XML"  # top-level folder containing subfolders
+BATCH_SIZE       = 1000   # upserts per bulk_write
 
 # AKN namespace
 NS = {"akn": "http://docs.oasis-open.org/legaldocml/ns/akn/3.0"}
 
+# parser options for ingest: no ID hash table (no id() lookups here),
+# large judgments allowed, no entity expansion / network access
+_PARSE_OPTIONS = dict(collect_ids=False, huge_tree=True,
+                      resolve_entities=False, no_network=True)
+
 # ------------------------------------------------------------------------
 # Helpers
 # ------------------------------------------------------------------------
 def clean_text(text):
     """Collapse whitespace and strip."""
-    return re.sub(r'\s+', ' ', text).strip() if text else ""
+    return " ".join(text.split()) if text else ""
 
 def detect_court(folder_path):
     """Infer court name by subfolder."""
@@ -58,7 +67,7 @@ def parse_meta(meta_elem):
                 sub = {}
                 for child in t:
                     name = etree.QName(child).localname
-                    sub[name] = child.attrib
+                    sub[name] = dict(child.attrib)
                 ident[tag] = sub
         meta["identification"] = ident
 
@@ -68,14 +77,14 @@ def parse_meta(meta_elem):
         lifecycle = {"source": lc.get("source")}
         ev = lc.find("akn:eventRef", NS)
         if ev is not None:
-            lifecycle["eventRef"] = ev.attrib
+            lifecycle["eventRef"] = dict(ev.attrib)
         meta["lifecycle"] = lifecycle
 
     # workflow
     wf = meta_elem.find("akn:workflow", NS)
     if wf is not None:
         wfd = {"source": wf.get("source")}
-        wfd["steps"] = [step.attrib for step in wf.findall("akn:step", NS)]
+        wfd["steps"] = [dict(step.attrib) for step in wf.findall("akn:step", NS)]
         meta["workflow"] = wfd
 
     # references
@@ -84,97 +93,150 @@ def parse_meta(meta_elem):
         rd = {"source": refs.get("source")}
         orig = refs.find("akn:original", NS)
         if orig is not None:
-            rd["original"] = orig.attrib
-        rd["TLCEvents"] = [e.attrib for e in refs.findall("akn:TLCEvent", NS)]
+            rd["original"] = dict(orig.attrib)
+        rd["TLCEvents"] = [dict(e.attrib) for e in refs.findall("akn:TLCEvent", NS)]
         meta["references"] = rd
 
     return meta
 
+# ------------------------------------------------------------------------
+# Single-pass section handlers (called at the end tag of each section)
+# ------------------------------------------------------------------------
+AKN = NS["akn"]
+T_JUDGMENT     = etree.QName(AKN, "judgment").text
+T_JUDGMENTBODY = etree.QName(AKN, "judgmentBody").text
+
+def _is_judgment_child(el):
+    """True for akn:judgment/akn:X with akn:judgment directly under the root."""
+    judgment = el.getparent()
+    return (judgment is not None and judgment.tag == T_JUDGMENT
+            and judgment.getparent() is not None
+            and judgment.getparent().getparent() is None)
+
+def _is_body_child(el, anywhere=False):
+    """True for akn:judgment/akn:judgmentBody/akn:X; with anywhere=True the
+    akn:judgment may be at any depth (as in //akn:judgment/...)."""
+    body = el.getparent()
+    if body is None or body.tag != T_JUDGMENTBODY:
+        return False
+    if anywhere:
+        judgment = body.getparent()
+        return judgment is not None and judgment.tag == T_JUDGMENT
+    return _is_judgment_child(body)
+
+def _text(el):
+    """String value of el (same as XPath string(.)) without the XPath engine."""
+    return "".join(el.itertext())
+
+def _child_text(ps, i, tag):
+    """string(akn:p[i+1]/<tag>) over an already collected list of <p>."""
+    if len(ps) <= i:
+        return ""
+    child = ps[i].find(tag, NS)
+    return _text(child) if child is not None else ""
+
+def _on_meta(el, ctx):
+    if "meta" not in ctx and _is_judgment_child(el):
+        ctx["meta"] = parse_meta(el)
+
+def _on_header(el, ctx):
+    if "header" in ctx or not _is_judgment_child(el):
+        return
+    ps = el.findall("akn:p", NS)
+    docNumber      = clean_text(_child_text(ps, 0, "akn:docNumber"))
+    docProponent   = clean_text(_child_text(ps, 1, "akn:docProponent"))
+    subDepartment  = clean_text(_text(ps[2]) if len(ps) > 2 else "")
+    # remaining <p> become headerDetails
+    headerDetails = " ".join(clean_text(_text(p)) for p in ps[3:])
+
+    # publicHearingDate (in header)
+    publicHearingDate = None
+    for d in el.findall(".//akn:date", NS):
+        if d.get("refersTo") == "publicHearingDate":
+            publicHearingDate = d.get("date")
+            break
+
+    ctx["header"] = {
+        "docNumber":     docNumber,
+        "docProponent":  docProponent,
+        "subDepartment": subDepartment,
+        "headerDetails": headerDetails
+    }
+    ctx["publicHearingDate"] = publicHearingDate
+
+def _on_body_text(key):
+    # //akn:judgment/akn:judgmentBody/akn:<key> (first in document order)
+    def handler(el, ctx):
+        if key not in ctx and _is_body_child(el, anywhere=True):
+            ctx[key] = clean_text(_text(el))
+    return handler
+
+def _on_decision(el, ctx):
+    if "decision" in ctx or not _is_body_child(el):
+        return
+    ps = el.findall("akn:p", NS)
+    if len(ps) >= 2:
+        outcome = clean_text(_text(ps[1]))
+        details = " ".join(clean_text(_text(p)) for p in ps[2:])
+    else:
+        outcome, details = clean_text(_text(el)), ""
+    ctx["decision"] = {"outcome": outcome, "decisionDetails": details}
+
+def _on_conclusions(el, ctx):
+    if "conclusions" in ctx or not _is_judgment_child(el):
+        return
+    ps = [clean_text(_text(p)) for p in el.findall("akn:p", NS)]
+    ctx["conclusions"] = " ".join(ps)
+    for d in el.findall(".//akn:date", NS):
+        r = d.get("refersTo")
+        if r == "courtConferenceDate":
+            ctx["courtConferenceDate"] = d.get("date")
+        elif r == "decisionPublicationDate":
+            ctx["decisionPublicationDate"] = d.get("date")
+
+SECTION_HANDLERS = {
+    etree.QName(AKN, "meta").text:         _on_meta,
+    etree.QName(AKN, "header").text:       _on_header,
+    etree.QName(AKN, "introduction").text: _on_body_text("introduction"),
+    etree.QName(AKN, "motivation").text:   _on_body_text("motivation"),
+    etree.QName(AKN, "decision").text:     _on_decision,
+    etree.QName(AKN, "conclusions").text:  _on_conclusions,
+}
+
 # ------------------------------------------------------------------------
 # Parse a single XML into our document dict
 # ------------------------------------------------------------------------
 def parse_akn_xml(path):
     try:
-        tree = etree.parse(path)
-        root = tree.getroot()
-
-        # meta
-        meta_elem = root.find("akn:judgment/akn:meta", NS)
-        meta_dict = parse_meta(meta_elem)
-
-        # header
-        header_elem = root.find("akn:judgment/akn:header", NS)
-        docNumber      = clean_text(header_elem.xpath("string(akn:p[1]/akn:docNumber)", namespaces=NS))
-        docProponent   = clean_text(header_elem.xpath("string(akn:p[2]/akn:docProponent)", namespaces=NS))
-        subDepartment  = clean_text(header_elem.xpath("string(akn:p[3])", namespaces=NS))
-        # remaining <p> become headerDetails
-        hdr_ps = header_elem.findall("akn:p", NS)[3:]
-        headerDetails = " ".join(clean_text(p.xpath("string(.)", namespaces=NS)) for p in hdr_ps)
-
-        # publicHearingDate (in header)
-        publicHearingDate = None
-        for d in header_elem.findall(".//akn:date", NS):
-            if d.get("refersTo") == "publicHearingDate":
-                publicHearingDate = d.get("date")
-                break
-
-        header_obj = {
-            "docNumber":     docNumber,
-            "docProponent":  docProponent,
-            "subDepartment": subDepartment,
-            "headerDetails": headerDetails
-        }
+        # one streaming pass: each section is handled when its end tag is
+        # reached and then cleared, instead of ~15 find/xpath walks per file
+        ctx = {}
+        for _, el in etree.iterparse(path, events=("end",), tag=list(SECTION_HANDLERS),
+                                      **_PARSE_OPTIONS):
+            SECTION_HANDLERS[el.tag](el, ctx)
+            el.clear()
 
-        # judgmentBody → introduction, motivation, decision
-        intro = clean_text(root.xpath("string(//akn:judgment/akn:judgmentBody/akn:introduction)", namespaces=NS))
-        motiv = clean_text(root.xpath("string(//akn:judgment/akn:judgmentBody/akn:motivation)",     namespaces=NS))
-
-        # decision outcome + details
-        dec_elem = root.find("akn:judgment/akn:judgmentBody/akn:decision", NS)
-        outcome, details = "", ""
-        if dec_elem is not None:
-            ps = dec_elem.findall("akn:p", NS)
-            if len(ps) >= 2:
-                outcome = clean_text(ps[1].xpath("string(.)", namespaces=NS))
-                details = " ".join(clean_text(p.xpath("string(.)", namespaces=NS)) for p in ps[2:])
-            else:
-                outcome = clean_text(dec_elem.xpath("string(.)", namespaces=NS))
-        decision_obj = {"outcome": outcome, "decisionDetails": details}
+        if "header" not in ctx:
+            raise ValueError("no akn:judgment/akn:header element")
 
         judgmentBody = {
-            "introduction": intro,
-            "motivation":   motiv,
-            "decision":     decision_obj
+            "introduction": ctx.get("introduction", ""),
+            "motivation":   ctx.get("motivation", ""),
+            "decision":     ctx.get("decision", {"outcome": "", "decisionDetails": ""})
         }
 
-        # conclusions text + dates
-        concl_elem = root.find("akn:judgment/akn:conclusions", NS)
-        conclusions = ""
-        courtConferenceDate    = None
-        decisionPublicationDate = None
-
-        if concl_elem is not None:
-            ps = [clean_text(p.xpath("string(.)", namespaces=NS)) for p in concl_elem.findall("akn:p", NS)]
-            conclusions = " ".join(ps)
-            for d in concl_elem.findall(".//akn:date", NS):
-                r = d.get("refersTo")
-                if r == "courtConferenceDate":
-                    courtConferenceDate = d.get("date")
-                elif r == "decisionPublicationDate":
-                    decisionPublicationDate = d.get("date")
-
         # build final dict
         doc = {
             "document_type":           "judgment",
             "file_name":               os.path.basename(path),
             "inserted_at":             datetime.datetime.utcnow().isoformat() + "Z",
-            "meta":                    meta_dict,
-            "header":                  header_obj,
+            "meta":                    ctx.get("meta", {}),
+            "header":                  ctx["header"],
             "judgmentBody":            judgmentBody,
-            "conclusions":             conclusions,
-            "publicHearingDate":       publicHearingDate,
-            "courtConferenceDate":     courtConferenceDate,
-            "decisionPublicationDate": decisionPublicationDate
+            "conclusions":             ctx.get("conclusions", ""),
+            "publicHearingDate":       ctx["publicHearingDate"],
+            "courtConferenceDate":     ctx.get("courtConferenceDate"),
+            "decisionPublicationDate": ctx.get("decisionPublicationDate")
         }
 
         return doc
@@ -186,27 +248,87 @@ def parse_akn_xml(path):
 # ------------------------------------------------------------------------
 # Walk folder & upsert into Mongo
 # ------------------------------------------------------------------------
-def insert_all_judgments():
-    coll = connect_to_mongo()
-    for root, _, files in os.walk(XML_DIR):
-        for fn in files:
-            if not fn.lower().endswith(".xml"):
-                continue
-            full = os.path.join(root, fn)
-            print("→ processing", full)
-            doc = parse_akn_xml(full)
-            if not doc:
-                continue
-            doc["court"] = detect_court(root)
-            result = coll.replace_one(
+def ensure_indexes(coll):
+    """Index on file_name so the upsert filter does not scan the collection."""
+    try:
+        coll.create_index("file_name", unique=True)
+    except OperationFailure as e:
+        # e.g. existing duplicates: still index, but without uniqueness
+        print(f"[WARN] unique index on file_name failed ({e}), using a plain index")
+        coll.create_index("file_name")
+
+def flush_upserts(coll, ops):
+    result = coll.bulk_write(ops, ordered=False)
+    print(f"  upserted batch of {len(ops)}: "
+          f"{result.upserted_count} inserted, {result.matched_count} replaced")
+
+def parse_akn_xml_with_court(task):
+    """Worker wrapper: (folder, file name) -> document dict with court, or None."""
+    root, fn = task
+    full = os.path.join(root, fn)
+    print("→ processing", full)
+    doc = parse_akn_xml(full)
+    if doc:
+        doc["court"] = detect_court(root)
+    return doc
+
+def upsert_writer(coll, docs, errors):
+    """Drains parsed documents from the queue into bulk_write batches
+    until it receives None."""
+    ops, done = [], False
+    try:
+        while True:
+            doc = docs.get()
+            if doc is None:
+                done = True
+                break
+            ops.append(ReplaceOne(
                 {"file_name": doc["file_name"]},
                 doc,
                 upsert=True
-            )
-            if result.matched_count:
-                print("  replaced", fn)
-            else:
-                print("  inserted", fn)
+            ))
+            if len(ops) >= BATCH_SIZE:
+                flush_upserts(coll, ops)
+                ops = []
+        if ops:
+            flush_upserts(coll, ops)
+    except Exception as e:
+        errors.append(e)
+        # keep draining so the producer never blocks on a full queue
+        # (unless the sentinel was already taken: the final flush failed)
+        while not done and docs.get() is not None:
+            pass
+
+def insert_all_judgments(coll=None, mp_context=None):
+    """Parses every XML under XML_DIR and upserts it. An existing collection
+    (e.g. from parse_worker's shared client) can be passed as coll; a caller
+    holding Mongo clients or threads should also pass a spawn/forkserver
+    mp_context for the parser processes (pymongo is not fork-safe)."""
+    if coll is None:
+        coll = connect_to_mongo()
+    ensure_indexes(coll)
+    tasks = [
+        (root, fn)
+        for root, _, files in os.walk(XML_DIR)
+        for fn in files
+        if fn.lower().endswith(".xml")
+    ]
+
+    # XML parsing (CPU) runs in worker processes, Mongo writes (I/O) in a
+    # single writer thread, so both overlap
+    docs, errors = queue.Queue(maxsize=2 * BATCH_SIZE), []
+    writer = threading.Thread(target=upsert_writer, args=(coll, docs, errors))
+    writer.start()
+    try:
+        with ProcessPoolExecutor(mp_context=mp_context) as ex:
+            for doc in ex.map(parse_akn_xml_with_court, tasks, chunksize=32):
+                if doc:
+                    docs.put(doc)
+    finally:
+        docs.put(None)
+        writer.join()
+    if errors:
+        raise errors[0]
 
 if __name__ == "__main__":
     insert_all_judgments()
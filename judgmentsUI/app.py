@@ -3,7 +3,11 @@
 
 import os
 import re
+import copy
 import math
+import hashlib
+import functools
+import tempfile
 import urllib.parse
 from datetime import datetime
 from lxml import etree
@@ -12,25 +16,244 @@ from dotenv import load_dotenv
 from flask import (
     Flask, render_template, request,
     redirect, url_for, session, abort,
-    make_response, jsonify
+    jsonify, Response
 )
+from flask_caching import Cache
+from flask_compress import Compress
+import zstandard as zstd
 from pymongo import MongoClient
+from pymongo.errors import OperationFailure, ExecutionTimeout
+from bson.binary import Binary
 from bson.objectid import ObjectId
 
 load_dotenv()
 
 app = Flask(__name__)
 app.secret_key = os.environ["FLASK_SECRET"]
+# the cache must be shared by all (gunicorn) worker processes, otherwise
+# invalidate_cache() only clears the worker that handled the edit/delete:
+# Redis if CACHE_REDIS_URL is set, else files in a directory on this host
+if os.environ.get("CACHE_REDIS_URL"):
+    CACHE_CONFIG = {"CACHE_TYPE": "RedisCache",
+                    "CACHE_REDIS_URL": os.environ["CACHE_REDIS_URL"]}
+else:
+    CACHE_CONFIG = {"CACHE_TYPE": "FileSystemCache",
+                    "CACHE_DIR": os.environ.get("CACHE_DIR", os.path.join(
+                        tempfile.gettempdir(), "judgmentsUI-cache")),
+                    "CACHE_THRESHOLD": 2000}
+cache = Cache(app, config={**CACHE_CONFIG, "CACHE_DEFAULT_TIMEOUT": 60})
+# gzip/br for the rendered pages. Not for the AKN XML: Flask-Compress buffers
+# the whole body (no streaming) and suffixes the ETag with ":<algo>", which
+# make_conditional then never matches; download_xml serves it itself.
+app.config.update(
+    COMPRESS_MIMETYPES=["text/html", "application/json"],
+    COMPRESS_LEVEL=6,
+)
+Compress(app)
 
 # ─── MongoDB setup ─────────────────────────────────────────────────────
 MONGO_URI       = os.environ.get("MONGO_URI", "mongodb://localhost:27017/")
 DB_NAME         = "judgmentsV2"
 COLLECTION_NAME = "courtDecisions"
-client     = MongoClient(MONGO_URI)
+# one pool per (gunicorn) worker process; minPoolSize keeps a couple of
+# connections open between bursts
+client     = MongoClient(MONGO_URI, compressors="zstd",
+                         maxPoolSize=int(os.environ.get("MONGO_MAX_POOL", "20")),
+                         minPoolSize=2, appname="judgmentsUI", retryWrites=True)
 collection = client[DB_NAME][COLLECTION_NAME]
 
+# XML is stored zstd-compressed in "xml_zstd" (see backfill_xml.py);
+# older documents may still carry the plain "xml" string.
+ZSTD_LEVEL = 9
+
+def load_xml(doc):
+    """Returns the decision XML as str, or None if the document has none."""
+    blob = doc.get("xml_zstd")
+    if blob is not None:
+        return zstd.ZstdDecompressor().decompress(blob).decode("utf-8")
+    return doc.get("xml")
+
+def iter_xml(doc, chunk_size=64 * 1024):
+    """The decision XML as UTF-8 chunks, decompressed while the response is
+    written instead of holding the whole document (twice) in memory."""
+    blob = doc.get("xml_zstd")
+    if blob is not None:
+        yield from zstd.ZstdDecompressor().read_to_iter(bytes(blob), read_size=chunk_size,
+                                                        write_size=chunk_size)
+    elif doc.get("xml"):
+        yield doc["xml"].encode("utf-8")
+
+def dump_xml(xml_str):
+    """Mongo update for storing xml_str compressed (drops the plain field)
+    together with its content hash "xml_sha256"."""
+    data = xml_str.encode("utf-8")
+    blob = Binary(zstd.ZstdCompressor(level=ZSTD_LEVEL).compress(data))
+    return {"$set": {"xml_zstd": blob, "xml_sha256": hashlib.sha256(data).hexdigest()},
+            "$unset": {"xml": ""}}
+
+def xml_etag(doc):
+    """Content hash of the stored XML: xml_sha256, or for documents stored
+    before it existed a hash of the stored blob/string."""
+    if doc.get("xml_sha256"):
+        return doc["xml_sha256"]
+    blob = doc.get("xml_zstd")
+    data = bytes(blob) if blob is not None else (doc.get("xml") or "").encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+NS = {"akn": "http://docs.oasis-open.org/legaldocml/ns/akn/3.0"}
+
+# one parser for all requests (lxml serialises concurrent use internally);
+# no ID index (unused here), no entity expansion (no XXE), large documents.
+# No recover: the tree is edited and written back, and a recovered parse of
+# malformed XML would silently store a truncated document.
+XML_PARSER = etree.XMLParser(remove_blank_text=True, huge_tree=True,
+                             collect_ids=False, resolve_entities=False)
+
+# XPaths of edit_decision, compiled once at import
+def _xp(path):
+    return etree.XPath(path, namespaces=NS)
+
+_XP_HEADER         = _xp(".//akn:header")
+_XP_DOC_NUMBER     = _xp("akn:p[1]/akn:docNumber")
+_XP_DOC_PROPONENT  = _xp("akn:p[2]/akn:docProponent")
+_XP_SUB_DEPARTMENT = _xp("akn:p[3]")
+_XP_CONF_DATES     = _xp("//akn:date[@refersTo='courtConferenceDate']")
+_XP_PUB_DATES      = _xp("//akn:date[@refersTo='decisionPublicationDate']")
+_XP_JUDGMENT_BODY  = _xp(".//akn:judgmentBody")
+_XP_INTRO_P        = _xp("akn:introduction/akn:p")
+_XP_MOTIVATION_P   = _xp("akn:motivation/akn:p")
+_XP_DECISION       = _xp("akn:decision")
+_XP_OUTCOME        = _xp("akn:p[2]/akn:outcome")
+_XP_PS             = _xp("akn:p")
+_XP_CONCLUSIONS_P  = _xp(".//akn:conclusions/akn:p")
+
+def _load_tree(oid, xml_sha256=None):
+    """Parsed decision XML, or None if there is none (or, with xml_sha256,
+    if the stored XML no longer has that hash)."""
+    filt = {"_id": oid}
+    if xml_sha256:
+        filt["xml_sha256"] = xml_sha256
+    doc = collection.find_one(filt, {"xml": 1, "xml_zstd": 1})
+    xml_str = load_xml(doc) if doc else None
+    if not xml_str:
+        return None
+    return etree.fromstring(xml_str.encode("utf-8"), XML_PARSER)
+
+@functools.lru_cache(maxsize=128)
+def _parsed_xml(oid, xml_sha256):
+    """_load_tree cached per content hash: unlike a revision counter it cannot
+    repeat for other XML when insertToDb replaces the whole document."""
+    return _load_tree(oid, xml_sha256)
+
+def parsed_xml(oid, xml_sha256):
+    """Private copy of the decision tree, safe to modify. Documents without
+    a hash (XML stored before xml_sha256 existed) are parsed uncached."""
+    tree = _parsed_xml(oid, xml_sha256) if xml_sha256 else None
+    if tree is None:
+        return _load_tree(oid)
+    return copy.deepcopy(tree)
+
 parsing_requests = client[DB_NAME]["parsingRequests"]
 
+HEADER_KW_FIELDS = [
+    'header.docNumber', 'header.docProponent',
+    'header.subDepartment', 'header.headerDetails'
+]
+BODY_KW_FIELDS = [
+    'judgmentBody.introduction', 'judgmentBody.motivation',
+    'judgmentBody.decision.outcome', 'judgmentBody.decision.decisionDetails'
+]
+
+# fields shown in the results table; the body text and the (compressed)
+# xml are only loaded by decision_detail/download_xml
+SEARCH_PROJECTION = {
+    '_id': 1, 'court': 1, 'header.docNumber': 1,
+    'courtConferenceDate': 1, 'decisionPublicationDate': 1
+}
+
+# (courtConferenceDate, _id) desc: _id breaks ties so the seek cursor is exact
+SEARCH_SORT = {'courtConferenceDate': -1, '_id': -1}
+# below this many results plain page numbers (skip) are cheap enough
+SEEK_MIN_TOTAL = 1000
+SEARCH_MAX_TIME_MS = 2000
+
+def seek_filter(after_date, after_id):
+    """Documents after (after_date, after_id) in SEARCH_SORT order, or None
+    when the cursor is missing/invalid. Documents without a date sort last."""
+    if not after_date or not ObjectId.is_valid(after_id):
+        return None
+    return {'$or': [
+        {'courtConferenceDate': {'$lt': after_date}},
+        {'courtConferenceDate': after_date, '_id': {'$lt': ObjectId(after_id)}},
+        {'courtConferenceDate': None},
+    ]}
+
+def text_terms(kw):
+    """Words of a keyword for $text, as kw_text tokenises them: plain terms
+    only, no "phrases" or -negations from user input."""
+    return re.findall(r'\w+', kw)
+
+def search_page(filt, seek, page, per_page):
+    """(total, documents of the page) for search()."""
+    # maxTimeMS: a pathological regex cannot hold the request for long
+    # (the landing page without filters counts from the collection metadata)
+    total = (collection.count_documents(filt, maxTimeMS=SEARCH_MAX_TIME_MS) if filt
+             else collection.estimated_document_count())
+    if seek:
+        # the key bound is part of the query, so the index scan starts there
+        query = {'$and': [filt, seek]} if filt else seek
+        cursor = collection.find(query, SEARCH_PROJECTION).sort(list(SEARCH_SORT.items()))
+    else:
+        cursor = (collection.find(filt, SEARCH_PROJECTION).sort(list(SEARCH_SORT.items()))
+                  .skip((page-1)*per_page))
+    return total, list(cursor.limit(per_page).max_time_ms(SEARCH_MAX_TIME_MS))
+
+SEARCH_INDEXES = [
+    # filter by court and/or date range, always sorted by date desc
+    ([('court', 1), ('courtConferenceDate', -1)], {'name': 'court_date'}),
+    ([('courtConferenceDate', -1)], {'name': 'date_desc'}),
+    # "already in DB" lookup of the crawlers (areios_pagos.py, scrapper.py)
+    ([('header.docNumber', 1), ('court', 1)], {'name': 'dup_check'}),
+    # a collection may have only one text index, so header and body
+    # keyword fields share it (default_language none: no stemming)
+    ([(f, 'text') for f in HEADER_KW_FIELDS + BODY_KW_FIELDS],
+     {'name': 'kw_text', 'default_language': 'none'}),
+]
+
+def ensure_indexes(coll):
+    """Indexes used by search(); created once at startup."""
+    for keys, options in SEARCH_INDEXES:
+        try:
+            coll.create_index(keys, **options)
+        except OperationFailure as e:
+            # e.g. an equivalent index with another name/definition exists
+            app.logger.warning("could not create index %s: %s", options['name'], e)
+
+# connects at startup (also warms the pool), not on the first request
+ensure_indexes(collection)
+
+@cache.memoize(timeout=300)
+def get_courts():
+    """Distinct courts for the search form (changes only after a crawl)."""
+    return collection.distinct("court")
+
+def invalidate_cache():
+    """Drops cached courts and search pages after a change in the collection."""
+    cache.delete_memoized(get_courts)
+    cache.clear()
+
+NO_XML = {"xml": 0, "xml_zstd": 0}
+
+def get_decision(decision_id, projection=None):
+    """The decision with the given id (only the projected fields), or 404
+    for a malformed id / missing document instead of an InvalidId 500."""
+    if not ObjectId.is_valid(decision_id):
+        abort(404)
+    doc = collection.find_one({"_id": ObjectId(decision_id)}, projection)
+    if not doc:
+        abort(404)
+    return doc
+
 # ─── Auth helper ──────────────────────────────────────────────────────
 def login_required(f):
     from functools import wraps
@@ -73,30 +296,32 @@ def admin_logout():
 # ─── 3) Download XML ────────────────────────────────────────────────────
 @app.route("/decision/<decision_id>/xml")
 def download_xml(decision_id):
-    doc = collection.find_one(
-        {"_id": ObjectId(decision_id)},
-        {"xml":1, "header.docNumber":1}
-    )
-    if not doc:
-        abort(404)
-
-    xml_bytes = doc["xml"].encode("utf-8")
+    doc = get_decision(decision_id, {"xml":1, "xml_zstd":1, "xml_sha256":1, "header.docNumber":1})
     filename = f'{doc["header"]["docNumber"]}.xml'
-    headers = {}
+    # the XML is compressible and already stored zstd-compressed: clients
+    # accepting zstd get the stored blob as is, the others a stream
+    # decompressed on the fly (ETag per encoding, as they are different bytes)
+    headers = {"Content-Type": "application/xml; charset=utf-8", "Vary": "Accept-Encoding"}
     if request.args.get("download"):
         headers["Content-Disposition"] = f'attachment; filename="{filename}"'
 
-    return make_response(
-        xml_bytes, 200,
-        {**headers, "Content-Type":"application/xml; charset=utf-8"}
-    )
+    etag = xml_etag(doc)
+    blob = doc.get("xml_zstd")
+    if blob is not None and any(enc == "zstd" and q > 0 for enc, q in request.accept_encodings):
+        resp = Response(bytes(blob), 200, {**headers, "Content-Encoding": "zstd"})
+        etag += "-zstd"
+    else:
+        resp = Response(iter_xml(doc), 200, headers)
+    # ETag from the stored content, so repeated downloads get a 304 and a
+    # re-ingested or edited XML never repeats one clients already hold
+    resp.set_etag(etag)
+    return resp.make_conditional(request)
 
 # ─── 4) Detail ─────────────────────────────────────────────────────────
 @app.route("/decision/<decision_id>")
 def decision_detail(decision_id):
-    doc = collection.find_one({"_id": ObjectId(decision_id)})
-    if not doc:
-        abort(404)
+    # the page links to download_xml, it does not render the XML itself
+    doc = get_decision(decision_id, NO_XML)
     doc["_id"] = str(doc["_id"])
     return render_template("decisionDetail.html", decision=doc)
 
@@ -104,14 +329,14 @@ def decision_detail(decision_id):
 @app.route("/decision/<decision_id>/edit", methods=["GET","POST"])
 @login_required
 def edit_decision(decision_id):
-    oid = ObjectId(decision_id)
-    doc = collection.find_one({"_id": oid})
-    if not doc:
-        abort(404)
+    # POST needs only the XML hash (the XML itself comes from parsed_xml),
+    # the form (GET) everything but the XML
+    doc = get_decision(decision_id, {"xml_sha256": 1} if request.method=="POST" else NO_XML)
+    oid = doc["_id"]
 
     if request.method=="POST":
         data = request.form
-        # 1) Ενημέρωσε μόνο τα DB‐fields
+        # 1) DB‐fields
         updates = {
             "header.docNumber":     data["docNumber"],
             "header.docProponent":  data["docProponent"],
@@ -125,46 +350,55 @@ def edit_decision(decision_id):
             "judgmentBody.decision.decisionDetails": data["decisionDetails"],
             "conclusions":        data["conclusions"]
         }
-        collection.update_one({"_id": oid}, {"$set": updates})
+        update = {"$set": updates}
 
-        # 2) Load & parse xml
-        xml_str = doc.get("xml")
-        if xml_str:
-            parser = etree.XMLParser(remove_blank_text=True)
-            tree   = etree.fromstring(xml_str.encode("utf-8"), parser)
+        # 2) Load & parse xml (parsed tree cached per xml_sha256)
+        try:
+            tree = parsed_xml(oid, doc.get("xml_sha256"))
+        except etree.XMLSyntaxError as e:
+            # nothing is saved rather than writing back a damaged XML
+            app.logger.warning("stored XML of %s is malformed: %s", decision_id, e)
+            abort(422, description="Η αποθηκευμένη XML δεν είναι έγκυρη· οι αλλαγές δεν αποθηκεύτηκαν.")
+        if tree is not None:
 
             # header
-            hdr = tree.find(".//akn:header", NS)
-            hdr.find("akn:p[1]/akn:docNumber", NS).text     = data["docNumber"]
-            hdr.find("akn:p[2]/akn:docProponent", NS).text  = data["docProponent"]
-            hdr.find("akn:p[3]", NS).text                   = data["subDepartment"]
+            hdr = _XP_HEADER(tree)[0]
+            _XP_DOC_NUMBER(hdr)[0].text     = data["docNumber"]
+            _XP_DOC_PROPONENT(hdr)[0].text  = data["docProponent"]
+            _XP_SUB_DEPARTMENT(hdr)[0].text = data["subDepartment"]
             # τα υπόλοιπα p → headerDetails (ίσως χρειαστεί custom logic)
 
             # dates
-            for d in tree.xpath("//akn:date[@refersTo='courtConferenceDate']", namespaces=NS):
+            for d in _XP_CONF_DATES(tree):
                 d.set("date", data["courtConferenceDate"])
-            for d in tree.xpath("//akn:date[@refersTo='decisionPublicationDate']", namespaces=NS):
+            for d in _XP_PUB_DATES(tree):
                 d.set("date", data["decisionPublicationDate"])
 
             # judgmentBody
-            jb = tree.find(".//akn:judgmentBody", NS)
-            jb.find("akn:introduction/akn:p", NS).text = data["introduction"]
-            jb.find("akn:motivation/akn:p", NS).text   = data["motivation"]
+            jb = _XP_JUDGMENT_BODY(tree)[0]
+            _XP_INTRO_P(jb)[0].text      = data["introduction"]
+            _XP_MOTIVATION_P(jb)[0].text = data["motivation"]
 
-            dec = jb.find("akn:decision", NS)
-            dec.find("akn:p[2]/akn:outcome", NS).text = data["outcome"]
+            dec = _XP_DECISION(jb)[0]
+            _XP_OUTCOME(dec)[0].text = data["outcome"]
             # decisionDetails: π.χ. όλα τα p μετά το 2ο
-            for p, txt in zip(dec.findall("akn:p", NS)[2:], data["decisionDetails"].split("\n")):
+            for p, txt in zip(_XP_PS(dec)[2:], data["decisionDetails"].split("\n")):
                 p.text = txt
 
             # conclusions
-            concl = tree.find(".//akn:conclusions/akn:p", NS)
+            concl = _XP_CONCLUSIONS_P(tree)[0]
             concl.text = data["conclusions"]
 
             # 3) serialize & save
+            # stored without indentation (pretty printing only adds whitespace)
             new_xml = etree.tostring(tree, xml_declaration=True,
-                                     encoding="UTF-8", pretty_print=True).decode("utf-8")
-            collection.update_one({"_id": oid}, {"$set": {"xml": new_xml}})
+                                     encoding="UTF-8").decode("utf-8")
+            update = dump_xml(new_xml)
+            update["$set"].update(updates)
+
+        # fields and XML in one write
+        collection.update_one({"_id": oid}, update)
+        invalidate_cache()
 
         return redirect(url_for("decision_detail", decision_id=decision_id))
 
@@ -176,7 +410,10 @@ def edit_decision(decision_id):
 @app.route("/decision/<decision_id>/delete", methods=["POST"])
 @login_required
 def delete_decision(decision_id):
+    if not ObjectId.is_valid(decision_id):
+        abort(404)
     collection.delete_one({"_id": ObjectId(decision_id)})
+    invalidate_cache()
 
     # if called via AJAX, return JSON so front-end can simply reload
     if request.headers.get("X-Requested-With") == "XMLHttpRequest":
@@ -190,6 +427,7 @@ def delete_decision(decision_id):
 
 # ─── 7) Search with pagination ──────────────────────────────────────────
 @app.route("/search", methods=["GET"])
+@cache.cached(timeout=60, query_string=True, unless=lambda: session.get("admin"))
 def search():
     # 1) gather filters from URL
     params = {
@@ -231,31 +469,53 @@ def search():
             '$options': 'i'
         }
 
-    ors = []
+    # keywords: the kw_text index selects the candidate documents ($text
+    # with the words of both keywords, OR-ed), the regexes below only keep
+    # the field restriction on those candidates instead of scanning everything
+    ors, terms = [], []
     if params['header_kw']:
-        hw = re.compile(re.escape(params['header_kw']), re.IGNORECASE)
-        for p in ['header.docNumber','header.docProponent','header.subDepartment','header.headerDetails']:
-            ors.append({p: hw})
+        hw = {'$regex': re.escape(params['header_kw']), '$options': 'i'}
+        ors.extend({p: hw} for p in HEADER_KW_FIELDS)
+        terms.append(text_terms(params['header_kw']))
     if params['body_kw']:
-        bw = re.compile(re.escape(params['body_kw']), re.IGNORECASE)
-        for p in [
-            'judgmentBody.introduction',
-            'judgmentBody.motivation',
-            'judgmentBody.decision.outcome',
-            'judgmentBody.decision.decisionDetails'
-        ]:
-            ors.append({p: bw})
+        bw = {'$regex': re.escape(params['body_kw']), '$options': 'i'}
+        ors.extend({p: bw} for p in BODY_KW_FIELDS)
+        terms.append(text_terms(params['body_kw']))
     if ors:
         filt['$or'] = ors
-
-    # 3) count & fetch
-    total = collection.count_documents(filt)
+        # a keyword without any word (e.g. only punctuation) has no $text
+        # term, and $text would then exclude its regex matches: regexes only
+        if all(terms):
+            filt['$text'] = {'$search': " ".join(t for ts in terms for t in ts)}
+
+    # 3) count & fetch: the total and the page are separate queries, so the
+    #    page is read in SEARCH_SORT order from the court_date/date_desc index
+    #    and only per_page projected documents are fetched ($sort/$skip inside
+    #    a $facet could not use an index and sorted full documents in memory).
+    #    With an (after_date, after_id) cursor from the previous page the page
+    #    is sought by key instead of skipping (page-1)*per_page documents.
+    seek = seek_filter(request.args.get('after_date', ''),
+                       request.args.get('after_id', ''))
+    try:
+        total, docs = search_page(filt, seek, page, per_page)
+    except OperationFailure as e:
+        # e.g. kw_text not built yet on this deployment: the regexes alone
+        # still answer the query (a timeout is not retried)
+        if '$text' not in filt or isinstance(e, ExecutionTimeout):
+            raise
+        app.logger.warning("$text search failed, using the regexes only: %s", e)
+        del filt['$text']
+        total, docs = search_page(filt, seek, page, per_page)
     total_pages = max(1, math.ceil(total / per_page))
-    skip = (page-1)*per_page
-    docs = list(collection.find(filt)
-                .sort('courtConferenceDate', -1)
-                .skip(skip)
-                .limit(per_page))
+
+    # cursor for the "next" link of large result sets
+    next_qs = ''
+    if total >= SEEK_MIN_TOTAL and len(docs) == per_page and docs[-1].get('courtConferenceDate'):
+        next_qs = urllib.parse.urlencode({
+            'after_date': docs[-1]['courtConferenceDate'],
+            'after_id':   str(docs[-1]['_id']),
+            'page':       page + 1,
+        })
     for d in docs:
         d['_id'] = str(d['_id'])
 
@@ -266,7 +526,7 @@ def search():
 
     return render_template("searchResults.html",
                            decisions   = docs,
-                           courts      = collection.distinct("court"),
+                           courts      = get_courts(),
                            params      = params,
                            total       = total,
                            page        = page,
@@ -277,6 +537,7 @@ def search():
                            current_year= datetime.now().year,
                            base_url    = base_url,
                            base_qs     = base_qs,
+                           next_qs     = next_qs,
                            admin_view  = session.get("admin", False)
                            )
 
@@ -293,12 +554,17 @@ def trigger_parse():
         "requested_at": datetime.utcnow(),
         "status":       "pending"
     })
+    invalidate_cache()
 
     return jsonify(
         success=True,
         message=f"Scheduled parsing for year {year}"
     )
 
+# development server only; in production run it under gunicorn, e.g. from
+# the judgmentsUI folder (the workers share the cache, see CACHE_CONFIG;
+# with workers on several hosts set CACHE_REDIS_URL):
+#   gunicorn -w 4 -k gthread --threads 8 -b 0.0.0.0:8000 app:app
 if __name__ == "__main__":
     app.run(debug=True)
 
@@ -6,6 +6,7 @@
 # http://doc.scrapy.org/en/latest/topics/spider-middleware.html
 
 from scrapy import signals
+from scrapy.exceptions import IgnoreRequest
 
 
 class LegalSpidersSpiderMiddleware(object):
@@ -54,3 +55,13 @@ class LegalSpidersSpiderMiddleware(object):
 
     def spider_opened(self, spider):
         spider.logger.info('Spider opened: %s' % spider.name)
+
+
+class SkipExistingDecisionsMiddleware(object):
+    """Downloader middleware: ignores requests for URLs listed in the
+    spider's skip_urls (decisions already stored), before any download."""
+
+    def process_request(self, request, spider):
+        if request.url in getattr(spider, 'skip_urls', ()):
+            raise IgnoreRequest("already in DB: %s" % request.url)
+        return None
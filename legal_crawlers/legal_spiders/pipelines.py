@@ -6,6 +6,9 @@
 # See: http://doc.scrapy.org/en/latest/topics/item-pipeline.html
 import os
 
+from pymongo import MongoClient
+from pymongo.errors import BulkWriteError
+
 class LegalSpidersPipeline(object):
     def process_item(self, item, spider):
         if not os.path.exists(item['store_dir']+
@@ -22,3 +25,38 @@ class LegalSpidersPipeline(object):
             f.write(item['desc'])
         return item
 
+
+class MongoBatchPipeline(object):
+    """Stores crawled decisions (header.docNumber, court, year, body) in the
+    rawDecisions collection with one insert_many per BATCH_SIZE items.
+    A unique (header.docNumber, court) index drops duplicates on insert."""
+    BATCH_SIZE = 500
+    COLLECTION = "rawDecisions"
+
+    def open_spider(self, spider):
+        self.client = MongoClient(getattr(spider, 'MONGO_URI', "mongodb://localhost:27017/"))
+        self.col = self.client[getattr(spider, 'DB_NAME', "judgmentsV2")][self.COLLECTION]
+        self.col.create_index([('header.docNumber', 1), ('court', 1)], unique=True)
+        self.buf = []
+
+    def process_item(self, item, spider):
+        self.buf.append(dict(item))
+        if len(self.buf) >= self.BATCH_SIZE:
+            self.flush(spider)
+        return item
+
+    def close_spider(self, spider):
+        self.flush(spider)
+        self.client.close()
+
+    def flush(self, spider):
+        if not self.buf:
+            return
+        try:
+            self.col.insert_many(self.buf, ordered=False)
+        except BulkWriteError as e:
+            # E11000 (already stored) is expected, anything else is reported
+            others = [err for err in e.details.get('writeErrors', []) if err.get('code') != 11000]
+            if others:
+                spider.logger.error("rawDecisions insert errors: %s", others)
+        self.buf = []
@@ -10,10 +10,14 @@ from scrapy.selector import Selector
 from scrapy.http import Request
 from datetime import datetime
 from pymongo import MongoClient
+from lxml import etree
 
 # default to current year if none supplied
 CURRENT_YEAR = datetime.now().year
 
+# every text node under a <p>, as plain str
+P_TEXTS = etree.XPath('//p//text()', smart_strings=False)
+
 
 class CyLawSpider(scrapy.Spider):
     name = "CyLaw"
@@ -22,11 +26,44 @@ class CyLawSpider(scrapy.Spider):
     # ─── add these lines ─────────────────────────────────────
     MONGO_URI = "mongodb://localhost:27017/"
     DB_NAME = "judgmentsV2"
+    custom_settings = {
+        'ITEM_PIPELINES': {'legal_spiders.pipelines.MongoBatchPipeline': 300},
+        'DOWNLOADER_MIDDLEWARES': {
+            'legal_spiders.middlewares.SkipExistingDecisionsMiddleware': 50,
+        },
+        # thousands of small pages per year: more parallel requests,
+        # AutoThrottle adapts the rate instead of a fixed delay
+        'CONCURRENT_REQUESTS': 32,
+        'CONCURRENT_REQUESTS_PER_DOMAIN': 16,
+        'REACTOR_THREADPOOL_MAXSIZE': 20,
+        'DOWNLOAD_DELAY': 0,
+        'AUTOTHROTTLE_ENABLED': True,
+        'AUTOTHROTTLE_TARGET_CONCURRENCY': 8.0,
+        # re-runs read already downloaded decision pages from disk (30 days);
+        # the year index pages are always fetched (see start_requests)
+        'HTTPCACHE_ENABLED': True,
+        'HTTPCACHE_EXPIRATION_SECS': 86400 * 30,
+        'HTTPCACHE_STORAGE': 'scrapy.extensions.httpcache.FilesystemCacheStorage',
+    }
 
     def __init__(self, year=f"{CURRENT_YEAR},{CURRENT_YEAR}", *args, **kwargs):
         # set up Mongo once
         client = MongoClient(self.MONGO_URI)
         self.decisions_col = client[self.DB_NAME]["courtDecisions"]
+        # docNumbers already in Mongo, fetched with one query instead of a
+        # find_one per decision
+        self.existing = set(self.decisions_col.distinct(
+            "header.docNumber", {"court": "Areios Pagos"}
+        ))
+        # decision pages whose docNumber is already in Mongo (the docNumber
+        # comes from the page title, so only pages crawled before are known):
+        # SkipExistingDecisionsMiddleware drops them before the download
+        self.skip_urls = {
+            d["url"] for d in client[self.DB_NAME]["rawDecisions"].find(
+                {"court": "Areios Pagos", "url": {"$exists": True}},
+                {"url": 1, "header.docNumber": 1}
+            ) if d["header"]["docNumber"] in self.existing
+        }
         super().__init__(*args, **kwargs)
 
         """
@@ -47,6 +84,11 @@ class CyLawSpider(scrapy.Spider):
         self.STORE_DIR = os.path.join("data", "areios_pagos")
         os.makedirs(self.STORE_DIR, exist_ok=True)
 
+    def start_requests(self):
+        # the index lists newly published decisions, so it bypasses the cache
+        for url in self.start_urls:
+            yield Request(url, callback=self.parse, meta={'dont_cache': True})
+
     def parse(self, response):
         sel = Selector(response)
         # every <li><a href="..."> on the index page
@@ -73,16 +115,14 @@ class CyLawSpider(scrapy.Spider):
         os.makedirs(outdir, exist_ok=True)
 
         # gather all <p> text
-        paras = sel.xpath('//p//text()').getall()
-        body = '\n'.join(p.strip() for p in paras if p.strip())
+        # (straight on the lxml tree: no Selector object per text node)
+        paras = P_TEXTS(sel.root)
+        body = '\n'.join(filter(None, map(str.strip, paras)))
 
         # final path (opening with 'w' *always* overwrites any existing file)
         path = os.path.join(outdir, f"{filename}.txt")
         # skip if already in Mongo
-        if self.decisions_col.find_one({
-            "header.docNumber": filename,
-            "court": "Areios Pagos"
-        }):
+        if filename in self.existing:
             self.logger.info(f"→ {filename} already in DB, skipping")
             return
         with open(path, 'w', encoding='utf-8') as f:
@@ -92,3 +132,12 @@ class CyLawSpider(scrapy.Spider):
 
         # log so you know we've just overwritten or created this file
         self.logger.info(f"✅ Saved (and overwritten if existed): {path}")
+
+        # batched into Mongo by MongoBatchPipeline
+        yield {
+            "header": {"docNumber": filename},
+            "court": "Areios Pagos",
+            "year": year,
+            "url": response.url,
+            "body": body,
+        }
@@ -4,10 +4,10 @@
 import os
 import sys
 import re
-import time
 import math
 import errno
-import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -23,14 +23,60 @@ from selenium.common.exceptions import (
 
 # Mongo (προαιρετικά: αν αποτύχει η σύνδεση, συνεχίζουμε χωρίς skip)
 from pymongo import MongoClient
+from pymongo.errors import BulkWriteError, PyMongoError
 MONGO_URI = "mongodb://localhost:27017/"
 DB_NAME   = "judgmentsV2"
 try:
     _mongo = MongoClient(MONGO_URI, serverSelectionTimeoutMS=800)
     _ = _mongo.server_info()
     decisions_col = _mongo[DB_NAME]["courtDecisions"]
+    # οι αποφάσεις όπως κατέβηκαν (όπως και το MongoBatchPipeline του CyLaw)
+    raw_col = _mongo[DB_NAME]["rawDecisions"]
 except Exception:
     decisions_col = None
+    raw_col = None
+
+# ίδια ευρετήρια με το judgmentsUI (dup_check) και το MongoBatchPipeline,
+# ώστε τα distinct/inserts να μην κάνουν COLLSCAN (no-op αν υπάρχουν).
+# Αποτυχία εδώ (π.χ. ισοδύναμο ευρετήριο με άλλο όνομα, διπλότυπα για το
+# unique) δεν απενεργοποιεί τη Mongo: μόνο προειδοποίηση.
+if decisions_col is not None:
+    for _col, _keys, _opts in (
+        (decisions_col, [("header.docNumber", 1), ("court", 1)], {"name": "dup_check"}),
+        (raw_col, [("header.docNumber", 1), ("court", 1)], {"unique": True}),
+    ):
+        try:
+            _col.create_index(_keys, **_opts)
+        except PyMongoError as e:
+            print(f"[WARN] could not create index on {_col.name}: {e}")
+
+RAW_BATCH = 500
+
+# μόνιμο Firefox profile (HTTP cache/cookies κρατιούνται μεταξύ εκτελέσεων)
+PROFILE_DIR = os.environ.get("STE_PROFILE_DIR", "/tmp/ste_profile")
+
+
+def existing_decisions(col=None):
+    """docNumbers του ΣτΕ που υπάρχουν ήδη στη Mongo (ένα query αντί για
+    find_one ανά απόφαση), ή None αν η Mongo δεν είναι διαθέσιμη."""
+    col = decisions_col if col is None else col
+    if col is None:
+        return None
+    return set(col.distinct("header.docNumber", {"court": "Council of State"}))
+
+
+def flush_raw(docs):
+    """Ένα insert_many (unordered) για τις νέες αποφάσεις του buffer. Το
+    rawDecisions έχει προφορτωθεί, οπότε δεν χρειάζονται upserts· διπλότυπα
+    από παράλληλη εκτέλεση (E11000) απλώς αγνοούνται."""
+    if docs and raw_col is not None:
+        try:
+            raw_col.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            others = [err for err in e.details.get("writeErrors", []) if err.get("code") != 11000]
+            if others:
+                print(f"rawDecisions insert errors: {others}")
+    docs.clear()
 
 
 # --------------------------
@@ -41,6 +87,19 @@ def init_driver(headless=False):
     opts = FxOptions()
     if headless:
         opts.add_argument("-headless")
+    # το driver.get επιστρέφει με το DOMContentLoaded: ο πίνακας φορτώνει
+    # έτσι κι αλλιώς με XHR και τον περιμένουμε ρητά (wait_for_table_to_load)
+    opts.page_load_strategy = "eager"
+    # οι εικόνες δεν χρειάζονται για το scraping· το CSS όμως ναι: οι αναμονές
+    # του modal και του πίνακα βασίζονται στην ορατότητα (display:none)
+    opts.set_preference("permissions.default.image", 2)
+    opts.set_preference("dom.webnotifications.enabled", False)
+    opts.set_preference("network.http.max-persistent-connections-per-server", 10)
+    # -profile <dir> χρησιμοποιεί τον φάκελο ως έχει (το opts.profile θα
+    # τον αντέγραφε σε προσωρινό φάκελο σε κάθε εκκίνηση)
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    opts.add_argument("-profile")
+    opts.add_argument(PROFILE_DIR)
     driver = webdriver.Firefox(options=opts)
     driver.wait = WebDriverWait(driver, 12)
     return driver
@@ -74,31 +133,79 @@ def wait_datatable_idle(driver, timeout=10):
         # αν δεν υπάρχει overlay, απλώς προχώρα
         pass
 
+_DOM_STABLE_JS = """
+const target = document.querySelector(arguments[0]);
+const quiet = arguments[1], cap = arguments[2];
+const cb = arguments[arguments.length - 1];
+if (!target) { cb(false); return; }
+let done = false, t = null;
+const finish = (stable) => {
+    if (done) return;
+    done = true; clearTimeout(t); obs.disconnect(); cb(stable);
+};
+const obs = new MutationObserver(() => {
+    clearTimeout(t); t = setTimeout(() => finish(true), quiet);
+});
+obs.observe(target, {childList: true, subtree: true, attributes: true});
+t = setTimeout(() => finish(true), quiet);
+setTimeout(() => finish(false), cap);
+"""
+
+def wait_dom_stable(driver, selector="#cldResultTable", quiet_ms=250, max_ms=2000):
+    """Επιστρέφει μόλις το selector δεν έχει αλλαγές στο DOM για quiet_ms
+    (MutationObserver στον browser), το πολύ μετά από max_ms.
+    True αν σταθεροποιήθηκε, False σε timeout ή αν δεν υπάρχει."""
+    try:
+        return driver.execute_async_script(_DOM_STABLE_JS, selector, quiet_ms, max_ms)
+    except TimeoutException:
+        return False
+
+def goto_page(driver, link, timeout=20):
+    """Click σε σύνδεσμο σελιδοποίησης και αναμονή μέχρι να αντικατασταθούν
+    οι γραμμές του πίνακα (staleness της πρώτης) αντί για σταθερό sleep."""
+    try:
+        first_row = driver.find_element(By.CSS_SELECTOR, "#cldResultTable tbody tr")
+    except NoSuchElementException:
+        first_row = None
+    driver.execute_script("arguments[0].click();", link)
+    if first_row is not None:
+        try:
+            WebDriverWait(driver, timeout).until(EC.staleness_of(first_row))
+        except TimeoutException:
+            pass
+    wait_for_table_to_load(driver, timeout=timeout)
+    wait_dom_stable(driver)
+
+_TOTAL_PATS = tuple(re.compile(p, re.I) for p in (
+    r'από\s+([\d\.,]+)\s+αποτελέσματα',
+    r'από\s+([\d\.,]+)\s+εγγραφ',
+    r'of\s+([\d\.,]+)\s+entries',
+))
+_DIGIT_STRIP = str.maketrans('', '', '.,')
+
 def parse_total_from_info(text):
     """Προσπάθησε να βγάλεις 'total' από διάφορες παραλλαγές κειμένου info."""
     text = (text or "").strip()
     if not text:
         return None
-    pats = [
-        r'από\s+([\d\.,]+)\s+αποτελέσματα',
-        r'από\s+([\d\.,]+)\s+εγγραφ',
-        r'of\s+([\d\.,]+)\s+entries',
-    ]
-    for p in pats:
-        m = re.search(p, text, re.I)
+    for pat in _TOTAL_PATS:
+        m = pat.search(text)
         if m:
-            return int(m.group(1).replace('.', '').replace(',', ''))
+            return int(m.group(1).translate(_DIGIT_STRIP))
     return None
 
 def click_doc_opener_by_index(driver, row_index, max_retries=6):
     """
     Κάνε click στο .doc_opener της N-οστής (0-based) ορατής γραμμής.
     Σε κάθε προσπάθεια γίνεται re-query + scroll + click.
+    Ο caller εξασφαλίζει ότι ο πίνακας είναι idle· εδώ ξαναπεριμένουμε
+    μόνο μετά από αποτυχημένη προσπάθεια.
     """
     css = f"#cldResultTable tbody tr:nth-child({row_index + 1}) .doc_opener"
     for attempt in range(max_retries):
         try:
-            wait_datatable_idle(driver, timeout=10)
+            if attempt:
+                wait_datatable_idle(driver, timeout=10)
             el = WebDriverWait(driver, 10).until(
                 EC.element_to_be_clickable((By.CSS_SELECTOR, css))
             )
@@ -106,7 +213,9 @@ def click_doc_opener_by_index(driver, row_index, max_retries=6):
             driver.execute_script("arguments[0].click();", el)
             return True
         except (StaleElementReferenceException, ElementClickInterceptedException):
-            time.sleep(0.25 + random.random() * 0.25)
+            # exponential backoff: συνέχισε μόλις σταθεροποιηθεί ο πίνακας
+            wait_dom_stable(driver, "#cldResultTable tbody", quiet_ms=50,
+                            max_ms=min(50 * (2 ** attempt), 800))
         except TimeoutException:
             return False
     return False
@@ -116,18 +225,36 @@ def click_doc_opener_by_index(driver, row_index, max_retries=6):
 # Scraper helpers
 # --------------------------
 
-def safe_text(driver, elem_id, wait):
-    try:
-        el = wait.until(EC.visibility_of_element_located((By.ID, elem_id)))
-        txt = (el.text or "").strip()
-        if not txt:
-            txt = el.get_attribute("textContent") or ""
-        return txt.strip()
-    except TimeoutException:
-        return ""
+MODAL_FIELD_IDS = [
+    "display_dec_number", "display_chamber", "display_dec_category",
+    "display_dec_date", "display_init_category", "display_init_number",
+    "display_composition", "ecli", "full_display_dec_text",
+]
+
+_MODAL_FIELDS_JS = """
+const o = {};
+for (const id of arguments[0]) {
+    const el = document.getElementById(id);
+    o[id] = el ? (el.innerText || el.textContent || '') : '';
+}
+return o;
+"""
+
+def read_modal_fields(driver):
+    """Όλα τα πεδία του modal (MODAL_FIELD_IDS) με ένα execute_script αντί για
+    ένα WebDriverWait + .text ανά πεδίο. Λείπον πεδίο -> ''.
+    Το strip γίνεται εδώ, όχι με .trim() στον browser (αντίγραφο του
+    σώματος των ~500KB στη JS)."""
+    fields = driver.execute_script(_MODAL_FIELDS_JS, MODAL_FIELD_IDS) or {}
+    return {k: (fields.get(k) or "").strip() for k in MODAL_FIELD_IDS}
+
+# τα αρχεία γράφονται στο παρασκήνιο όσο ο driver ανοίγει την επόμενη απόφαση
+_IO = ThreadPoolExecutor(max_workers=4)
 
 def write_decision(out_fn, header_lines, body_text):
-    tmp_fn = out_fn + ".tmp"
+    # .tmp ανά thread: δύο threads του _IO για την ίδια απόφαση δεν γράφουν
+    # πάνω στο ίδιο προσωρινό αρχείο πριν το os.replace
+    tmp_fn = f"{out_fn}.{threading.get_ident()}.tmp"
     with open(tmp_fn, "w", encoding="utf-8") as f:
         for line in header_lines:
             f.write((line or "").strip() + "\n")
@@ -143,6 +270,12 @@ def write_decision(out_fn, header_lines, body_text):
 def lookup(driver, year, headless=False):
     outdir = os.path.join(os.pardir, "data", "ste", year)
     os.makedirs(outdir, exist_ok=True)
+    existing = existing_decisions()
+    # ό,τι υπάρχει ήδη στο rawDecisions: οι υπόλοιπες αποφάσεις είναι
+    # σίγουρα νέες και γράφονται με απλό insert_many
+    raw_existing = existing_decisions(raw_col) if raw_col is not None else None
+    pending_docs = []
+    writes = []
 
     driver.get("http://www.adjustice.gr/webcenter/portal/ste/ypiresies/nomologies")
     try:
@@ -170,21 +303,27 @@ def lookup(driver, year, headless=False):
             print(f"{year}: dynamic paging (info element not found)")
 
         page = 1
+        # True όταν ο πίνακας μπορεί να ξαναφορτώνει (νέα σελίδα ή αποτυχία
+        # click/modal): μόνο τότε περιμένουμε το processing overlay
+        table_dirty = True
         while True:
-            # Φρόντισε να είναι idle ο πίνακας
-            wait_datatable_idle(driver, timeout=15)
-
             # Πόσοι clickable σύνδεσμοι υπάρχουν τώρα;
             links_now = driver.find_elements(By.CSS_SELECTOR, "#cldResultTable tbody tr .doc_opener")
             row_count = len(links_now)
 
             row_idx = 0
             while row_idx < row_count:
+                # Φρόντισε να είναι idle ο πίνακας
+                if table_dirty:
+                    wait_datatable_idle(driver, timeout=15)
+                    table_dirty = False
+
                 # Click με re-query by index
                 ok = click_doc_opener_by_index(driver, row_idx)
                 if not ok:
                     # αν δεν καταφέραμε click, συνέχισε στην επόμενη γραμμή
                     row_idx += 1
+                    table_dirty = True
                     continue
 
                 # Περίμενε να ανοίξει το modal
@@ -193,47 +332,46 @@ def lookup(driver, year, headless=False):
                 except TimeoutException:
                     # modal δεν άνοιξε σωστά -> προχώρα στην επόμενη γραμμή
                     row_idx += 1
-                    wait_datatable_idle(driver, timeout=10)
+                    table_dirty = True
                     continue
 
-                # Διάβασε πεδία με fallbacks
-                full_number = safe_text(driver, "display_dec_number", driver.wait)
+                # Διάβασε όλα τα πεδία και το σώμα με ένα round-trip
+                fields = read_modal_fields(driver)
+                full_number = fields["display_dec_number"]
                 decision_no = full_number.split("/")[0] if "/" in full_number else full_number
 
-                chamber      = safe_text(driver, "display_chamber", driver.wait)
-                dec_cat      = safe_text(driver, "display_dec_category", driver.wait)
-                dec_date     = safe_text(driver, "display_dec_date", driver.wait)
-                init_cat     = safe_text(driver, "display_init_category", driver.wait)
-                init_number  = safe_text(driver, "display_init_number", driver.wait)
-                composition  = safe_text(driver, "display_composition", driver.wait)
-                ecli         = safe_text(driver, "ecli", driver.wait)
-
-                # Σώμα απόφασης
-                try:
-                    body_el = driver.wait.until(EC.visibility_of_element_located((By.ID, "full_display_dec_text")))
-                    body_txt = body_el.text.strip() or (body_el.get_attribute("textContent") or "").strip()
-                except TimeoutException:
-                    body_txt = ""
-
-                # Skip μέσω Mongo (αν είναι διαθέσιμη)
-                if decisions_col is not None:
-                    exists = decisions_col.find_one({
-                        "header.docNumber": decision_no,
-                        "court": "Council of State"
-                    })
-                    if exists:
-                        print(f"-> {decision_no} already in DB, skipping")
-                    else:
-                        out_fn = os.path.join(outdir, f"{decision_no}.txt")
-                        header_lines = [full_number, chamber, dec_cat, dec_date, init_cat, init_number, composition, ecli]
-                        write_decision(out_fn, header_lines, body_txt)
-                        print(f"saved {decision_no} (len={len(body_txt)})")
+                chamber      = fields["display_chamber"]
+                dec_cat      = fields["display_dec_category"]
+                dec_date     = fields["display_dec_date"]
+                init_cat     = fields["display_init_category"]
+                init_number  = fields["display_init_number"]
+                composition  = fields["display_composition"]
+                ecli         = fields["ecli"]
+                body_txt     = fields["full_display_dec_text"]
+
+                # Skip μέσω Mongo (αν είναι διαθέσιμη, αλλιώς σώσε πάντα)
+                if existing is not None and decision_no in existing:
+                    print(f"-> {decision_no} already in DB, skipping")
                 else:
-                    # Χωρίς Mongo, σώσε πάντα
                     out_fn = os.path.join(outdir, f"{decision_no}.txt")
                     header_lines = [full_number, chamber, dec_cat, dec_date, init_cat, init_number, composition, ecli]
-                    write_decision(out_fn, header_lines, body_txt)
+                    writes.append(_IO.submit(write_decision, out_fn, header_lines, body_txt))
                     print(f"saved {decision_no} (len={len(body_txt)})")
+                    if raw_existing is not None and decision_no not in raw_existing:
+                        raw_existing.add(decision_no)
+                        pending_docs.append({
+                            "header": {
+                                "docNumber": decision_no, "fullNumber": full_number,
+                                "chamber": chamber, "category": dec_cat, "date": dec_date,
+                                "initCategory": init_cat, "initNumber": init_number,
+                                "composition": composition, "ecli": ecli,
+                            },
+                            "court": "Council of State",
+                            "year": year,
+                            "body": body_txt,
+                        })
+                        if len(pending_docs) >= RAW_BATCH:
+                            flush_raw(pending_docs)
 
                 # Κλείσιμο modal με το back κουμπί (όχι driver.back())
                 try:
@@ -242,54 +380,62 @@ def lookup(driver, year, headless=False):
                 except TimeoutException:
                     driver.back()
 
-                # Περίμενε να σταθεροποιηθεί ξανά ο πίνακας πριν συνεχίσεις
-                wait_datatable_idle(driver, timeout=15)
-                time.sleep(0.2 + random.random() * 0.2)
+                # Περίμενε να κλείσει το modal και να σταθεροποιηθεί ξανά ο
+                # πίνακας πριν συνεχίσεις (αντί για σταθερό sleep)
+                try:
+                    driver.wait.until(EC.invisibility_of_element_located((By.ID, "display_dec_number")))
+                except TimeoutException:
+                    pass
+                wait_dom_stable(driver)
                 row_idx += 1
 
+            # στο τέλος κάθε σελίδας γράφονται όσες αποφάσεις μαζεύτηκαν
+            flush_raw(pending_docs)
+
             # Μετάβαση στην επόμενη σελίδα (αριθμητικός σύνδεσμος)
+            table_dirty = True
             try:
                 page += 1
                 next_link = driver.find_element(By.LINK_TEXT, str(page))
                 driver.execute_script("arguments[0].scrollIntoView({block:'center'});", next_link)
-                driver.execute_script("arguments[0].click();", next_link)
-                wait_for_table_to_load(driver, timeout=20)
-                wait_datatable_idle(driver, timeout=15)
+                goto_page(driver, next_link)
                 print(f"{year}: page {page}")
-                time.sleep(0.3)
             except NoSuchElementException:
                 # Δοκίμασε fallback "Επόμενο" αν υπάρχει
                 try:
                     nxt = driver.find_element(By.LINK_TEXT, "Επόμενο")
                     if "disabled" in (nxt.get_attribute("class") or ""):
                         break
-                    driver.execute_script("arguments[0].click();", nxt)
-                    wait_for_table_to_load(driver, timeout=20)
-                    wait_datatable_idle(driver, timeout=15)
+                    goto_page(driver, nxt)
                     print(f"{year}: page {page} (next)")
-                    time.sleep(0.3)
                 except NoSuchElementException:
                     break
 
     except TimeoutException:
         print("Timeout while loading results.")
+    finally:
+        flush_raw(pending_docs)
+        # περίμενε όλες τις εγγραφές αρχείων (και εμφάνισε τυχόν σφάλματα)
+        for f in writes:
+            f.result()
 
 
 # --------------------------
 # Entrypoint
 # --------------------------
 
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python scrapper.py <YEAR> [--headless]")
-        sys.exit(1)
-
-    year = sys.argv[1]
-    headless = ("--headless" in sys.argv)
-
+def main(year, headless=False):
+    """Κατεβάζει όλες τις αποφάσεις ενός έτους (και από το parse_worker)."""
     driver = init_driver(headless=headless)
     try:
         lookup(driver, year, headless=headless)
     finally:
-        time.sleep(1)
         driver.quit()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python scrapper.py <YEAR> [--headless]")
+        sys.exit(1)
+
+    main(sys.argv[1], headless=("--headless" in sys.argv))
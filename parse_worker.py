@@ -2,7 +2,10 @@
 # parsing_worker.py
 
 import os
+import sys
+import atexit
 import subprocess
+import multiprocessing
 import datetime
 from pymongo import MongoClient
 
@@ -13,39 +16,73 @@ REQUESTS    = "parsingRequests"
 # --- adjust these to the real paths in your project ---
 STE_SCRAPER       = "/path/to/legal_crawlers/ste_scrapper/scrapper.py"
 AREIOS_SCRAPY_DIR = "/path/to/legal_crawlers"
-COUNCIL_XML       = "/path/to/judgmentsV2/createCouncilOfStateJudgmentsAkn.py"
 AREIOS_XML        = "/path/to/judgmentsV2/createAreiosPagosJudgmentsAkn.py"
-INGESTION_SCRIPT  = "/path/to/judgmentsV2/insertToDb.py"
 # ---------------------------------------------------------
+# the STE scraper, the Council of State XML builder and the ingestion run
+# in-process (imported on first use); the scrapy crawl (twisted reactor) and
+# createAreiosPagosJudgmentsAkn.py (parses sys.argv at import) stay
+# subprocesses
+
+# the in-process stages start their process pools with spawn: this process
+# holds MongoClients (ours, scrapper's) and threads, and pymongo is not
+# fork-safe. Spawned children re-import this module, so the client below
+# does not connect until it is first used.
+_SPAWN = multiprocessing.get_context("spawn")
+
+# one client (and connection pool) for the whole worker run
+_CLIENT  = MongoClient(MONGO_URI, maxPoolSize=16, connect=False)
+_REQ_COL = _CLIENT[DB_NAME][REQUESTS]
+atexit.register(_CLIENT.close)
 
 def connect_requests():
-    client = MongoClient(MONGO_URI)
-    return client[DB_NAME][REQUESTS]
+    return _REQ_COL
 
-def run_or_die(cmd, cwd=None):
-    """Run a shell command; raise if it fails."""
+def start(cmd, cwd=None):
+    """Start a shell command without waiting for it; returns the Popen."""
     print(f">>> {' '.join(cmd)}")
-    r = subprocess.run(cmd, cwd=cwd)
-    if r.returncode != 0:
-        raise RuntimeError(f"Command failed: {' '.join(cmd)}")
+    return subprocess.Popen(cmd, cwd=cwd)
+
+def wait_or_die(*procs):
+    """Wait for all started commands; raise if any of them failed."""
+    failed = [p for p in procs if p.wait() != 0]
+    if failed:
+        raise RuntimeError("Command failed: " +
+                           "; ".join(' '.join(p.args) for p in failed))
+
+def run_alongside(func, *procs):
+    """Run func in this process while the started commands run; then wait
+    for the commands and raise if any of them (or func) failed."""
+    try:
+        func()
+    finally:
+        wait_or_die(*procs)
 
 def process_request(req):
     year = req["year"]
     print(f"=== Processing year {year} ===")
-    # 1) run the STE selenium scraper
-    run_or_die(["python", STE_SCRAPER, year])
-
-    # 2) run the Areios Pagos scrapy crawler
-    run_or_die(["scrapy", "crawl", "CyLaw", "-a", f"year={year}"], cwd=AREIOS_SCRAPY_DIR)
-
-    # 3) build XMLs from text for Council of State
-    run_or_die(["python", COUNCIL_XML, "-year", year])
+    # 1+2) run the STE selenium scraper (in-process) and the Areios Pagos
+    #      scrapy crawler side by side (different sites, no shared output)
+    if os.path.dirname(STE_SCRAPER) not in sys.path:
+        sys.path.insert(0, os.path.dirname(STE_SCRAPER))
+    import scrapper
+    run_alongside(
+        lambda: scrapper.main(year),
+        start(["scrapy", "crawl", "CyLaw", "-a", f"year={year}"], cwd=AREIOS_SCRAPY_DIR),
+    )
 
-    # 4) build XMLs from text for Areios Pagos
-    run_or_die(["python", AREIOS_XML, "-year", year])
+    # 3+4) build XMLs from text for Council of State (in-process) and Areios
+    #      Pagos (disjoint input/output folders)
+    import createCouncilOfStateJudgmentsAkn
+    run_alongside(
+        lambda: createCouncilOfStateJudgmentsAkn.main(year, mp_context=_SPAWN),
+        start(["python", AREIOS_XML, "-year", year]),
+    )
 
-    # 5) ingest all XMLs into Mongo
-    run_or_die(["python", INGESTION_SCRIPT])
+    # 5) ingest all XMLs into Mongo, over the worker's client
+    import insertToDb
+    print(">>> insertToDb.insert_all_judgments()")
+    insertToDb.insert_all_judgments(_CLIENT[insertToDb.DB_NAME][insertToDb.COLLECTION_NAME],
+                                    mp_context=_SPAWN)
 
     # 6) mark this request as done
     col = connect_requests()
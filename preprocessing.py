@@ -58,6 +58,17 @@ parser.add_argument("-year", help=year_help)
 parser.add_argument(
     "-fn", metavar="FILENAME", help="choose a specific file for pre-processing"
 )
+parser.add_argument(
+    "--verbose-pause",
+    action="store_true",
+    help="pause for a second before each pre-processing stage",
+)
+parser.add_argument(
+    "--workers",
+    type=int,
+    default=os.cpu_count(),
+    help="parallel workers per stage (default: all CPUs)",
+)
 
 args = parser.parse_args()
 
@@ -87,71 +98,86 @@ if __name__ == "__main__":
     if args.year is not None and args.legal_authority != NSK:
         dest_path = os.path.join(dest_path, args.year)
 
+    # optional one second pause between stages (off by default)
+    PAUSE = 1 if args.verbose_pause else 0
+
     # create the top‑level dest directory (and any subdirs) if needed
     os.makedirs(dest_path, exist_ok=True)
 
     if args.legal_authority == AREIOS_PAGOS:
         print("Start cleaning data...")
-        time.sleep(1)
-        clean_areios_pagos_text(source_path, dest_path, file_pattern)
+        if PAUSE:
+            time.sleep(PAUSE)
+        clean_areios_pagos_text(source_path, dest_path, file_pattern, workers=args.workers)
 
         print("Creating latin names for file(s)...")
-        time.sleep(1)
-        GrToLat(dest_path)
+        if PAUSE:
+            time.sleep(PAUSE)
+        GrToLat(dest_path, workers=args.workers)
 
         print("Start searching for summaries...")
-        time.sleep(1)
+        if PAUSE:
+            time.sleep(PAUSE)
         delete_summaries(dest_path)
 
     elif args.legal_authority == STE:
         print("Start cleaning data...")
-        time.sleep(1)
-        clean_ste_text(source_path, dest_path, file_pattern)
+        if PAUSE:
+            time.sleep(PAUSE)
+        clean_ste_text(source_path, dest_path, file_pattern, workers=args.workers)
 
         print("Creating latin names for file(s)...")
-        time.sleep(1)
-        GrToLat(dest_path)
+        if PAUSE:
+            time.sleep(PAUSE)
+        GrToLat(dest_path, workers=args.workers)
 
         # metadata folder sits alongside STE
         meta_dest = dest_path.replace(STE, STE_METADATA)
         os.makedirs(meta_dest, exist_ok=True)
         print("Creating latin names for metadata file(s)...")
-        time.sleep(1)
-        GrToLat(meta_dest)
+        if PAUSE:
+            time.sleep(PAUSE)
+        GrToLat(meta_dest, workers=args.workers)
 
         print("Start searching for summaries...")
-        time.sleep(1)
+        if PAUSE:
+            time.sleep(PAUSE)
         delete_summaries(dest_path, meta_dest)
 
     else:  # NSK
         # PDF → text
         print("Converting PDF file(s) to text...")
-        time.sleep(1)
+        if PAUSE:
+            time.sleep(PAUSE)
         tmp_dest = dest_path.replace(NSK, NSK_TMP)
         os.makedirs(tmp_dest, exist_ok=True)
-        pdf_to_text(source_path, tmp_dest, file_pattern.replace(TXT_EXT, PDF_EXT))
+        pdf_to_text(source_path, tmp_dest, file_pattern.replace(TXT_EXT, PDF_EXT), workers=args.workers)
 
         # clean NSK text
         print("Start cleaning data...")
-        time.sleep(1)
-        clean_nsk_text(tmp_dest, dest_path, file_pattern)
+        if PAUSE:
+            time.sleep(PAUSE)
+        clean_nsk_text(tmp_dest, dest_path, file_pattern, workers=args.workers)
 
         # copy metadata files
         print("Copying metadata file(s) to dest...")
-        time.sleep(1)
+        if PAUSE:
+            time.sleep(PAUSE)
         meta_nsk_dest = dest_path.replace(NSK, NSK_METADATA)
         os.makedirs(meta_nsk_dest, exist_ok=True)
-        copy_files(source_path, meta_nsk_dest, file_pattern)
+        copy_files(source_path, meta_nsk_dest, file_pattern, workers=args.workers)
 
         # create latin names
         print("Creating latin names for file(s)...")
-        time.sleep(1)
-        GrToLat(tmp_dest)
-        GrToLat(dest_path)
+        if PAUSE:
+            time.sleep(PAUSE)
+        GrToLat(tmp_dest, workers=args.workers)
+        GrToLat(dest_path, workers=args.workers)
 
         print("Creating latin names for metadata file(s)...")
-        time.sleep(1)
-        GrToLat(meta_nsk_dest)
+        if PAUSE:
+            time.sleep(PAUSE)
+        GrToLat(meta_nsk_dest, workers=args.workers)
 
         print("\n")
         print(
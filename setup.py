@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""Optional Cython build of the generated ANTLR lexers/parsers.
+
+The transformation scripts import the generated modules from
+grammars/gen as usual. When the extensions below are built in place
+the compiled .so files shadow the .py sources, otherwise the pure
+Python modules are used unchanged.
+
+If the C++ sources of speedy-antlr-tool have been generated in
+grammars/gen/cpp_src/<grammar> (see grammars/speedy.py) and ANTLR4_CPP_RUNTIME points to the ANTLR C++
+runtime sources (tested with 4.7.2), the C++ parser extensions used by
+grammars/speedy.py are built as well.
+
+Usage:
+    python setup.py build_ext --inplace
+"""
+import os
+from glob import glob
+
+from setuptools import setup, Extension
+from Cython.Build import cythonize
+
+GENERATED_GRAMMARS = [
+    "grammars/gen/SupremeCourtLexer.py",
+    "grammars/gen/SupremeCourtParser.py",
+    "grammars/gen/CouncilOfStateLexer.py",
+    "grammars/gen/CouncilOfStateParser.py",
+    "grammars/gen/Legal_refLexer.py",
+    "grammars/gen/Legal_refParser.py",
+]
+
+CPP_SRC = "grammars/gen/cpp_src"
+ANTLR4_CPP_RUNTIME = os.environ.get("ANTLR4_CPP_RUNTIME")
+
+cpp_extensions = []
+if ANTLR4_CPP_RUNTIME:
+    runtime_src = os.path.join(ANTLR4_CPP_RUNTIME, "src")
+    runtime_sources = glob(os.path.join(runtime_src, "**", "*.cpp"), recursive=True)
+    for grammar in ("legal_ref", "supremecourt"):
+        grammar_src = os.path.join(CPP_SRC, grammar)
+        if not os.path.isdir(grammar_src):
+            continue
+        cpp_extensions.append(Extension(
+            name="grammars.gen.sa_%s_cpp_parser" % grammar,
+            sources=glob(os.path.join(grammar_src, "*.cpp")) + runtime_sources,
+            include_dirs=[grammar_src, runtime_src] + glob(os.path.join(runtime_src, "*/")),
+            extra_compile_args=["-std=c++11"],
+        ))
+
+setup(
+    name="judgments2AKN-grammars",
+    ext_modules=cpp_extensions + cythonize(
+        GENERATED_GRAMMARS,
+        language_level=3,
+        compiler_directives={
+            "boundscheck": False,
+            "wraparound": False,
+            "cdivision": True,
+        },
+    ),
+    zip_safe=False,
+)
@@ -1,21 +1,25 @@
 # steAknCliLegacyFast.py
 # -*- coding: utf-8 -*-
 from __future__ import print_function
-import os, re, datetime, fnmatch, time, argparse, traceback, logging, unicodedata
+import os, datetime, time, argparse, traceback, logging, unicodedata
 
-from concurrent.futures import ProcessPoolExecutor, as_completed
-from antlr4 import FileStream, CommonTokenStream, InputStream, ParseTreeWalker
+from concurrent.futures import ProcessPoolExecutor
+from antlr4 import CommonTokenStream, InputStream, ParseTreeWalker
 from antlr4.error.ErrorListener import ErrorListener
+from antlr4.dfa.DFA import DFA
+from antlr4.PredictionContext import PredictionContextCache
+from antlr4.atn.LexerATNSimulator import LexerATNSimulator
+from antlr4.atn.ParserATNSimulator import ParserATNSimulator
 from lxml import etree
 
 from AknJudgementClass import AknJudgementXML
 from AknLegalReferencesClass import AknLegalReferences
-from functions import validateXML, findDatesOfInterest, setupLogger, fixStringXML
+from functions import validateXMLTree, loadXMLSchema, findDatesOfInterest, setupLogger, fixStringXML, iter_files
 from variables import (
     LEGAL_TEXTS, STE, LOGS, XML, NER, STE_METADATA,
     TXT_EXT, XML_EXT,
-    publicHearingDatePattern, courtConferenceDatePattern,
-    decisionPublicationDatePattern, paragraphPattern
+    publicHearingDateRegex, courtConferenceDateRegex,
+    decisionPublicationDateRegex, paragraphRegex
 )
 from grammars.gen.CouncilOfStateLexer import CouncilOfStateLexer
 from grammars.gen.CouncilOfStateParser import CouncilOfStateParser
@@ -27,62 +31,107 @@ class SilentErrorListener(ErrorListener):
     def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
         pass
 
-# ---------- Globals per worker (precompiled) ----------
-REGEXES, XPATHS = {}, {}
-
-def init_worker():
-    global REGEXES, XPATHS
-    REGEXES = {
-        'public': re.compile(publicHearingDatePattern),
-        'conf':   re.compile(courtConferenceDatePattern),
-        'pub':    re.compile(decisionPublicationDatePattern),
-        'para':   re.compile(paragraphPattern),
-    }
-    XPATHS = {
-        'hdr':    etree.XPath("/akomaNtoso/judgment/header"),
-        'intro':  etree.XPath("/akomaNtoso/judgment/judgmentBody/introduction"),
-        'concl':  etree.XPath("/akomaNtoso/judgment/conclusions"),
-        'wf':     etree.XPath("/akomaNtoso/judgment/meta/workflow"),
-        'frbrW':  etree.XPath("/akomaNtoso/judgment/meta/identification/FRBRWork/FRBRdate"),
-        'frbrE':  etree.XPath("/akomaNtoso/judgment/meta/identification/FRBRExpression/FRBRdate"),
-        'refsInMeta': etree.XPath("/akomaNtoso/judgment/meta/references"),
-    }
-
-def safe_to_str(data):
-    if isinstance(data, bytes): return data.decode('utf-8')
-    if isinstance(data, str):   return data
-    raise TypeError("Unexpected type: {}".format(type(data)))
+# ---------- Globals (precompiled) ----------
+# τα compiled patterns του variables.py (compile μία φορά στο import)
+REGEXES = {
+    'public': publicHearingDateRegex,
+    'conf':   courtConferenceDateRegex,
+    'pub':    decisionPublicationDateRegex,
+    'para':   paragraphRegex,
+}
+
+# lexer/parser ανά grammar, ένα ζευγάρι ανά worker (όπως στο
+# createCouncilOfStateJudgmentsAkn.get_parser) και μηδενισμός των DFA caches
+# κάθε DFA_REFRESH_EVERY αρχεία ώστε να μη μεγαλώνει απεριόριστα η μνήμη
+_RECOGNIZERS = {}
+DFA_REFRESH_EVERY = 200
+_FILES_DONE = 0
+
+def get_parser(lexerCls, parserCls, input_stream):
+    cached = _RECOGNIZERS.get(parserCls)
+    if cached is None:
+        lexer = lexerCls(input_stream)
+        parser = parserCls(CommonTokenStream(lexer))
+        silent = SilentErrorListener()
+        lexer.removeErrorListeners(); parser.removeErrorListeners()
+        lexer.addErrorListener(silent); parser.addErrorListener(silent)
+        _RECOGNIZERS[parserCls] = (lexer, parser)
+        return parser
+    lexer, parser = cached
+    lexer.inputStream = input_stream
+    parser.setTokenStream(CommonTokenStream(lexer))
+    return parser
+
+def _fresh_dfa(recognizer):
+    # in place: το class-level decisionsToDFA μοιράζεται από όλα τα instances
+    recognizer.decisionsToDFA[:] = [DFA(ds, i) for i, ds in enumerate(recognizer.atn.decisionToState)]
+    return recognizer.decisionsToDFA
+
+def refresh_dfa():
+    for lexer, parser in _RECOGNIZERS.values():
+        lexer._interp = LexerATNSimulator(lexer, lexer.atn, _fresh_dfa(lexer), PredictionContextCache())
+        parser._interp = ParserATNSimulator(parser, parser.atn, _fresh_dfa(parser), PredictionContextCache())
+
+# base φάκελοι (cwd του main process), ορίζονται μία φορά ανά worker
+_BASE_TEXTS_ROOT = _LOGS_BASE = _XML_BASE = _NER_BASE = _STE_META_BASE = None
+
+def init_worker(cwd=None):
+    global _BASE_TEXTS_ROOT, _LOGS_BASE, _XML_BASE, _NER_BASE, _STE_META_BASE
+    cwd = cwd or os.getcwd()
+    _BASE_TEXTS_ROOT = os.path.join(cwd, LEGAL_TEXTS)
+    _LOGS_BASE       = os.path.join(cwd, LOGS)
+    _XML_BASE        = os.path.join(cwd, XML)
+    _NER_BASE        = os.path.join(cwd, NER)
+    _STE_META_BASE   = os.path.join(cwd, STE_METADATA)
+    # το XSD γίνεται parse/compile μία φορά ανά worker (lru_cache)
+    loadXMLSchema('akomantoso30.xsd')
+    # ένα μικρό parse ανά grammar: ATN deserialization και DFA ζεστά πριν το
+    # πρώτο πραγματικό αρχείο
+    warm = 'Αριθμός 1/2020 ΤΟ ΣΥΜΒΟΥΛΙΟ ΤΗΣ ΕΠΙΚΡΑΤΕΙΑΣ'
+    get_parser(Legal_refLexer, Legal_refParser, InputStream(warm)).legal_text()
+    get_parser(CouncilOfStateLexer, CouncilOfStateParser, InputStream(warm)).judgment()
+
+def _strip_marks(ch):
+    return ''.join(c for c in unicodedata.normalize('NFD', ch) if unicodedata.category(c) != 'Mn')
+
+# τονούμενα/διαλυτικά -> βασικό γράμμα και διαγραφή των combining marks για
+# όλο το BMP (~50ms στο import): ίδιο αποτέλεσμα με NFD + φιλτράρισμα Mn,
+# αλλά με ένα str.translate (C loop) ανά γραμμή
+_GR_TRANS = str.maketrans({
+    chr(cp): _strip_marks(chr(cp))
+    for cp in range(0x10000)
+    if not 0xD800 <= cp <= 0xDFFF and _strip_marks(chr(cp)) != chr(cp)
+})
 
 def normalize_gr(s):
-    s = s.strip().lower()
-    s = unicodedata.normalize('NFD', s)
-    return ''.join(ch for ch in s if unicodedata.category(ch) != 'Mn')
-
-def find_index(lines, predicate):
-    for i, ln in enumerate(lines):
-        if predicate(ln): return i
-    return -1
+    return s.strip().lower().translate(_GR_TRANS)
 
 # ---------- Dates helper ----------
-def add_date(node, regex, name, wf_node, refs_node, frbrW, frbrE, author):
-    res = findDatesOfInterest(node, regex, name, author)
-    if not res: return
-    _, step, tlc = res
-    wf_node.insert(0, step)
-    if refs_node is not None: refs_node.append(tlc)
-    frbrW.set('date', step.get('date')); frbrW.set('name', name)
-    frbrE.set('date', step.get('date')); frbrE.set('name', name)
+def add_dates(node, specs, wf_node, refs_node, frbrW, frbrE, author):
+    # το κείμενο του node μαζεύεται μία φορά: αν ένα regex δεν ταιριάζει ούτε
+    # στο ενωμένο κείμενο, δεν ταιριάζει σε κανένα child, οπότε παραλείπεται το
+    # findDatesOfInterest (που κάνει serialize κάθε child ξεχωριστά)
+    text_all = ''.join(node.itertext())
+    for regex, name in specs:
+        if not regex.search(text_all): continue
+        res = findDatesOfInterest(node, regex, name, author)
+        if not res: continue
+        _, step, tlc = res
+        wf_node.insert(0, step)
+        if refs_node is not None: refs_node.append(tlc)
+        frbrW.set('date', step.get('date')); frbrW.set('name', name)
+        frbrE.set('date', step.get('date')); frbrE.set('name', name)
 
 # ---------- Core processing ----------
 def process_one(task):
+    global _FILES_DONE
     root, name = task
     start_time = time.perf_counter()
 
-    base_texts_root = os.path.join(os.getcwd(), LEGAL_TEXTS)
-    logs_path = root.replace(base_texts_root, os.path.join(os.getcwd(), LOGS))
-    xml_path  = root.replace(base_texts_root, os.path.join(os.getcwd(), XML))
-    ner_path  = root.replace(base_texts_root, os.path.join(os.getcwd(), NER))
-    ste_meta_path = root.replace(base_texts_root, os.path.join(os.getcwd(), STE_METADATA))
+    logs_path = root.replace(_BASE_TEXTS_ROOT, _LOGS_BASE, 1)
+    xml_path  = root.replace(_BASE_TEXTS_ROOT, _XML_BASE, 1)
+    ner_path  = root.replace(_BASE_TEXTS_ROOT, _NER_BASE, 1)
+    ste_meta_path = root.replace(_BASE_TEXTS_ROOT, _STE_META_BASE, 1)
 
     os.makedirs(logs_path, exist_ok=True)
     os.makedirs(xml_path,  exist_ok=True)
@@ -125,12 +174,19 @@ def process_one(task):
             })
 
         # ─── READ RAW TEXT ────────────────────────────────────────────
-        raw_lines = open(txt_file, encoding='utf-8').read().splitlines()
-        raw_norm  = [normalize_gr(ln) for ln in raw_lines]
-        raw_text  = "\n".join(raw_lines)
-
-        idx_num = find_index(raw_norm, lambda ln: ln.startswith('αριθμος') or ln.startswith('αριθμ.'))
-        intro_idx = find_index(raw_norm, lambda ln: ln.startswith('για να δικ'))
+        # ένα read/decode: το ίδιο κείμενο τροφοδοτεί και τον Legal_ref lexer
+        # (binary read όπως το FileStream, χωρίς μετατροπή των \r\n)
+        with open(txt_file, 'rb') as fin:
+            data = fin.read().decode('utf-8')
+        raw_lines = data.splitlines()
+
+        # ένα πέρασμα για τις δύο γραμμές-ορόσημα, σταματά μόλις βρεθούν και οι δύο
+        idx_num = intro_idx = -1
+        for i, ln in enumerate(raw_lines):
+            n = normalize_gr(ln)
+            if idx_num == -1 and n.startswith(('αριθμος', 'αριθμ.')): idx_num = i
+            if intro_idx == -1 and n.startswith('για να δικ'): intro_idx = i
+            if idx_num != -1 and intro_idx != -1: break
 
         can_override_header = (idx_num != -1)
         can_override_intro  = (intro_idx != -1)
@@ -155,7 +211,7 @@ def process_one(task):
                 j = hd_start
                 while j < len(raw_lines) and raw_lines[j].strip(): j += 1
                 hdr_slice = raw_lines[hd_start:j]
-            headerDetails = " ".join(ln.strip() for ln in hdr_slice if ln.strip())
+            headerDetails = " ".join(st for ln in hdr_slice if (st := ln.strip()))
 
         if can_override_intro:
             introduction_block = "\n\n".join(raw_lines[intro_idx:]).strip()
@@ -178,11 +234,7 @@ def process_one(task):
         # ─── LEGAL REFERENCES (1ο πέρασμα) — with silent listeners & safe fallback ──
         answer = None
         try:
-            l1 = Legal_refLexer(FileStream(txt_file, encoding='utf-8'))
-            p1 = Legal_refParser(CommonTokenStream(l1))
-            silent = SilentErrorListener()
-            l1.removeErrorListeners(); p1.removeErrorListeners()
-            l1.addErrorListener(silent); p1.addErrorListener(silent)
+            p1 = get_parser(Legal_refLexer, Legal_refParser, InputStream(data))
             tree1 = p1.legal_text()
             answer = AknLegalReferences().visit(tree1)
         except Exception:
@@ -190,15 +242,11 @@ def process_one(task):
 
         # Fallback: αν το visit δεν επέστρεψε string ή είναι κενό, δώσε στον 2ο parser το raw text
         if not isinstance(answer, str) or not answer.strip():
-            answer = raw_text
+            # (το "\n".join γίνεται μόνο εδώ, όχι για κάθε αρχείο)
+            answer = "\n".join(raw_lines)
 
         # ─── STRUCTURE PARSING (2ο πέρασμα) — silent listeners ─────────
-        l2 = CouncilOfStateLexer(InputStream(answer))
-        p2 = CouncilOfStateParser(CommonTokenStream(l2))
-        silent2 = SilentErrorListener()
-        l2.removeErrorListeners(); p2.removeErrorListeners()
-        l2.addErrorListener(silent2); p2.addErrorListener(silent2)
-
+        p2 = get_parser(CouncilOfStateLexer, CouncilOfStateParser, InputStream(answer))
         tree2 = p2.judgment()
         walker = ParseTreeWalker()
         walker.walk(judgmentObj, tree2)
@@ -208,59 +256,69 @@ def process_one(task):
 
         # ─── Build Akoma Ntoso root ────────────────────────────────────
         ak = judgmentObj.createAkomaNtosoRoot()
-        judgmentObj.text = fixStringXML(judgmentObj.text, REGEXES['para'])
+        # το paragraphPattern είναι το literal '</p><p>': χωρίς αυτό δεν υπάρχει
+        # τίποτα να διορθωθεί και παραλείπεται το DOTALL findall των <ref>
+        if '</p><p>' in judgmentObj.text:
+            judgmentObj.text = fixStringXML(judgmentObj.text, REGEXES['para'])
         judgmentElem = judgmentObj.XML()
         ak.insert(0, judgmentElem)
         jud_node = ak.find('judgment'); jud_node.insert(0, metaElem)
+        # απευθείας πλοήγηση από το judgment αντί για απόλυτα XPath
+        hdr_node = jud_node.find('header')
 
         # ─── OVERRIDE HEADER / INTRO (μόνο αν βρέθηκαν markers) ────────
         if can_override_header:
-            hdr_nodes = XPATHS['hdr'](ak)
-            if hdr_nodes:
-                hdr_node = hdr_nodes[0]
-                for c in list(hdr_node): hdr_node.remove(c)
-                p1 = etree.SubElement(hdr_node, 'p'); etree.SubElement(p1, 'docNumber').text = docNumber
-                p2 = etree.SubElement(hdr_node, 'p'); etree.SubElement(p2, 'docProponent').text = docProponent
-                p3 = etree.SubElement(hdr_node, 'p'); p3.text = subDepartment
-                if headerDetails: etree.SubElement(hdr_node, 'p').text = headerDetails
+            if hdr_node is not None:
+                # τα νέα <p> χτίζονται εκτός δέντρου και μπαίνουν με ένα extend
+                p1 = etree.Element('p'); etree.SubElement(p1, 'docNumber').text = docNumber
+                p2 = etree.Element('p'); etree.SubElement(p2, 'docProponent').text = docProponent
+                p3 = etree.Element('p'); p3.text = subDepartment
+                hdr_ps = [p1, p2, p3]
+                if headerDetails:
+                    p4 = etree.Element('p'); p4.text = headerDetails
+                    hdr_ps.append(p4)
+                del hdr_node[:]
+                hdr_node.extend(hdr_ps)
         else:
             logger.warning("Header override skipped (no 'Αριθμός' line) for {}".format(name))
 
         if can_override_intro:
-            intro_nodes = XPATHS['intro'](ak)
-            if intro_nodes:
-                intro_node = intro_nodes[0]
-                for c in list(intro_node): intro_node.remove(c)
-                for para in [p for p in introduction_block.split('\n\n') if p]:
-                    etree.SubElement(intro_node, 'p').text = para.strip()
+            intro_node = jud_node.find('judgmentBody/introduction')
+            if intro_node is not None:
+                intro_ps = []
+                for para in filter(None, introduction_block.split('\n\n')):
+                    p = etree.Element('p'); p.text = para.strip()
+                    intro_ps.append(p)
+                del intro_node[:]
+                intro_node.extend(intro_ps)
         else:
             logger.warning("Introduction override skipped (no 'Για να δικάσει' line) for {}".format(name))
 
         # ─── DATES OF INTEREST ─────────────────────────────────────────
-        wf_node   = XPATHS['wf'](ak)[0]
-        refs_meta_nodes = XPATHS['refsInMeta'](ak)
-        refs_node = refs_meta_nodes[0] if refs_meta_nodes else None
-        frbrW     = XPATHS['frbrW'](ak)[0]
-        frbrE     = XPATHS['frbrE'](ak)[0]
-
-        hdr_nodes = XPATHS['hdr'](ak)
-        if hdr_nodes:
-            add_date(hdr_nodes[0], REGEXES['public'], 'publicHearingDate', wf_node, refs_node, frbrW, frbrE, meta['author'])
-
-        concl_nodes = XPATHS['concl'](ak)
-        if concl_nodes:
-            concl_node = concl_nodes[0]
-            add_date(concl_node, REGEXES['conf'], 'courtConferenceDate', wf_node, refs_node, frbrW, frbrE, meta['author'])
-            add_date(concl_node, REGEXES['pub'],  'decisionPublicationDate', wf_node, refs_node, frbrW, frbrE, meta['author'])
-
-        # ─── SERIALIZE & VALIDATE (ίδια bytes) ─────────────────────────
+        meta_node = jud_node.find('meta')
+        ident     = meta_node.find('identification')
+        wf_node   = meta_node.find('workflow')
+        refs_node = meta_node.find('references')
+        frbrW     = ident.find('FRBRWork/FRBRdate')
+        frbrE     = ident.find('FRBRExpression/FRBRdate')
+
+        if hdr_node is not None:
+            add_dates(hdr_node, ((REGEXES['public'], 'publicHearingDate'),),
+                      wf_node, refs_node, frbrW, frbrE, meta['author'])
+
+        concl_node = jud_node.find('conclusions')
+        if concl_node is not None:
+            add_dates(concl_node, ((REGEXES['conf'], 'courtConferenceDate'),
+                                   (REGEXES['pub'],  'decisionPublicationDate')),
+                      wf_node, refs_node, frbrW, frbrE, meta['author'])
+
+        # ─── SERIALIZE & VALIDATE ──────────────────────────────────────
         tree = etree.ElementTree(ak)
-        xml_bytes = etree.tostring(tree, pretty_print=True, encoding='UTF-8', xml_declaration=True)
-        xml_str = safe_to_str(xml_bytes).replace('&gt;', '>')
-        with open(xml_file, 'w', encoding='utf-8') as fout:
-            fout.write(xml_str)
+        with open(xml_file, 'wb') as fout:
+            tree.write(fout, pretty_print=True, encoding='UTF-8', xml_declaration=True)
 
-        validateXML('akomantoso30.xsd', xml_file, log_file)
+        # validation του δέντρου στη μνήμη, χωρίς re-parse του αρχείου
+        validateXMLTree(loadXMLSchema('akomantoso30.xsd'), tree, log_file)
         logger.info("Wrote XML → {}".format(xml_file))
         status = 'ok'
 
@@ -274,20 +332,25 @@ def process_one(task):
     finally:
         elapsed = round(time.perf_counter() - start_time, 2)
         logger.info("Finished {} in {}s".format(name, elapsed))
+        _FILES_DONE += 1
+        if _FILES_DONE % DFA_REFRESH_EVERY == 0:
+            refresh_dfa()
 
     return (name, status, elapsed)
 
 # ---------- Task enumeration ----------
 def enumerate_tasks(source_base, file_pattern):
-    for root, _, files in os.walk(source_base):
-        base_texts_root = os.path.join(os.getcwd(), LEGAL_TEXTS)
-        logs_path = root.replace(base_texts_root, os.path.join(os.getcwd(), LOGS))
-        xml_path  = root.replace(base_texts_root, os.path.join(os.getcwd(), XML))
-        os.makedirs(logs_path, exist_ok=True)
-        os.makedirs(xml_path,  exist_ok=True)
-        for name in files:
-            if fnmatch.fnmatch(name, file_pattern):
-                yield (root, name)
+    # os.scandir walk με pattern compiled μία φορά (functions.iter_files)
+    cwd = os.getcwd()
+    base_texts_root = os.path.join(cwd, LEGAL_TEXTS)
+    logs_base, xml_base = os.path.join(cwd, LOGS), os.path.join(cwd, XML)
+    seen_roots = set()
+    for root, name in iter_files(source_base, file_pattern):
+        if root not in seen_roots:
+            seen_roots.add(root)
+            os.makedirs(root.replace(base_texts_root, logs_base), exist_ok=True)
+            os.makedirs(root.replace(base_texts_root, xml_base),  exist_ok=True)
+        yield (root, name)
 
 # ---------- main ----------
 def main():
@@ -313,14 +376,15 @@ def main():
         return
 
     t0 = time.perf_counter()
-    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker) as ex:
-        futs = [ex.submit(process_one, t) for t in tasks]
+    # tasks σε chunks ανά worker αντί για ένα future (και ένα IPC round-trip) ανά αρχείο
+    chunksize = max(1, len(tasks) // (args.workers * 8))
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker,
+                             initargs=(os.getcwd(),)) as ex:
         done = ok = 0
-        for fut in as_completed(futs):
-            name, status, dur = fut.result()
+        for name, status, dur in ex.map(process_one, tasks, chunksize=chunksize):
             done += 1; ok += 1 if status == 'ok' else 0
             if (done % 50 == 0) or (status != 'ok'):
-                print("[{}/{}] {}: {} ({}s)".format(done, len(futs), name, status, dur))
+                print("[{}/{}] {}: {} ({}s)".format(done, len(tasks), name, status, dur))
 
     total = round(time.perf_counter() - t0, 2)
     print("All done in {}s. Files: {}. Workers: {}. OK: {}."
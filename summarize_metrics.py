@@ -7,13 +7,25 @@ Usage:
   python summarize_metrics.py --courts ste areios_pagos --years 2024 2018 \
                               [--root .] [--logs logs] [--reportdir reports]
 
-No external deps (standard library only).
+No external deps (standard library only); orjson and pyahocorasick are used if installed.
 """
 
-import argparse, json, re, statistics as stats
+import argparse, fnmatch, json, mmap, os, re, statistics as stats
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
+try:
+    from orjson import loads as json_loads   # C parser, several times faster
+except ImportError:
+    json_loads = json.loads
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 def glob_bytes(paths):
     total = 0
     for p in paths:
@@ -22,15 +34,64 @@ def glob_bytes(paths):
     return total
 
 def list_files(d: Path, pattern: str):
-    if not d.exists(): return []
-    return sorted(d.glob(pattern))
+    """
+    Sorted (Path, size, mtime) of the files in d matching pattern (like
+    d.glob(pattern), directories skipped). Each file is stat'ed once, through
+    the os.scandir entry, so callers need no further exists()/stat() calls.
+    """
+    out = []
+    try:
+        with os.scandir(d) as it:
+            for e in it:
+                if not fnmatch.fnmatch(e.name, pattern):
+                    continue
+                try:
+                    if not e.is_file(): continue
+                    st = e.stat()
+                except OSError: continue
+                out.append((Path(e.path), st.st_size, st.st_mtime))
+    except OSError: return []
+    out.sort()
+    return out
+
+def mean_size(files):
+    """Running mean of the sizes of list_files() tuples (0 for none)."""
+    n = total = 0
+    for _, size, _ in files:
+        n += 1; total += size
+    return total / n if n else 0
 
 def to_kb(b): return round(b / 1024.0, 1)
 
+def median_sorted(data):
+    """statistics.median of an already sorted list."""
+    n = len(data); i = n // 2
+    return data[i] if n % 2 else (data[i - 1] + data[i]) / 2
+
+def p95_sorted(data):
+    """statistics.quantiles(data, n=100)[94] (default 'exclusive' method)
+    of an already sorted list, without re-sorting or the other 98 cut points."""
+    ld = len(data); m = ld + 1
+    j = 95 * m // 100
+    j = 1 if j < 1 else ld - 1 if j > ld - 1 else j
+    delta = 95 * m - j * 100
+    return (data[j - 1] * (100 - delta) + data[j] * delta) / 100
+
 def percent(n, d):
     try: return round(100.0 * n / d, 1)
     except: return 0.0
 
+# Each pattern is anchored at a line start with a lazy [^\n]*? prefix, so
+# finditer over the whole file yields exactly the first match of every line
+# (what re.search per line gave), without splitting/decoding the file.
+# Matches must stay on one line: [^\S\r\n] instead of \s, [^\r\n] instead of .
+_LOG_TIME_RX = tuple(re.compile(rb'^[^\n]*?' + p, re.I | re.M) for p in (
+    rb'(?:parse|parsing|AKN|xml)[^\r\n]*?(?:took|elapsed|duration)[^\S\r\n]*=?[^\S\r\n]*'
+    rb'(\d+(?:\.\d+)?)[^\S\r\n]*(ms|msec|s|sec)',
+    rb'elapsed_ms[^\S\r\n]*=[^\S\r\n]*(\d+)',
+    rb'duration_ms[^\S\r\n]*=[^\S\r\n]*(\d+)',
+))
+
 def parse_times_from_logs(logdir: Path):
     """
     Parse parsing durations from any *.log under logs/.
@@ -40,58 +101,107 @@ def parse_times_from_logs(logdir: Path):
     """
     times = []
     if not logdir.exists(): return times
-    rx = [
-        re.compile(r'(?:parse|parsing|AKN|xml).*?(?:took|elapsed|duration)\s*=?\s*(\d+(?:\.\d+)?)\s*(ms|msec|s|sec)', re.I),
-        re.compile(r'elapsed_ms\s*=\s*(\d+)', re.I),
-        re.compile(r'duration_ms\s*=\s*(\d+)', re.I),
-    ]
     for lf in logdir.glob('**/*.log'):
         try:
-            for line in lf.read_text(encoding='utf-8', errors='ignore').splitlines():
-                for r in rx:
-                    m = r.search(line)
-                    if not m: continue
-                    if len(m.groups()) == 2:
-                        v, unit = m.group(1), m.group(2).lower()
-                        val = float(v)
-                        if unit in ('s','sec'): val *= 1000.0
-                        times.append(val)
-                    else:
-                        times.append(float(m.group(1)))
+            with open(lf, 'rb') as f:
+                if not f.seek(0, 2): continue   # mmap of an empty file fails
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    for r in _LOG_TIME_RX:
+                        for m in r.finditer(mm):
+                            if r.groups == 2:
+                                val = float(m.group(1))
+                                if m.group(2).lower() in (b's', b'sec'): val *= 1000.0
+                                times.append(val)
+                            else:
+                                times.append(float(m.group(1)))
         except: pass
     return times
 
-def parse_error_counts(root: Path):
+def _classify_parse_error(msg):
+    if 'well' in msg and 'form' in msg: return 'wellformed'
+    elif 'schema' in msg or 'xsd' in msg or 'akn skeleton' in msg: return 'schema'
+    elif 'metadata' in msg or 'docnumber' in msg or 'date' in msg: return 'metadata'
+    elif 'parse' in msg: return 'parsing'
+    elif 'ingest' in msg or 'download' in msg: return 'ingest'
+    elif 'duplicate' in msg: return 'duplicates'
+    elif 'dead-letter' in msg: return 'deadletter'
+    elif 'invalid' in msg: return 'invalid'
+    elif 'warn' in msg: return 'warn'
+
+def _classify_export_error(msg):
+    if 'well' in msg and 'form' in msg: return 'wellformed'
+    elif 'schema' in msg or 'xsd' in msg: return 'schema'
+    elif 'metadata' in msg or 'title' in msg or 'issued' in msg: return 'metadata'
+    elif 'serialize' in msg or 'validation' in msg: return 'parsing'
+
+# Same priority order as the chains above: (category, alternatives), an
+# alternative matches when all of its keywords occur in the message.
+_PARSE_RULES = (
+    ('wellformed', (('well', 'form'),)),
+    ('schema',     (('schema',), ('xsd',), ('akn skeleton',))),
+    ('metadata',   (('metadata',), ('docnumber',), ('date',))),
+    ('parsing',    (('parse',),)),
+    ('ingest',     (('ingest',), ('download',))),
+    ('duplicates', (('duplicate',),)),
+    ('deadletter', (('dead-letter',),)),
+    ('invalid',    (('invalid',),)),
+    ('warn',       (('warn',),)),
+)
+_EXPORT_RULES = (
+    ('wellformed', (('well', 'form'),)),
+    ('schema',     (('schema',), ('xsd',))),
+    ('metadata',   (('metadata',), ('title',), ('issued',))),
+    ('parsing',    (('serialize',), ('validation',))),
+)
+
+def _automaton(rules):
+    """One Aho-Corasick automaton over all keywords of rules (None without pyahocorasick)."""
+    if ahocorasick is None: return None
+    A = ahocorasick.Automaton()
+    for _, alts in rules:
+        for alt in alts:
+            for kw in alt: A.add_word(kw, kw)
+    A.make_automaton()
+    return A
+
+_PARSE_AC, _EXPORT_AC = _automaton(_PARSE_RULES), _automaton(_EXPORT_RULES)
+
+def _classify_ac(A, rules, msg):
+    """Single pass over msg collecting the keywords found, then the first matching rule."""
+    hits = {kw for _, kw in A.iter(msg)}
+    if hits:
+        for cat, alts in rules:
+            if any(all(kw in hits for kw in alt) for alt in alts): return cat
+
+def _classify_one_json(path):
+    """Category of one *.parse-error.json / *.export-error.json (None if unknown/unreadable)."""
+    try:
+        j = json_loads(Path(path).read_bytes())
+        if path.endswith('.parse-error.json'):
+            msg = (j.get('error') or '').lower()
+            if _PARSE_AC is not None: return _classify_ac(_PARSE_AC, _PARSE_RULES, msg)
+            return _classify_parse_error(msg)
+        msg = " ".join(j.get('errors', [])).lower()
+        if _EXPORT_AC is not None: return _classify_ac(_EXPORT_AC, _EXPORT_RULES, msg)
+        return _classify_export_error(msg)
+    except: return None
+
+def parse_error_counts(root: Path, workers=None):
     """
     Count common error categories from *.parse-error.json and *.export-error.json.
     Keys produced: schema, wellformed, metadata, parsing, ingest, duplicates, deadletter, invalid, warn.
+    The JSON files are read/classified in worker processes (workers=1: serially).
     """
     cats = dict(schema=0, wellformed=0, metadata=0, parsing=0, ingest=0, duplicates=0, deadletter=0, invalid=0, warn=0)
     # scan JSON files that end with those suffixes
-    for jf in root.glob('**/*.parse-error.json'):
-        try:
-            j = json.loads(jf.read_text(encoding='utf-8'))
-            msg = (j.get('error') or '').lower()
-            if 'well' in msg and 'form' in msg: cats['wellformed'] += 1
-            elif 'schema' in msg or 'xsd' in msg or 'akn skeleton' in msg: cats['schema'] += 1
-            elif 'metadata' in msg or 'docnumber' in msg or 'date' in msg: cats['metadata'] += 1
-            elif 'parse' in msg: cats['parsing'] += 1
-            elif 'ingest' in msg or 'download' in msg: cats['ingest'] += 1
-            elif 'duplicate' in msg: cats['duplicates'] += 1
-            elif 'dead-letter' in msg: cats['deadletter'] += 1
-            elif 'invalid' in msg: cats['invalid'] += 1
-            elif 'warn' in msg: cats['warn'] += 1
-        except: pass
-    for jf in root.glob('**/*.export-error.json'):
-        try:
-            j = json.loads(jf.read_text(encoding='utf-8'))
-            msgs = " ".join(j.get('errors', []))
-            msg = msgs.lower()
-            if 'well' in msg and 'form' in msg: cats['wellformed'] += 1
-            elif 'schema' in msg or 'xsd' in msg: cats['schema'] += 1
-            elif 'metadata' in msg or 'title' in msg or 'issued' in msg: cats['metadata'] += 1
-            elif 'serialize' in msg or 'validation' in msg: cats['parsing'] += 1
-        except: pass
+    files = [str(jf) for pat in ('**/*.parse-error.json', '**/*.export-error.json')
+             for jf in root.glob(pat)]
+    if workers == 1 or len(files) < 2:
+        found = map(_classify_one_json, files)
+    else:
+        with ProcessPoolExecutor(workers) as ex:
+            found = list(ex.map(_classify_one_json, files, chunksize=64))
+    cats.update(Counter(c for c in found if c))
     return cats
 
 def load_batch_reports(root: Path):
@@ -133,20 +243,16 @@ def main():
 
     # Parse durations from logs
     times_ms = parse_times_from_logs(logs)
-    times_ms = [t for t in times_ms if t > 0]
+    times_ms = sorted(t for t in times_ms if t > 0)   # one sort for p50 and p95
     avg_ms = round(stats.mean(times_ms), 1) if times_ms else 0.0
-    p50_ms = round(stats.median(times_ms), 1) if times_ms else 0.0
-    p95_ms = round(stats.quantiles(times_ms, n=100)[94], 1) if len(times_ms) >= 20 else (avg_ms or 0.0)
-
-    # Sizes
-    xml_sizes = [f.stat().st_size for f in xml_files if f.exists()]
-    ttl_sizes = [f.stat().st_size for f in ttl_files if f.exists()]
-    jsonld_sizes = [f.stat().st_size for f in jsonld_files if f.exists()]
+    p50_ms = round(median_sorted(times_ms), 1) if times_ms else 0.0
+    p95_ms = round(p95_sorted(times_ms), 1) if len(times_ms) >= 20 else (avg_ms or 0.0)
 
-    avg_xml_kb = round(to_kb(stats.mean(xml_sizes)), 1) if xml_sizes else 0.0
-    p95_xml_kb = round(to_kb(stats.quantiles(xml_sizes, n=100)[94]), 1) if len(xml_sizes) >= 20 else avg_xml_kb
-    avg_ttl_kb = round(to_kb(stats.mean(ttl_sizes)), 1) if ttl_sizes else 0.0
-    avg_jsonld_kb = round(to_kb(stats.mean(jsonld_sizes)), 1) if jsonld_sizes else 0.0
+    # Sizes (already stat'ed by list_files); only the XML sizes are kept, for p95
+    avg_xml_kb = round(to_kb(mean_size(xml_files)), 1) if xml_files else 0.0
+    p95_xml_kb = round(to_kb(p95_sorted(sorted(size for _, size, _ in xml_files))), 1) if len(xml_files) >= 20 else avg_xml_kb
+    avg_ttl_kb = round(to_kb(mean_size(ttl_files)), 1) if ttl_files else 0.0
+    avg_jsonld_kb = round(to_kb(mean_size(jsonld_files)), 1) if jsonld_files else 0.0
 
     # Error categories
     cats = parse_error_counts(root)
@@ -155,7 +261,7 @@ def main():
     batches = load_batch_reports(root)
 
     # Time window (approx: use newest mtime among outputs)
-    mtimes = [f.stat().st_mtime for f in (xml_files + ttl_files + jsonld_files) if f.exists()]
+    mtimes = [mtime for files in (xml_files, ttl_files, jsonld_files) for _, _, mtime in files]
     if mtimes:
         end_ts = max(mtimes)
         start_ts = min(mtimes)
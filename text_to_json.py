@@ -18,11 +18,31 @@ What it does:
 import argparse
 import hashlib
 import json
+import mmap
+import os
 import re
+import sys
 import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
 from pathlib import Path
 from typing import Dict, Optional, Tuple
 
+try:
+    import orjson  # C serializer, produces UTF-8 bytes directly
+except ImportError:
+    orjson = None
+
+try:
+    import re2  # google-re2: linear-time automaton, no backtracking
+except ImportError:
+    re2 = None
+
+try:
+    import ahocorasick  # pyahocorasick: multi-keyword automaton
+except ImportError:
+    ahocorasick = None
+
 # -----------------------------
 # Utilities
 # -----------------------------
@@ -49,104 +69,292 @@ OUTCOME_VERBS = [
 ]
 
 def nfc(s: str) -> str:
-    return unicodedata.normalize("NFC", s)
+    # texts are normally stored in NFC already: a check pass, no rewrite
+    return s if unicodedata.is_normalized("NFC", s) else unicodedata.normalize("NFC", s)
 
 def sha256_text(s: str) -> str:
     return hashlib.sha256(s.encode("utf-8")).hexdigest()
 
+def read_text_file(path: Path) -> Tuple[str, Optional[str]]:
+    """
+    Decode a UTF-8 file (invalid bytes become U+FFFD) straight from an mmap of it,
+    without a bytes copy on the Python heap. Newlines are translated as in text mode
+    ("\r\n" and "\r" become "\n"). Also returns the sha256 of the file bytes, which
+    equals sha256_text(text) unless the text has U+FFFD or had a "\r" (then None).
+    """
+    with open(path, "rb") as f:
+        if not os.fstat(f.fileno()).st_size:  # empty files cannot be mmapped
+            return "", sha256_text("")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            text = str(mm, "utf-8", "replace")
+            # the file-bytes digest is the text's only without "\r" (checked on the mapped bytes)
+            if mm.find(b"\r") >= 0:
+                return text.replace("\r\n", "\n").replace("\r", "\n"), None
+            return text, (hashlib.sha256(mm).hexdigest() if "\ufffd" not in text else None)
+
+
+# Python re's \s and \d are Unicode-aware, RE2's are ASCII-only
+_RE2_CLASSES = ((r"\s", r"[\s\pZ\x1c-\x1f\x85]"), (r"\d", r"\p{Nd}"))
+
+def dfa_compile(pattern: str, ignore_case: bool = False):
+    """
+    Compile a document-scanning pattern with RE2 when installed, else with re.
+    Such patterns must stay RE2-compatible (no lookaround, no backreferences).
+    """
+    if re2 is None:
+        return re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+    for cls, repl in _RE2_CLASSES:
+        pattern = pattern.replace(cls, repl)
+    return re2.compile("(?i)" + pattern if ignore_case else pattern)
+
+def dump_json(path: Path, obj, indent: bool = False) -> None:
+    """
+    Write obj as UTF-8 JSON (orjson if available, same layout either way):
+    compact by default, indented by 2 spaces with indent=True.
+    """
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0))
+    elif indent:
+        path.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+    else:
+        path.write_text(json.dumps(obj, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+
+# Character filters for the few-char date tokens (cheaper than re.sub there)
+def _digits(s: str) -> str:
+    return "".join(c for c in s if c.isdecimal())  # same chars as \d
+
+def _word_chars(s: str) -> str:
+    return "".join(c for c in s if c.isalnum() or c == "_")  # same chars as \w
+
+@lru_cache(maxsize=64)
+def _month_key(month_token: str) -> str:
+    # only a couple of dozen distinct month tokens occur in the corpus
+    mkey = nfc(month_token).lower()
+    return _word_chars(mkey)  # strip punctuation
+
+@lru_cache(maxsize=1024)
 def to_iso_date(day: str, month_token: str, year: str) -> Optional[str]:
+    # cached: a corpus has a few hundred distinct (day, month, year) tokens
     try:
-        d = int(re.sub(r"[^\d]", "", day))  # "1η" -> 1, "31ης" -> 31
-        mkey = nfc(month_token).lower()
-        mkey = re.sub(r"[^\wάέήίόύώϊΐΰϋ]", "", mkey)  # strip punctuation
-        m = MONTHS.get(mkey)
+        d = int(_digits(day))  # "1η" -> 1, "31ης" -> 31
+        m = MONTHS.get(_month_key(month_token))
         if not m:
             return None
         return f"{int(year):04d}-{m}-{d:02d}"
     except Exception:
         return None
 
-def spaced_regex(phrase: str) -> re.Pattern:
+_LETTERS_RE = re.compile(r"[^\W\d_]+")
+
+def compact_text(text: str) -> str:
+    """
+    Letters only, lower-cased, final sigma folded: "Σ κ έ φ θ η κ ε" -> "σκέφθηκε".
+    Computed once per document; markers are then found with str.find.
+    """
+    return "".join(_LETTERS_RE.findall(text.lower())).replace("ς", "σ")
+
+def compact_marker(phrase: str) -> Tuple[str, re.Pattern]:
     """
-    Build a regex that matches the phrase allowing arbitrary non-letter chars between letters.
+    (compact phrase, regex) for a marker that may have arbitrary non-letter chars between its letters.
     Example: "Σκέφθηκε κατά τον Νόμο" -> matches "Σ κ έ φ θ η κ ε κ α τ ά τ ο ν Ν ό μ ο"
+    The regex is only used to map a compact hit back to its offset in the original text.
     """
-    chars = [re.escape(ch) for ch in phrase]
-    pattern = r"\W*".join(chars)
-    return re.compile(pattern, flags=re.IGNORECASE | re.UNICODE)
+    compact = compact_text(phrase)
+    pattern = r"[\W\d_]*".join(re.escape(ch) for ch in compact)
+    return compact, re.compile(pattern, flags=re.IGNORECASE | re.UNICODE)
 
-# Markers (very tolerant)
+# Markers (very tolerant); matched on the compact text, which also covers
+# their plain \s+ forms
 MOTIVATION_MARKERS = [
-    spaced_regex("Σκέφθηκε κατά τον Νόμο"),
-    re.compile(r"Σκέφθηκε\s+κατά\s+τον\s+Νόμο", re.IGNORECASE),
+    compact_marker("Σκέφθηκε κατά τον Νόμο"),
 ]
 
 DECISION_MARKERS = [
-    spaced_regex("Διατάυτα"),              # ανορθογραφικές παραλλαγές
-    spaced_regex("Διατά τ α"),             # υπερ-χαλαρό
-    spaced_regex("Δι ά τ α ύ τ α"),
-    re.compile(r"Διατάυτα", re.IGNORECASE),
-    re.compile(r"ΓΙΑ\s+ΤΟΥΣ\s+ΛΟΓΟΥΣ\s+ΑΥΤΟΥΣ", re.IGNORECASE),
+    compact_marker("Διατάυτα"),              # ανορθογραφικές παραλλαγές
+    compact_marker("Διατά τ α"),             # υπερ-χαλαρό
+    compact_marker("Δι ά τ α ύ τ α"),
+    compact_marker("ΓΙΑ ΤΟΥΣ ΛΟΓΟΥΣ ΑΥΤΟΥΣ"),
 ]
 
 CONCLUSIONS_MARKERS = [
-    re.compile(r"Η\s+διάσκεψη\s+έγινε", re.IGNORECASE),
-    re.compile(r"Κρίθηκε\s+και\s+αποφασίσθηκε", re.IGNORECASE),
+    compact_marker("Η διάσκεψη έγινε"),
+    compact_marker("Κρίθηκε και αποφασίσθηκε"),
 ]
 
+# All three groups are located on the same compact text (one pass over the document)
+_MARKER_GROUPS = (("mot", MOTIVATION_MARKERS), ("dec", DECISION_MARKERS), ("conc", CONCLUSIONS_MARKERS))
+
 # Date-extractors near certain keywords
-DATE_RE = re.compile(
+DATE_RE = dfa_compile(
     r"(?P<d>\d{1,2}(?:η|ης|ος|ου)?)\s+"
     r"(?P<m>Ιανουαρίου|Φεβρουαρίου|Μαρτίου|Απριλίου|Μαΐου|Μαίου|Ιουνίου|Ιουλίου|Αυγούστου|Σεπτεμβρίου|Οκτωβρίου|Νοεμβρίου|Δεκεμβρίου)\s+"
     r"(?P<y>\d{4})",
-    re.IGNORECASE | re.UNICODE
+    ignore_case=True
 )
 
-def find_first(text: str, patterns) -> int:
-    for p in patterns:
-        m = p.search(text)
-        if m:
-            return m.start()
-    return -1
+# Keywords that precede each date, in priority order per field
+DATE_KEYWORDS = (
+    ("publicHearingDate", (
+        r"Συνεδρίασε\s+δημόσια[^\n]{0,200}?στις",
+        r"Συνήλθε\s+σε\s+δημόσια\s+συνεδρίαση[^\n]{0,200}?(?:την|στις)",
+    )),
+    ("courtConferenceDate", (
+        r"Η\s+διάσκεψη\s+έγινε[^\n]{0,200}?(?:την|στις)",
+        r"Κρίθηκε\s+και\s+αποφασίσθηκε[^\n]{0,200}?(?:την|στις)",
+    )),
+    ("decisionPublicationDate", (
+        r"δημοσιεύθηκε[^\n]{0,200}?(?:την|της|στις)",
+    )),
+)
 
-def find_keyword_date(text: str, kw_patterns) -> Optional[str]:
+def fold_case(text: str) -> str:
     """
-    Find a date that appears after (or within the same line as) one of the keywords.
+    Lower-case with σ/ς folded, same length as text (so offsets carry over).
+    Scanning this with case-sensitive patterns matches what re.IGNORECASE matches
+    for Greek, but lets re use its fast literal-prefix search.
     """
-    for p in kw_patterns:
-        m = p.search(text)
-        if not m:
-            continue
-        tail = text[m.start(): m.start() + 1000]  # local window
-        mdate = DATE_RE.search(tail)
-        if mdate:
-            return to_iso_date(mdate.group("d"), mdate.group("m"), mdate.group("y"))
+    low = text.lower().replace("ς", "σ")
+    if len(low) != len(text):  # e.g. "İ" lower-cases to two chars
+        low = "".join(c if len(c.lower()) != 1 else c.lower() for c in text).replace("ς", "σ")
+    return low
+
+# Keyword patterns for the case-folded text (they only contain lower-case escapes).
+# With re, one search per keyword (literal prefix) is the fastest; RE2 re-encodes the
+# text on every call, so there all keywords are fused into one pattern (group k<i>_<j>
+# is keyword j of field i), searched once per keyword occurrence.
+_DATE_KW_RES = [[dfa_compile(fold_case(kw)) for kw in kws] for _, kws in DATE_KEYWORDS]
+_DATE_KW_FUSED = None if re2 is None else dfa_compile("|".join(
+    f"(?P<k{i}_{j}>{fold_case(kw)})" for i, (_, kws) in enumerate(DATE_KEYWORDS) for j, kw in enumerate(kws)
+))
+
+# Header fields
+_DOC_NUM_RE = dfa_compile(r"Αριθμός\s+(\d{1,4}\s*/\s*\d{4})", ignore_case=True)
+_PROPONENT_COS_RE = dfa_compile(r"ΤΟ\s+ΣΥΜΒΟΥΛΙΟ\s+ΤΗΣ\s+ΕΠΙΚΡΑΤΕΙΑΣ")
+_PROPONENT_AP_RE = dfa_compile(r"ΤΟ\s+ΔΙΚΑΣΤΗΡΙΟ\s+ΤΟΥ\s+ΑΡΕΙΟΥ\s+ΠΑΓΟΥ")
+# court code -> (proponent regex, docProponent, a word the regex needs)
+PROPONENTS = {
+    "COS": (_PROPONENT_COS_RE, "ΤΟ ΣΥΜΒΟΥΛΙΟ ΤΗΣ ΕΠΙΚΡΑΤΕΙΑΣ", "ΕΠΙΚΡΑΤΕΙΑΣ"),
+    "AP":  (_PROPONENT_AP_RE, "ΤΟ ΔΙΚΑΣΤΗΡΙΟ ΤΟΥ ΑΡΕΙΟΥ ΠΑΓΟΥ", "ΠΑΓΟΥ"),
+}
+# court folder (--court) -> court code
+COURT_FOLDERS = {"ste": "COS", "areios_pagos": "AP"}
+_TMIMA_RE = dfa_compile(r"ΤΜΗΜΑ[^ \n]*[^\n]*", ignore_case=True)
+
+# Outcome sentence of any verb, found in one scan. The lookahead makes the
+# matches overlap, so a verb inside another verb's sentence is still seen.
+_OUTCOME_ALT = re.compile(r"(?=(?P<s>(?P<v>" + "|".join(map(re.escape, OUTCOME_VERBS)) + r")[^.\n]*[.\n]))")
+_OUTCOME_RANK = {v: i for i, v in enumerate(OUTCOME_VERBS)}
+
+def _outcome_automaton():
+    """Aho-Corasick automaton over OUTCOME_VERBS, built once per process (None without pyahocorasick)."""
+    if ahocorasick is None:
+        return None
+    A = ahocorasick.Automaton()
+    for i, v in enumerate(OUTCOME_VERBS):
+        A.add_word(v, (i, v))
+    A.make_automaton()
+    return A
+
+_OUTCOME_AC = _outcome_automaton()
+
+def _outcome_sentence(decision_text: str) -> Optional[str]:
+    """
+    From the first occurrence of the highest-priority verb up to the next '.' or newline
+    (inclusive), as with one re.search(rf"{verb}[^.\n]*[.\n]") per verb in order.
+    """
+    if _OUTCOME_AC is None:
+        best, best_rank = None, len(OUTCOME_VERBS)
+        for m in _OUTCOME_ALT.finditer(decision_text):
+            rank = _OUTCOME_RANK[m.group("v")]
+            if rank < best_rank:
+                best, best_rank = m.group("s"), rank
+                if rank == 0:
+                    break
+        return best
+    first = {}
+    for end, (rank, verb) in _OUTCOME_AC.iter(decision_text):
+        if rank not in first:
+            first[rank] = (end + 1 - len(verb), end + 1)
+            if rank == 0:
+                break
+    for rank in sorted(first):
+        start, end = first[rank]
+        # no '.'/newline after a verb's first occurrence means none after its later ones either
+        stops = [i for i in (decision_text.find(".", end), decision_text.find("\n", end)) if i >= 0]
+        if stops:
+            return decision_text[start:min(stops) + 1]
     return None
 
+def find_markers(text: str) -> Dict[str, int]:
+    """
+    Offset in text of the earliest marker of each group ("mot", "dec", "conc"; -1 if none).
+    The text is compacted once; each marker is then a C-level str.find on it.
+    """
+    compact = compact_text(text)
+    found = {}
+    for g, markers in _MARKER_GROUPS:
+        hits = [(i, rx) for i, rx in ((compact.find(c), rx) for c, rx in markers) if i >= 0]
+        if not hits:
+            found[g] = -1
+            continue
+        # the hit has idx letters before it, so it starts at or after offset idx
+        idx, rx = min(hits, key=lambda h: h[0])
+        m = rx.search(text, idx)
+        found[g] = m.start() if m else idx
+    return found
+
+def find_keyword_dates(text: str, folded: Optional[str] = None) -> Dict[str, Optional[str]]:
+    """
+    For each field of DATE_KEYWORDS, find a date that appears after (or within the same line as)
+    one of its keywords (tried in order). The keywords are searched in folded = fold_case(text),
+    built once per document; the date itself is read from the original text.
+    """
+    if folded is None:
+        folded = fold_case(text)
+    fused = {}
+    if _DATE_KW_FUSED is not None:
+        # Not finditer: its matches do not overlap, and a keyword starting inside an
+        # earlier keyword's [^\n]{0,200}? span would be lost. Each search resumes just
+        # after the previous match start, so every keyword occurrence is seen.
+        m = _DATE_KW_FUSED.search(folded)
+        while m:
+            fused.setdefault(m.lastgroup, m)
+            m = _DATE_KW_FUSED.search(folded, m.start() + 1)
+    dates = {}
+    for i, (field, _) in enumerate(DATE_KEYWORDS):
+        dates[field] = None
+        for j, p in enumerate(_DATE_KW_RES[i]):
+            m = fused.get(f"k{i}_{j}") if _DATE_KW_FUSED is not None else p.search(folded)
+            if not m:
+                continue
+            mdate = DATE_RE.search(text, m.start(), m.start() + 1000)  # local window, no slice copy
+            if mdate:
+                dates[field] = to_iso_date(mdate.group("d"), mdate.group("m"), mdate.group("y"))
+                break
+    return dates
+
 def extract_doc_number(text: str) -> Optional[str]:
-    m = re.search(r"Αριθμός\s+(\d{1,4}\s*/\s*\d{4})", text, re.IGNORECASE)
+    m = _DOC_NUM_RE.search(text)
     if m:
         return m.group(1).replace(" ", "")
     return None
 
-def extract_court_and_titles(text: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+def extract_court_and_titles(text: str, order=("COS", "AP")) -> Tuple[Optional[str], Optional[str], Optional[str]]:
     """
     Returns (court_code, docProponent, subDepartment)
+    order: court codes to try, first match wins.
     """
     # docProponent
-    proponent = None
-    if re.search(r"ΤΟ\s+ΣΥΜΒΟΥΛΙΟ\s+ΤΗΣ\s+ΕΠΙΚΡΑΤΕΙΑΣ", text):
-        proponent = "ΤΟ ΣΥΜΒΟΥΛΙΟ ΤΗΣ ΕΠΙΚΡΑΤΕΙΑΣ"
-        court = "COS"
-    elif re.search(r"ΤΟ\s+ΔΙΚΑΣΤΗΡΙΟ\s+ΤΟΥ\s+ΑΡΕΙΟΥ\s+ΠΑΓΟΥ", text):
-        proponent = "ΤΟ ΔΙΚΑΣΤΗΡΙΟ ΤΟΥ ΑΡΕΙΟΥ ΠΑΓΟΥ"
-        court = "AP"
-    else:
-        court = None
+    court = proponent = None
+    for code in order:
+        rx, name, word = PROPONENTS[code]
+        if word in text and rx.search(text):
+            court, proponent = code, name
+            break
 
     # subDepartment
     sub = None
-    m = re.search(r"ΤΜΗΜΑ[^ \n]*[^\n]*", text, re.IGNORECASE)
+    m = _TMIMA_RE.search(text)
     if m:
         sub = m.group(0).strip()
 
@@ -156,9 +364,8 @@ def segment_text(text: str) -> Dict[str, str]:
     """
     Return segments: introduction, motivation, decision_text, conclusions
     """
-    i_mot = find_first(text, MOTIVATION_MARKERS)
-    i_dec = find_first(text, DECISION_MARKERS)
-    i_conc = find_first(text, CONCLUSIONS_MARKERS)
+    found = find_markers(text)
+    i_mot, i_dec, i_conc = found["mot"], found["dec"], found["conc"]
 
     n = len(text)
 
@@ -188,10 +395,9 @@ def extract_outcome(decision_text: str) -> Optional[str]:
     # Look for the first strong verb (Απορρίπτει/Αναιρεί/Δέχεται/…)
     if not decision_text:
         return None
-    for verb in OUTCOME_VERBS:
-        m = re.search(rf"{verb}[^.\n]*[.\n]", decision_text)
-        if m:
-            return m.group(0).strip().rstrip("\n")
+    best = _outcome_sentence(decision_text)
+    if best is not None:
+        return best.strip().rstrip("\n")
     # fallback: first non-empty line
     for line in decision_text.splitlines():
         ln = line.strip()
@@ -199,32 +405,39 @@ def extract_outcome(decision_text: str) -> Optional[str]:
             return ln
     return None
 
-def build_intermediate(text: str, src_path: Path) -> Tuple[Optional[Dict], Optional[str]]:
+def make_court_extractor(court_folder: str):
     """
-    Returns (json_dict or None, error_message or None)
+    extract_court_and_titles specialised for a batch of one court folder: its own
+    court is tried first, so the usual file needs a single proponent search.
+    Unknown folders get the general function.
     """
-    text = nfc(text)
+    code = COURT_FOLDERS.get(court_folder)
+    if code is None:
+        return extract_court_and_titles
+    return partial(extract_court_and_titles, order=(code,) + tuple(c for c in PROPONENTS if c != code))
 
-    doc_number = extract_doc_number(text)
-    court, docProponent, subDepartment = extract_court_and_titles(text)
+def build_intermediate(text: str, src_path: Path, checksum: Optional[str] = None,
+                       court_extract=extract_court_and_titles) -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    Returns (json_dict or None, error_message or None)
+    checksum: sha256 of the UTF-8 bytes text was decoded from (optional). If text is
+    already NFC that is the checksum of the text, so it is not re-encoded and hashed.
+    court_extract: extract_court_and_titles or a make_court_extractor() specialisation.
+    """
+    if not unicodedata.is_normalized("NFC", text):
+        text = unicodedata.normalize("NFC", text)
+        checksum = None
 
-    # Dates
-    publicHearingDate = find_keyword_date(text, [
-        re.compile(r"Συνεδρίασε\s+δημόσια.*?στις", re.IGNORECASE),
-        re.compile(r"Συνήλθε\s+σε\s+δημόσια\s+συνεδρίαση.*?(?:την|στις)", re.IGNORECASE),
-    ])
-    courtConferenceDate = find_keyword_date(text, [
-        re.compile(r"Η\s+διάσκεψη\s+έγινε.*?(?:την|στις)", re.IGNORECASE),
-        re.compile(r"Κρίθηκε\s+και\s+αποφασίσθηκε.*?(?:την|στις)", re.IGNORECASE),
-    ])
-    decisionPublicationDate = find_keyword_date(text, [
-        re.compile(r"δημοσιεύθηκε.*?(?:την|της|στις)", re.IGNORECASE),
-    ])
+    folded = fold_case(text)
 
-    seg = segment_text(text)
-    outcome = extract_outcome(seg["decision_text"])
+    # Cheap literal checks first: without these words the regexes cannot match
+    doc_number = extract_doc_number(text) if "αριθμόσ" in folded else None
+    if any(word in text for _, _, word in PROPONENTS.values()):
+        court, docProponent, subDepartment = court_extract(text)
+    else:
+        court = None
 
-    # Minimal acceptance
+    # Minimal acceptance (before the dates/segmentation, which a rejected file does not need)
     missing = []
     if not doc_number:
         missing.append("docNumber")
@@ -233,19 +446,25 @@ def build_intermediate(text: str, src_path: Path) -> Tuple[Optional[Dict], Optio
     if missing:
         return None, f"Missing required fields: {', '.join(missing)}"
 
+    # Dates
+    dates = find_keyword_dates(text, folded)
+
+    seg = segment_text(text)
+    outcome = extract_outcome(seg["decision_text"])
+
     intermediate = {
         "court": court,
         "source": str(src_path),
-        "checksum": sha256_text(text),
+        "checksum": checksum if checksum is not None else sha256_text(text),
         "header": {
             "docNumber": doc_number,
             "docProponent": docProponent,
             "subDepartment": subDepartment,
             "headerDetails": None,
         },
-        "publicHearingDate": publicHearingDate,
-        "courtConferenceDate": courtConferenceDate,
-        "decisionPublicationDate": decisionPublicationDate,
+        "publicHearingDate": dates["publicHearingDate"],
+        "courtConferenceDate": dates["courtConferenceDate"],
+        "decisionPublicationDate": dates["decisionPublicationDate"],
         "judgmentBody": {
             "introduction": seg["introduction"],
             "motivation": seg["motivation"],
@@ -258,10 +477,43 @@ def build_intermediate(text: str, src_path: Path) -> Tuple[Optional[Dict], Optio
     }
     return intermediate, None
 
+def process_one(job: Tuple[Path, Path, Path], dry_run: bool = False, force: bool = False,
+                court_extract=extract_court_and_titles) -> Tuple[Dict, str]:
+    """
+    Parse one TXT file and write its JSON (or parse-error JSON).
+    job: (TXT path, JSON path, parse-error JSON path), precomputed by main.
+    Returns (summary item, status text) for the batch report and progress log.
+    A JSON newer than its TXT is left as is (not even read) unless force is set.
+    Top-level so it can run in worker processes.
+    """
+    tf, out_path, err_path = job
+    if not (dry_run or force):
+        try:
+            if out_path.stat().st_mtime > tf.stat().st_mtime:
+                return ({"file": str(tf), "ok": True, "json": str(out_path), "skipped": True},
+                        f"SKIP — {tf.name}: {out_path.name} is up to date")
+        except FileNotFoundError:
+            pass
+
+    text, checksum = read_text_file(tf)
+    data, err = build_intermediate(text, tf, checksum, court_extract)
+    if err:
+        item = {"file": str(tf), "ok": False, "error": err}
+        if not dry_run:
+            dump_json(err_path, item)
+        return item, f"ERR — {tf.name}: {err}"
+
+    # Write JSON
+    if not dry_run:
+        dump_json(out_path, data)
+    return {"file": str(tf), "ok": True, "json": str(out_path)}, f"OK  — {tf.name} -> {out_path.name}"
+
 # -----------------------------
 # CLI
 # -----------------------------
 
+PROGRESS_EVERY = 50  # progress lines are written in batches of this many files
+
 def main():
     ap = argparse.ArgumentParser(description="Build intermediate JSON from raw TXT decisions.")
     ap.add_argument("--court", required=True, help="Court folder under root (e.g., areios_pagos, ste).")
@@ -269,6 +521,8 @@ def main():
     ap.add_argument("--root", default="legal_texts", help="Root folder containing <court>/<year> (default: legal_texts).")
     ap.add_argument("--outroot", default="JSON", help="Root for output JSON (default: JSON).")
     ap.add_argument("--dry-run", action="store_true", help="Parse/validate without writing files.")
+    ap.add_argument("--force", action="store_true", help="Re-parse files whose JSON is newer than the TXT.")
+    ap.add_argument("--workers", type=int, default=os.cpu_count(), help="Parallel worker processes (default: all CPUs; 1 = serial).")
     args = ap.parse_args()
 
     base = Path(__file__).resolve().parent
@@ -283,44 +537,50 @@ def main():
     if not txt_files:
         raise SystemExit(f"No TXT files found in: {in_dir}")
 
-    print(f"[INFO] Parsing {len(txt_files)} TXT files from {in_dir}")
+    total = len(txt_files)
+    jobs = [(tf, (out_dir / tf.name).with_suffix(".json"), (out_dir / tf.name).with_suffix(".parse-error.json"))
+            for tf in txt_files]
+
+    print(f"[INFO] Parsing {total} TXT files from {in_dir}")
     print(f"[INFO] Output directory: {out_dir}")
 
-    summary = {"ok": 0, "errors": 0, "items": []}
+    summary = {"ok": 0, "errors": 0, "skipped": 0, "items": []}
 
-    for i, tf in enumerate(txt_files, 1):
-        try:
-            text = tf.read_text(encoding="utf-8")
-        except UnicodeDecodeError:
-            # Retry with latin-1 as last resort
-            text = tf.read_text(encoding="latin-1")
-            text = text.encode("latin-1").decode("utf-8", errors="ignore")
-
-        data, err = build_intermediate(text, tf)
-        if err:
-            summary["errors"] += 1
-            item = {"file": str(tf), "ok": False, "error": err}
-            summary["items"].append(item)
-            err_path = (out_dir / tf.name).with_suffix(".parse-error.json")
-            if not args.dry_run:
-                err_path.write_text(json.dumps(item, ensure_ascii=False, indent=2), encoding="utf-8")
-            print(f"  [{i}/{len(txt_files)}] ERR — {tf.name}: {err}")
-            continue
+    # Files are independent: parse them in worker processes, each writing its own JSON
+    work = partial(process_one, dry_run=args.dry_run, force=args.force,
+                   court_extract=make_court_extractor(args.court))
+    if args.workers == 1 or total < 2:
+        results = map(work, jobs)
+        ex = None
+    else:
+        ex = ProcessPoolExecutor(max_workers=args.workers)
+        results = ex.map(work, jobs, chunksize=8)
+    progress = []
 
-        # Write JSON
-        out_path = (out_dir / tf.name).with_suffix(".json")
-        js = json.dumps(data, ensure_ascii=False, indent=2)
-        if not args.dry_run:
-            out_path.write_text(js, encoding="utf-8")
+    def flush_progress():
+        lines = "\n".join(progress) + "\n"
+        progress.clear()
+        sys.stdout.write(lines)
+        sys.stdout.flush()
 
-        summary["ok"] += 1
-        summary["items"].append({"file": str(tf), "ok": True, "json": str(out_path)})
-        print(f"  [{i}/{len(txt_files)}] OK  — {tf.name} -> {out_path.name}")
+    try:
+        for i, (item, status) in enumerate(results, 1):
+            summary["skipped" if item.get("skipped") else "ok" if item["ok"] else "errors"] += 1
+            summary["items"].append(item)
+            progress.append(f"  [{i}/{total}] {status}")
+            # one write per batch instead of a print per file; errors show up at once
+            if len(progress) >= PROGRESS_EVERY or not item["ok"]:
+                flush_progress()
+    finally:
+        if progress:
+            flush_progress()
+        if ex is not None:
+            ex.shutdown()
 
     # Batch report
     report = out_dir / "_text2json_batch_report.json"
-    report.write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8")
-    print(f"[INFO] Done. OK={summary['ok']}  ERRORS={summary['errors']}")
+    dump_json(report, summary, indent=True)
+    print(f"[INFO] Done. OK={summary['ok']}  ERRORS={summary['errors']}  SKIPPED={summary['skipped']}")
     print(f"[INFO] Batch report: {report}")
 
 if __name__ == "__main__":
@@ -680,3 +680,12 @@ councilConferenceDatePattern = r'(?P<string>Συνεδρίαση)(?P<garbage>.*?
 opinionSignatureDatePattern = r'(?P<string>Θεωρήθηκε\s*|Αθήνα[,]?\s*)(?P<garbage>.*?)(?P<dd>\d{1,2})(?P<numSpecialLektiko>(ας|ης|η|ής)*)(?P<keno_1>\s*[.]*[-]*\s*)(?P<mm>Ιανουαρίου|Φεβρουαρίου|Μαρτίου|Απριλίου|Μαΐου|Μαϊου|Μαίου|Ιουνίου|Ιουλίου|Αυγούστου|Σεπτεμβρίου|Οκτωβρίου|Νοεμβρίου|Δεκεμβρίου|\d{1,2})(?P<keno_2>\s*[.]*[-]*\s*)(?P<yyyy>\d{4})'
 # paragraph pattern
 paragraphPattern = r'([<][/]p[>][<]p[>])'
+
+"""compiled versions of the patterns above (compiled once at import,
+so every module/worker process shares them instead of re-compiling)"""
+publicHearingDateRegex = re.compile(publicHearingDatePattern)
+decisionPublicationDateRegex = re.compile(decisionPublicationDatePattern)
+courtConferenceDateRegex = re.compile(courtConferenceDatePattern)
+councilConferenceDateRegex = re.compile(councilConferenceDatePattern)
+opinionSignatureDateRegex = re.compile(opinionSignatureDatePattern)
+paragraphRegex = re.compile(paragraphPattern)